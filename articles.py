@@ -0,0 +1,74 @@
+from dateutil import parser
+
+# Timestamp used for articles that carry none of the known timestamp fields
+DEFAULT_TIMESTAMP = "2020-01-01T00:00:00Z"
+
+
+def resolve_timestamp(article):
+    """Pick an article's last-modified timestamp from the field names Pylon sources may use."""
+    # Try various timestamp field names that might exist
+    return (
+        article.get("updated_at") or
+        article.get("modified_at") or
+        article.get("last_updated") or
+        article.get("last_modified") or
+        article.get("last_published_at") or  # This is the key field from Pylon!
+        article.get("published_at") or
+        article.get("date_updated") or
+        article.get("date_modified")
+    )
+
+
+class PylonArticle:
+    """Compact Pylon article record: metadata is resolved eagerly, Markdown and content hash only on demand."""
+
+    __slots__ = ("id", "title", "url", "updated_at", "html", "content", "content_hash", "_timestamp")
+
+    def __init__(self, article_id, title, url, updated_at, html):
+        self.id = article_id
+        self.title = title
+        self.url = url
+        self.updated_at = updated_at
+        self.html = html  # Raw HTML, released once converted
+        self.content = None
+        self.content_hash = None
+        self._timestamp = None
+
+    @classmethod
+    def from_pylon(cls, article):
+        """Build a record from a raw Pylon article; updated_at is None if no timestamp field is present."""
+        return cls(
+            article.get("id") or article.get("_id"),
+            article.get("title") or article.get("name") or "Untitled",
+            article.get("url", ""),
+            resolve_timestamp(article),
+            article.get("current_published_content_html", "") or ""
+        )
+
+    @property
+    def timestamp(self):
+        """Parsed updated_at, cached so dateutil runs at most once per article per run."""
+        if self._timestamp is None:
+            try:
+                self._timestamp = parser.parse(self.updated_at)
+            except Exception as e:
+                # Cache the failure too, so callers falling back to hashes don't re-parse
+                self._timestamp = e
+        if isinstance(self._timestamp, Exception):
+            raise self._timestamp
+        return self._timestamp
+
+    def set_content(self, content, content_hash):
+        self.content = content
+        self.content_hash = content_hash
+        self.html = None
+
+
+def convert_pending(articles, cache, hash_content):
+    """Convert the articles that haven't been converted yet in one batch, dropping those with empty content."""
+    pending = [article for article in articles if article.content is None]
+    if pending:
+        converted = cache.convert([{"current_published_content_html": article.html} for article in pending], hash_content)
+        for article, (content, content_hash) in zip(pending, converted):
+            article.set_content(content, content_hash)
+    return [article for article in articles if article.content.strip()]
@@ -0,0 +1,164 @@
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+import requests
+
+from http_client import get_ada_client
+from metrics import run_in_context
+
+# Upper bound on the serialized size of a single bulk upsert request body
+MAX_BATCH_BYTES = 2 * 1024 * 1024
+
+# Upper bound on the number of articles in a single bulk upsert request
+MAX_BATCH_ARTICLES = 100
+
+# Number of bulk upsert requests sent to Ada concurrently
+UPLOAD_WORKERS = 4
+
+# Upper bound on the encoded query string of a single article DELETE (IDs are passed as repeated ?id= params),
+# well under the 8 KB request-line limit common to proxies and servers
+MAX_DELETE_QUERY_BYTES = 4096
+
+# Upper bound on the number of article IDs in a single DELETE request
+MAX_DELETE_IDS = 100
+
+# Number of article DELETE requests sent to Ada concurrently
+DELETE_WORKERS = 4
+
+
+def iter_batches(articles, max_bytes=MAX_BATCH_BYTES, max_articles=MAX_BATCH_ARTICLES):
+    """Group Ada-formatted articles into batches that stay under both the byte-size and article-count limits."""
+    batch = []
+    batch_bytes = 2  # Opening and closing brackets of the JSON array
+    for article in articles:
+        # Account for the article's serialized size plus the ", " json.dumps puts between list items
+        article_bytes = len(json.dumps(article).encode("utf-8")) + 2
+
+        # An article that is larger than max_bytes on its own still goes out, in a batch of one
+        if batch and (batch_bytes + article_bytes > max_bytes or len(batch) >= max_articles):
+            yield batch
+            batch = []
+            batch_bytes = 2
+
+        batch.append(article)
+        batch_bytes += article_bytes
+
+    if batch:
+        yield batch
+
+
+def _post_batch(batch_number, batch, ada_api_key, ada_bot_url):
+    """POST one batch to Ada's bulk endpoint and describe the outcome instead of raising."""
+    result = {
+        "batch": batch_number,
+        "ids": [article["id"] for article in batch],
+        "titles": [article["name"] for article in batch],
+        "ok": False,
+        "error": None
+    }
+    try:
+        # Bulk upserts are keyed by article ID, so repeating one after a server error is safe
+        res = get_ada_client(ada_api_key, ada_bot_url).post("/api/v2/knowledge/bulk/articles/", json_body=batch, idempotent=True)
+        res.raise_for_status()
+        result["ok"] = True
+    except requests.HTTPError as e:
+        # Keep Ada's error body since it usually names the offending article
+        result["error"] = f"{e} - Ada response: {e.response.text}"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def iter_id_chunks(article_ids, max_query_bytes=MAX_DELETE_QUERY_BYTES, max_ids=MAX_DELETE_IDS):
+    """Group article IDs into chunks whose `id=...&id=...` query string stays under `max_query_bytes`."""
+    chunk = []
+    chunk_bytes = 0
+    for article_id in article_ids:
+        # "id=" plus the percent-encoded ID, plus the separating "&"
+        id_bytes = len(quote(str(article_id), safe="")) + 4
+
+        if chunk and (chunk_bytes + id_bytes > max_query_bytes or len(chunk) >= max_ids):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+
+        chunk.append(article_id)
+        chunk_bytes += id_bytes
+
+    if chunk:
+        yield chunk
+
+
+def _delete_chunk(chunk_number, article_ids, ada_api_key, ada_bot_url):
+    """DELETE one chunk of article IDs from Ada and describe the outcome instead of raising."""
+    result = {
+        "batch": chunk_number,
+        "ids": list(article_ids),
+        "ok": False,
+        "error": None
+    }
+    try:
+        res = get_ada_client(ada_api_key, ada_bot_url).delete(
+            "/api/v2/knowledge/articles/",
+            params={"id": article_ids}
+        )
+        res.raise_for_status()
+        result["ok"] = True
+    except requests.HTTPError as e:
+        result["error"] = f"{e} - Ada response: {e.response.text}"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def _run_batches(batches, send, workers, on_result):
+    """Send numbered batches over a worker pool, keeping only a bounded number queued, and collect the results."""
+    results = []
+
+    def collect(futures):
+        for future in futures:
+            result = future.result()
+            if on_result:
+                on_result(result)
+            results.append(result)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch_number, batch in enumerate(batches, start=1):
+            # Keep only a bounded number of batches queued so a streamed input is not fully materialised
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(run_in_context(send), batch_number, batch))
+
+        collect(pending)
+
+    return sorted(results, key=lambda result: result["batch"])
+
+
+def upload_batches(articles, ada_api_key, ada_bot_url, workers=UPLOAD_WORKERS,
+                   max_bytes=MAX_BATCH_BYTES, max_articles=MAX_BATCH_ARTICLES, on_result=None):
+    """Split articles into batches and upload them over a small worker pool, returning one result per batch.
+
+    `on_result`, if given, is called in the caller's thread with each result as soon as its batch completes.
+    """
+    return _run_batches(
+        iter_batches(articles, max_bytes, max_articles),
+        lambda batch_number, batch: _post_batch(batch_number, batch, ada_api_key, ada_bot_url),
+        workers, on_result
+    )
+
+
+def delete_batches(article_ids, ada_api_key, ada_bot_url, workers=DELETE_WORKERS,
+                   max_query_bytes=MAX_DELETE_QUERY_BYTES, max_ids=MAX_DELETE_IDS, on_result=None):
+    """Delete articles in URL-safe chunks over a small worker pool, returning one result per chunk.
+
+    Requests still go through the shared client, so they respect its per-host concurrency cap and
+    retry policy. `on_result` works as in upload_batches.
+    """
+    return _run_batches(
+        iter_id_chunks(article_ids, max_query_bytes, max_ids),
+        lambda chunk_number, chunk: _delete_chunk(chunk_number, chunk, ada_api_key, ada_bot_url),
+        workers, on_result
+    )
@@ -0,0 +1,147 @@
+"""Parity harness and micro-benchmarks for the HTML-to-Markdown conversion engines (see convert.py).
+
+Usage:
+  python benchmarks/converters.py parity [CORPUS] [--show N] [--json]
+  python benchmarks/converters.py speed [CORPUS] [--engines markdownify,fast] [--repeat N]
+
+CORPUS is one of:
+  --articles N [--seed S]   a synthetic KB of N articles (the default, 1000 articles)
+  --snapshot PATH           the raw article HTML stored in a snapshot (see snapshot.py)
+  --html-dir DIR            every *.html file in DIR
+
+`parity` converts every article with both engines and diffs the Markdown. It also reports how many
+articles the fast engine rendered itself and which markup sent the rest to markdownify. It exits
+with status 1 if any output differs, so it can gate a switch of SYNC_CONVERTER.
+
+`speed` times each engine over the corpus in a single process (best of --repeat runs) and reports
+articles and HTML megabytes per second.
+"""
+import argparse
+import difflib
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+
+def load_corpus(args):
+    """Return [(name, html)] for the corpus selected on the command line."""
+    if args.snapshot:
+        from snapshot import Snapshot
+        return [(record["id"], (record["raw"] or {}).get("current_published_content_html") or "")
+                for record in Snapshot(args.snapshot)]
+    if args.html_dir:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(args.html_dir, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                corpus.append((os.path.basename(path), f.read()))
+        return corpus
+
+    from synthetic_kb import generate_articles
+    return [(article["id"], article["current_published_content_html"])
+            for article in generate_articles(args.articles, seed=args.seed)]
+
+
+def run_parity(corpus, show):
+    import fast_markdown
+    from convert import fast_engine, markdownify_engine
+
+    mismatches = []
+    unsupported = Counter()
+    for name, html in corpus:
+        try:
+            fast_markdown.convert(html)
+        except fast_markdown.UnsupportedMarkup as e:
+            unsupported[str(e)] += 1
+        expected = markdownify_engine(html)
+        actual = fast_engine(html)
+        if actual != expected:
+            mismatches.append((name, expected, actual))
+
+    for name, expected, actual in mismatches[:show]:
+        print(f"--- {name}")
+        sys.stdout.writelines(difflib.unified_diff(
+            expected.splitlines(keepends=True), actual.splitlines(keepends=True), "markdownify", "fast"
+        ))
+        print()
+
+    return {
+        "articles": len(corpus),
+        "identical": len(corpus) - len(mismatches),
+        "mismatched": [name for name, _, _ in mismatches],
+        "fast_path": len(corpus) - sum(unsupported.values()),
+        "fallback_reasons": dict(unsupported.most_common())
+    }
+
+
+def run_speed(corpus, engines, repeat):
+    from convert import get_engine
+
+    html_mb = sum(len(html.encode("utf-8")) for _, html in corpus) / 1024 / 1024
+    results = []
+    for name in engines:
+        convert = get_engine(name)
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _, html in corpus:
+                convert(html)
+            seconds = time.perf_counter() - started
+            best = seconds if best is None else min(best, seconds)
+        results.append({
+            "engine": name,
+            "seconds": round(best, 3),
+            "articles_per_second": round(len(corpus) / best, 1) if best else None,
+            "mb_per_second": round(html_mb / best, 2) if best else None
+        })
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compare and benchmark the HTML-to-Markdown engines.")
+    arg_parser.add_argument("command", choices=("parity", "speed"))
+    arg_parser.add_argument("--articles", type=int, default=1000, help="Size of the synthetic corpus")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--snapshot", help="Use the articles of this snapshot as the corpus")
+    arg_parser.add_argument("--html-dir", help="Use every *.html file in this directory as the corpus")
+    arg_parser.add_argument("--show", type=int, default=5, help="Number of mismatching articles to diff")
+    arg_parser.add_argument("--engines", default="markdownify,fast", help="Comma-separated engines to time")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per engine; the best is reported")
+    arg_parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = arg_parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    corpus = load_corpus(args)
+
+    if args.command == "parity":
+        result = run_parity(corpus, 0 if args.json else args.show)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"{result['identical']} of {result['articles']} articles identical, "
+                  f"{result['fast_path']} rendered by the fast engine itself")
+            for reason, count in result["fallback_reasons"].items():
+                print(f"  fell back to markdownify: {reason} ({count})")
+        return 1 if result["mismatched"] else 0
+
+    results = run_speed(corpus, args.engines.split(","), args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'engine':<12} {'seconds':>8} {'articles/s':>11} {'MB/s':>7}")
+        for row in results:
+            print(f"{row['engine']:<12} {row['seconds']:>8.3f} {row['articles_per_second'] or 0:>11.1f} {row['mb_per_second'] or 0:>7.2f}")
+        baseline = results[0]["seconds"]
+        for row in results[1:]:
+            if row["seconds"]:
+                print(f"{row['engine']} is {baseline / row['seconds']:.1f}x {results[0]['engine']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
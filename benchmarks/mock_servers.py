@@ -0,0 +1,337 @@
+"""Local stand-ins for the Pylon and Ada APIs, for offline benchmarks and manual testing.
+
+Usage:
+  python benchmarks/mock_servers.py [--articles N] [--latency-ms MS] [--error-rate P] [--throttle-rate P]
+
+Only the endpoints this tool calls are implemented. Both servers can add latency, enforce
+per-endpoint rate limits (answering 429 with Retry-After) and inject random 429/5xx errors.
+Pylon's KB and single-article reads carry an ETag and answer a matching If-None-Match with 304.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+# Page size caps of the real APIs
+PYLON_MAX_PAGE_SIZE = 200
+ADA_MAX_PAGE_SIZE = 100
+
+# Documented Pylon limits (requests per minute), enforced like the real API would
+PYLON_RATE_LIMITS = {
+    "GET /knowledge-bases/{kb}/articles/{id}": 20,
+    "GET /knowledge-bases/{kb}/articles": 60,
+}
+
+# Responses at least this large are gzip-compressed for clients that accept it
+GZIP_MIN_BYTES = 1024
+
+
+class MockApi:
+    """Shared plumbing: routing, latency, rate limits, fault injection and per-endpoint request counts."""
+
+    routes = []  # (method, compiled pattern, endpoint name, handler method name)
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0, rate_limits=None, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limits = rate_limits or {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.windows = {}  # endpoint -> (window start, requests in window)
+        self.requests = Counter()
+        self.faults = Counter()
+        self.not_modified = Counter()  # endpoint -> 304 responses
+        self.etags = True  # Send ETags on conditional endpoints (and honour If-None-Match)
+        self.cache_control = None  # Cache-Control sent with them, e.g. "max-age=60" or "no-store"
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests.clear()
+            self.faults.clear()
+            self.not_modified.clear()
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "faults": dict(self.faults),
+                "not_modified": dict(self.not_modified),
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received
+            }
+
+    def _throttled(self, endpoint):
+        """Fixed one-minute window per endpoint; returns seconds until the window resets, or None."""
+        limit = self.rate_limits.get(endpoint)
+        if not limit:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            start, count = self.windows.get(endpoint, (now, 0))
+            if now - start >= 60:
+                start, count = now, 0
+            if count >= limit:
+                return max(1, int(60 - (now - start)) + 1)
+            self.windows[endpoint] = (start, count + 1)
+        return None
+
+    def dispatch(self, handler, method):
+        # The body is always consumed, even for rejected requests, so the keep-alive connection stays usable
+        body = handler.read_body()
+        parsed = urlparse(handler.path)
+        query = parse_qs(parsed.query)
+        for route_method, pattern, endpoint, name in self.routes:
+            match = pattern.match(parsed.path) if route_method == method else None
+            if match:
+                break
+        else:
+            return 404, {"error": "not found"}, {}
+
+        with self.lock:
+            self.requests[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        retry_after = self._throttled(endpoint)
+        with self.lock:
+            roll = self.random.random()
+        if retry_after is None and roll < self.throttle_rate:
+            retry_after = 1
+        if retry_after is not None:
+            with self.lock:
+                self.faults["429"] += 1
+            return 429, {"error": "rate limited"}, {"Retry-After": str(retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            with self.lock:
+                self.faults["503"] += 1
+            return 503, {"error": "injected failure"}, {}
+
+        return getattr(self, name)(handler, query, body, **match.groupdict())
+
+    def conditional(self, handler, endpoint, payload):
+        """Answer 200 with an ETag, or a bodyless 304 if the client already holds this version."""
+        headers = {"Cache-Control": self.cache_control} if self.cache_control else {}
+        if not self.etags:
+            return 200, payload, headers
+        headers["ETag"] = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16] + '"'
+        if handler.headers.get("If-None-Match") == headers["ETag"]:
+            with self.lock:
+                self.not_modified[endpoint] += 1
+            return 304, None, headers
+        return 200, payload, headers
+
+    def make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+
+            def read_body(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with api.lock:
+                    api.bytes_received += len(raw)
+                if self.headers.get("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                return json.loads(raw) if raw else None
+
+            def respond(self, method):
+                status, payload, headers = api.dispatch(self, method)
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                if len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    headers["Content-Encoding"] = "gzip"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with api.lock:
+                    api.bytes_sent += len(body)
+
+            def do_GET(self):
+                self.respond("GET")
+
+            def do_POST(self):
+                self.respond("POST")
+
+            def do_DELETE(self):
+                self.respond("DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve in a background thread; returns the base URL."""
+        self.server = ThreadingHTTPServer((host, port), self.make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def _route(method, path, endpoint, name):
+    pattern = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path) + "/?$")
+    return method, pattern, endpoint, name
+
+
+class MockPylon(MockApi):
+    """Pylon knowledge base endpoints: KB lookup, cursor-paginated article listing and single articles."""
+
+    routes = [
+        _route("GET", "/knowledge-bases/{kb}/articles/{article_id}", "GET /knowledge-bases/{kb}/articles/{id}", "get_article"),
+        _route("GET", "/knowledge-bases/{kb}/articles", "GET /knowledge-bases/{kb}/articles", "list_articles"),
+        _route("GET", "/knowledge-bases/{kb}", "GET /knowledge-bases/{kb}", "get_kb"),
+    ]
+
+    def __init__(self, knowledge_bases=None, enforce_rate_limits=True, **options):
+        options.setdefault("rate_limits", PYLON_RATE_LIMITS if enforce_rate_limits else {})
+        super().__init__(**options)
+        self.knowledge_bases = knowledge_bases or {}  # kb_id -> {"title": ..., "articles": [raw article, ...]}
+
+    def get_kb(self, handler, query, body, kb):
+        if kb not in self.knowledge_bases:
+            return 404, {"error": "knowledge base not found"}, {}
+        return self.conditional(handler, "GET /knowledge-bases/{kb}", {"data": {"id": kb, "title": self.knowledge_bases[kb]["title"]}})
+
+    def list_articles(self, handler, query, body, kb):
+        if kb not in self.knowledge_bases:
+            return 404, {"error": "knowledge base not found"}, {}
+        articles = self.knowledge_bases[kb]["articles"]
+        limit = min(int(query.get("limit", [PYLON_MAX_PAGE_SIZE])[0]), PYLON_MAX_PAGE_SIZE)
+        start = int(query.get("cursor", ["0"])[0])
+        end = start + limit
+        return 200, {
+            "data": articles[start:end],
+            "pagination": {"cursor": str(end) if end < len(articles) else None, "has_next_page": end < len(articles)}
+        }, {}
+
+    def get_article(self, handler, query, body, kb, article_id):
+        for article in self.knowledge_bases.get(kb, {}).get("articles", ()):
+            if article["id"] == article_id:
+                return self.conditional(handler, "GET /knowledge-bases/{kb}/articles/{id}", {"data": article})
+        return 404, {"error": "article not found"}, {}
+
+
+class MockAda(MockApi):
+    """Ada knowledge endpoints: sources, paginated article listing, bulk upsert and article deletion."""
+
+    routes = [
+        _route("POST", "/api/v2/knowledge/sources", "POST /sources", "create_source"),
+        _route("GET", "/api/v2/knowledge/sources", "GET /sources", "list_sources"),
+        _route("DELETE", "/api/v2/knowledge/sources/{source_id}", "DELETE /sources/{id}", "delete_source"),
+        _route("GET", "/api/v2/knowledge/articles", "GET /articles", "list_articles"),
+        _route("DELETE", "/api/v2/knowledge/articles", "DELETE /articles", "delete_articles"),
+        _route("POST", "/api/v2/knowledge/bulk/articles", "POST /bulk/articles", "bulk_upsert"),
+    ]
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.sources = {}  # source_id -> source
+        self.articles = {}  # article_id -> article
+        self._listings = {}  # source_id -> articles sorted by ID, rebuilt after writes
+
+    def create_source(self, handler, query, body):
+        self.sources[body["id"]] = body
+        return 201, {"data": body}, {}
+
+    def list_sources(self, handler, query, body):
+        return 200, {"data": list(self.sources.values())}, {}
+
+    def delete_source(self, handler, query, body, source_id):
+        if self.sources.pop(source_id, None) is None:
+            return 404, {"error": "source not found"}, {}
+        with self.lock:
+            for article_id in [a["id"] for a in self.articles.values() if a["knowledge_source_id"] == source_id]:
+                del self.articles[article_id]
+            self._listings.clear()
+        return 204, None, {}
+
+    def list_articles(self, handler, query, body):
+        source_id = query.get("knowledge_source_id", [None])[0]
+        limit = min(int(query.get("limit", [ADA_MAX_PAGE_SIZE])[0]), ADA_MAX_PAGE_SIZE)
+        start = int(query.get("cursor", ["0"])[0])
+        with self.lock:
+            matching = self._listings.get(source_id)
+            if matching is None:
+                matching = sorted(
+                    (a for a in self.articles.values() if not source_id or a["knowledge_source_id"] == source_id),
+                    key=lambda a: a["id"]
+                )
+                self._listings[source_id] = matching
+        end = start + limit
+        next_page_url = None
+        if end < len(matching):
+            params = urlencode({"knowledge_source_id": source_id or "", "limit": limit, "cursor": end})
+            next_page_url = f"http://{handler.headers['Host']}/api/v2/knowledge/articles/?{params}"
+        return 200, {"data": matching[start:end], "meta": {"next_page_url": next_page_url}}, {}
+
+    def delete_articles(self, handler, query, body):
+        with self.lock:
+            for article_id in query.get("id", []):
+                self.articles.pop(article_id, None)
+            self._listings.clear()
+        return 204, None, {}
+
+    def bulk_upsert(self, handler, query, body):
+        if not isinstance(body, list):
+            return 400, {"error": "expected a list of articles"}, {}
+        with self.lock:
+            for article in body:
+                self.articles[article["id"]] = article
+            self._listings.clear()
+        return 200, {"data": [{"id": article["id"]} for article in body]}, {}
+
+
+if __name__ == "__main__":
+    from synthetic_kb import generate_articles
+
+    arg_parser = argparse.ArgumentParser(description="Run mock Pylon and Ada servers until interrupted.")
+    arg_parser.add_argument("--articles", type=int, default=1000, help="Size of the synthetic KB served as 'bench-kb'")
+    arg_parser.add_argument("--pylon-port", type=int, default=8001)
+    arg_parser.add_argument("--ada-port", type=int, default=8002)
+    arg_parser.add_argument("--latency-ms", type=float, default=0)
+    arg_parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 503")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0, help="Fraction of requests answered with 429")
+    arg_parser.add_argument("--no-rate-limits", action="store_true", help="Don't enforce Pylon's documented rate limits")
+    args = arg_parser.parse_args()
+
+    faults = {"latency": args.latency_ms / 1000, "error_rate": args.error_rate, "throttle_rate": args.throttle_rate}
+    pylon = MockPylon(
+        {"bench-kb": {"title": "Benchmark KB", "articles": generate_articles(args.articles)}},
+        enforce_rate_limits=not args.no_rate_limits,
+        **faults
+    )
+    ada = MockAda(**faults)
+    print(f"Pylon: {pylon.start(port=args.pylon_port)} (export PYLON_API_URL to point the sync at it)")
+    print(f"Ada:   {ada.start(port=args.ada_port)} (use it as the Ada bot URL)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pylon.stop()
+        ada.stop()
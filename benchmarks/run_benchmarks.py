@@ -0,0 +1,187 @@
+"""End-to-end offline benchmarks of the sync.py and update_sync.py flows against local mock servers.
+
+Usage:
+  python benchmarks/run_benchmarks.py [--sizes 1000,10000] [--latency-ms MS] [--error-rate P]
+                                      [--throttle-rate P] [--change-fraction F] [--stream]
+                                      [--unthrottled] [--output results.json]
+
+For each KB size, a synthetic KB is served by the mock Pylon server and these scenarios run in
+order, each in a fresh process so peak memory is measured per scenario:
+
+  full-sync        sync.py flow into an empty Ada source
+  delta-first-run  update_sync.py with no local state (reconciles against Ada)
+  no-change        update_sync.py with nothing changed
+  N%-change        update_sync.py after editing a fraction of the articles (default 1%)
+
+Client-side Pylon rate limits stay on by default, so results match what a real run would see
+(the KB listing is capped at 60 pages per minute). --unthrottled lifts them on both sides to
+measure the tool's own throughput.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+KB_ID = "bench-kb"
+BOT_HANDLE = "bench"
+API_KEY = "bench-key"
+
+
+def run_worker(mode, ada_url, result_path, unthrottled):
+    """Run one sync flow in this process and write its timing and memory use to `result_path`."""
+    sys.path.insert(0, REPO_DIR)
+    if unthrottled:
+        import ratelimit
+        ratelimit.PYLON_RATE_LIMITS.clear()  # Must happen before the first Pylon client is created
+
+    from http_client import request_stats
+    from streaming import peak_memory_mb
+
+    started = time.perf_counter()
+    if mode == "sync":
+        from sync import sync_knowledge_base
+        source_id, failed = sync_knowledge_base(KB_ID, API_KEY, API_KEY, ada_url, BOT_HANDLE)
+        result = {"source_id": source_id, "failed": failed}
+    elif mode == "stream":
+        from streaming import stream_delta_sync
+        result = stream_delta_sync(KB_ID, KB_ID, API_KEY, API_KEY, ada_url, BOT_HANDLE)
+    else:
+        from update_sync import perform_delta_sync
+        result = perform_delta_sync(KB_ID, KB_ID, API_KEY, API_KEY, ada_url, BOT_HANDLE)
+    seconds = time.perf_counter() - started
+
+    with open(result_path, "w") as f:
+        json.dump({
+            "seconds": seconds,
+            "peak_memory_mb": peak_memory_mb(),
+            "result": result,
+            "client_requests": request_stats()
+        }, f)
+
+
+def run_scenario(name, mode, size, pylon, ada, workdir, unthrottled):
+    """Run one scenario in a child process and combine its measurements with the mock servers' counters."""
+    pylon.reset_stats()
+    ada.reset_stats()
+    result_path = os.path.join(workdir, f"{name}.json")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", mode, "--ada-url", ada.url, "--result", result_path]
+    if unthrottled:
+        command.append("--unthrottled")
+
+    # Each scenario's output goes to its own log; the state, cache and registry files live in workdir
+    with open(os.path.join(workdir, f"{name}.log"), "w") as log:
+        completed = subprocess.run(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT,
+                                   env=dict(os.environ, PYLON_API_URL=pylon.url))
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        raise RuntimeError(f"Scenario {name} failed - see {os.path.join(workdir, name + '.log')}")
+
+    with open(result_path) as f:
+        measured = json.load(f)
+    # The run's own metrics summary (see metrics.py) is the last line of the metrics file in workdir
+    with open(os.path.join(workdir, "sync_metrics.jsonl")) as f:
+        phases = json.loads(f.readlines()[-1])["phases"]
+    pylon_stats = pylon.stats()
+    ada_stats = ada.stats()
+    faults = {}
+    for stats in (pylon_stats, ada_stats):
+        for status, count in stats["faults"].items():
+            faults[status] = faults.get(status, 0) + count
+
+    return {
+        "size": size,
+        "scenario": name,
+        "mode": mode,
+        "seconds": round(measured["seconds"], 3),
+        "articles_per_second": round(size / measured["seconds"], 1) if measured["seconds"] else None,
+        "peak_memory_mb": measured["peak_memory_mb"],
+        "pylon_requests": pylon_stats["requests"],
+        "ada_requests": ada_stats["requests"],
+        "requests": sum(pylon_stats["requests"].values()) + sum(ada_stats["requests"].values()),
+        "faults": faults,
+        "phases": phases,
+        "bytes_sent": pylon_stats["bytes_sent"] + ada_stats["bytes_sent"],
+        "bytes_received": pylon_stats["bytes_received"] + ada_stats["bytes_received"],
+        "result": measured["result"]
+    }
+
+
+def run_size(size, args):
+    from mock_servers import MockAda, MockPylon
+    from synthetic_kb import generate_articles, mutate
+
+    faults = {"latency": args.latency_ms / 1000, "error_rate": args.error_rate, "throttle_rate": args.throttle_rate}
+    articles = generate_articles(size, seed=args.seed)
+    pylon = MockPylon({KB_ID: {"title": "Benchmark KB", "articles": articles}},
+                      enforce_rate_limits=not args.unthrottled, seed=args.seed, **faults)
+    ada = MockAda(seed=args.seed, **faults)
+    pylon.start()
+    ada.start()
+
+    delta_mode = "stream" if args.stream else "delta"
+    change_name = f"{args.change_fraction * 100:g}%-change"
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as workdir:
+            for name, mode in (("full-sync", "sync"), ("delta-first-run", delta_mode), ("no-change", delta_mode)):
+                results.append(run_scenario(name, mode, size, pylon, ada, workdir, args.unthrottled))
+                print(format_row(results[-1]), flush=True)
+
+            mutate(articles, args.change_fraction, seed=args.seed + 1)
+            results.append(run_scenario(change_name, delta_mode, size, pylon, ada, workdir, args.unthrottled))
+            print(format_row(results[-1]), flush=True)
+    finally:
+        pylon.stop()
+        ada.stop()
+    return results
+
+
+HEADER = f"{'size':>7}  {'scenario':<16} {'seconds':>8} {'articles/s':>11} {'requests':>9} {'429/5xx':>8} {'peak MB':>8}"
+
+
+def format_row(row):
+    faults = sum(row["faults"].values())
+    peak = f"{row['peak_memory_mb']:.1f}" if row["peak_memory_mb"] is not None else "n/a"
+    return (f"{row['size']:>7}  {row['scenario']:<16} {row['seconds']:>8.2f} {row['articles_per_second'] or 0:>11.1f} "
+            f"{row['requests']:>9} {faults:>8} {peak:>8}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark the sync flows against local mock Pylon and Ada servers.")
+    arg_parser.add_argument("--sizes", default="1000", help="Comma-separated KB sizes, e.g. 1000,10000,100000")
+    arg_parser.add_argument("--latency-ms", type=float, default=20, help="Added latency per mock request")
+    arg_parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 503")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0, help="Fraction of requests answered with 429")
+    arg_parser.add_argument("--change-fraction", type=float, default=0.01, help="Fraction of articles edited for the change scenario")
+    arg_parser.add_argument("--stream", action="store_true", help="Benchmark the streaming delta sync (update_sync.py --stream)")
+    arg_parser.add_argument("--unthrottled", action="store_true", help="Lift Pylon rate limits on both client and server")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="Write all results to this JSON file")
+    arg_parser.add_argument("--worker", choices=("sync", "delta", "stream"), help=argparse.SUPPRESS)
+    arg_parser.add_argument("--ada-url", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker, args.ada_url, args.result, args.unthrottled)
+        return 0
+
+    print(HEADER)
+    results = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        results.extend(run_size(size, args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
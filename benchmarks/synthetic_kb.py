@@ -0,0 +1,96 @@
+"""Deterministic generator of synthetic Pylon knowledge bases with realistic article HTML."""
+import random
+from datetime import datetime, timedelta, timezone
+
+_WORDS = (
+    "account admin agent api article billing bot browser cache change channel chat configure connect "
+    "conversation customer dashboard data default delete domain email enable error export field file "
+    "filter help install integration invoice key knowledge language limit login message mobile notification "
+    "option order password payment permission plan profile refund report request reset role rule search "
+    "setting setup sso status subscription support sync team ticket token update upload user webhook workflow"
+).split()
+
+_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _sentence(rng, low=6, high=18):
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(low, high))]
+    return " ".join(words).capitalize() + "."
+
+
+def _inline(rng):
+    """A sentence with the inline markup help-center articles typically carry."""
+    text = _sentence(rng)
+    roll = rng.random()
+    if roll < 0.15:
+        return text.replace(" ", " <strong>", 1).replace(".", "</strong>.", 1)
+    if roll < 0.3:
+        word = rng.choice(_WORDS)
+        return f'{text} See <a href="https://help.example.com/articles/{word}">{word} settings</a>.'
+    if roll < 0.4:
+        return f"{text} Run <code>{rng.choice(_WORDS)} --{rng.choice(_WORDS)}</code> to check."
+    return text
+
+
+def _block(rng):
+    roll = rng.random()
+    if roll < 0.5:
+        return "<p>" + " ".join(_inline(rng) for _ in range(rng.randint(1, 4))) + "</p>"
+    if roll < 0.65:
+        tag = rng.choice(("ul", "ol"))
+        items = "".join(f"<li>{_inline(rng)}</li>" for _ in range(rng.randint(2, 6)))
+        return f"<{tag}>{items}</{tag}>"
+    if roll < 0.75:
+        level = rng.randint(2, 3)
+        return f"<h{level}>{_sentence(rng, 2, 6)[:-1]}</h{level}>"
+    if roll < 0.83:
+        rows = "".join(
+            "<tr>" + "".join(f"<td>{rng.choice(_WORDS)}</td>" for _ in range(3)) + "</tr>"
+            for _ in range(rng.randint(2, 5))
+        )
+        return f"<table><thead><tr><th>Setting</th><th>Value</th><th>Notes</th></tr></thead><tbody>{rows}</tbody></table>"
+    if roll < 0.9:
+        lines = "\n".join(f"{rng.choice(_WORDS)}: {rng.choice(_WORDS)}" for _ in range(rng.randint(2, 8)))
+        return f"<pre><code>{lines}</code></pre>"
+    if roll < 0.95:
+        return f'<p><img src="https://cdn.example.com/{rng.randint(1, 10 ** 6)}.png" alt="{_sentence(rng, 2, 5)[:-1]}"></p>'
+    return f"<blockquote><p>{_inline(rng)}</p></blockquote>"
+
+
+def article_html(rng):
+    """Build one article body; sizes are skewed like real KBs (mostly short, a few very long)."""
+    blocks = max(2, min(200, int(rng.lognormvariate(2.3, 0.8))))
+    return "\n".join(_block(rng) for _ in range(blocks))
+
+
+def _timestamp(rng):
+    return (_EPOCH + timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600))).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def generate_articles(count, seed=0):
+    """Generate `count` raw Pylon articles; the same seed always yields the same KB."""
+    rng = random.Random(seed)
+    articles = []
+    for i in range(count):
+        title = _sentence(rng, 3, 8)[:-1]
+        articles.append({
+            "id": f"art-{i:06d}",
+            "title": title,
+            "url": f"https://help.example.com/articles/{i}",
+            "last_published_at": _timestamp(rng),
+            "current_published_content_html": article_html(rng)
+        })
+    return articles
+
+
+def mutate(articles, fraction, seed=1):
+    """Edit a random `fraction` of articles in place (new content, newer timestamp). Returns their IDs."""
+    rng = random.Random(seed)
+    count = max(1, int(len(articles) * fraction)) if articles and fraction > 0 else 0
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    changed = []
+    for article in rng.sample(articles, count):
+        article["current_published_content_html"] += "\n" + _block(rng)
+        article["last_published_at"] = now
+        changed.append(article["id"])
+    return changed
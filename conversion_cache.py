@@ -0,0 +1,121 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from convert import CONVERTER_VERSION, convert_articles
+from fingerprint import FINGERPRINT_VERSION
+
+# On-disk location of the conversion cache
+CACHE_PATH = os.environ.get("SYNC_CONVERSION_CACHE", "conversion_cache.sqlite3")
+
+# Upper bound on the cached Markdown size before least-recently-used entries are evicted
+MAX_CACHE_BYTES = int(os.environ.get("SYNC_CONVERSION_CACHE_MB", "256")) * 1024 * 1024
+
+
+def cache_key(html):
+    """Key a conversion by the source HTML and the converter/fingerprint versions that produced it."""
+    return hashlib.sha256(f"{CONVERTER_VERSION}\0{FINGERPRINT_VERSION}\0{html}".encode("utf-8")).hexdigest()
+
+
+class ConversionCache:
+    """SQLite-backed LRU cache mapping source HTML to its converted Markdown and content hash."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Concurrent syncs share this file, so wait for other writers instead of failing fast.
+        # A long-running caller may use one instance from successive worker threads (never concurrently)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS conversions ("
+            " key TEXT PRIMARY KEY,"
+            " markdown TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS conversions_last_used ON conversions (last_used)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM conversions").fetchone()[0]
+
+    def get_many(self, keys):
+        """Return {key: (markdown, content_hash)} for the keys present, marking them as recently used."""
+        found = {}
+        unique_keys = list(set(keys))
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.db.execute(
+                f"SELECT key, markdown, content_hash FROM conversions WHERE key IN ({placeholders})", chunk
+            )
+            for key, markdown, content_hash in rows:
+                found[key] = (markdown, content_hash)
+
+        if found:
+            now = time.time()
+            self.db.executemany("UPDATE conversions SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+            self.db.commit()
+        return found
+
+    def put_many(self, entries):
+        """Store (key, markdown, content_hash) entries, then evict least-recently-used rows past the size bound."""
+        now = time.time()
+        rows = []
+        for key, markdown, content_hash in entries:
+            size = len(markdown.encode("utf-8"))
+            rows.append((key, markdown, content_hash, size, now))
+
+        # Replace existing rows so total_bytes doesn't double-count them
+        for key, _, _, _, _ in rows:
+            existing = self.db.execute("SELECT size FROM conversions WHERE key = ?", (key,)).fetchone()
+            if existing:
+                self.total_bytes -= existing[0]
+        self.db.executemany("INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?, ?)", rows)
+        self.total_bytes += sum(row[3] for row in rows)
+
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+        self.db.commit()
+
+    def _evict(self):
+        # Drop oldest entries until the cache is back under 90% of its bound to avoid evicting on every write
+        target = self.max_bytes * 0.9
+        for key, size in self.db.execute("SELECT key, size FROM conversions ORDER BY last_used").fetchall():
+            if self.total_bytes <= target:
+                break
+            self.db.execute("DELETE FROM conversions WHERE key = ?", (key,))
+            self.total_bytes -= size
+
+    def convert(self, articles, hash_content):
+        """Return (markdown, content_hash) per article in input order, converting only HTML not seen before."""
+        keys = [cache_key(article.get("current_published_content_html", "") or "") for article in articles]
+        cached = self.get_many(keys)
+
+        # Convert each missing HTML body once, even if several articles share it
+        missing = {}
+        for key, article in zip(keys, articles):
+            if key not in cached and key not in missing:
+                missing[key] = article
+        missed = sum(1 for key in keys if key not in cached)
+        self.hits += len(keys) - missed
+        self.misses += missed
+
+        if missing:
+            converted = convert_articles(list(missing.values()))
+            new_entries = [(key, markdown, hash_content(markdown)) for key, markdown in zip(missing, converted)]
+            self.put_many(new_entries)
+            cached.update((key, (markdown, content_hash)) for key, markdown, content_hash in new_entries)
+
+        return [cached[key] for key in keys]
+
+    def stats_line(self):
+        """Summarize hit/miss counters for the sync logs."""
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"Conversion cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate), {self.total_bytes / 1024 / 1024:.1f} MB cached"
+
+    def close(self):
+        self.db.close()
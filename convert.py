@@ -0,0 +1,100 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+
+from markdownify import markdownify as md
+
+import fast_markdown
+
+# HTML-to-Markdown engine: "markdownify" (the reference) or "fast" (fast_markdown.py, which gives the same
+# output for the HTML subset Pylon uses and hands anything else to markdownify)
+CONVERTER_ENGINE = os.environ.get("SYNC_CONVERTER", "markdownify")
+
+# Version of the fast engine's rendering rules - bump when they change
+FAST_ENGINE_VERSION = 1
+
+# Identifies the converter output format - cached conversions from another engine or version are ignored
+CONVERTER_VERSION = f"markdownify-{version('markdownify')}"
+if CONVERTER_ENGINE == "fast":
+    CONVERTER_VERSION = f"fast-{FAST_ENGINE_VERSION}+{CONVERTER_VERSION}"
+
+# Number of worker processes used for conversion (defaults to one per CPU)
+CONVERT_WORKERS = int(os.environ.get("SYNC_CONVERT_WORKERS", "0")) or os.cpu_count() or 1
+
+# Batches smaller than this are converted in-process - pool start-up would cost more than it saves
+SERIAL_THRESHOLD = 32
+
+# Number of articles handed to a worker process at a time
+CHUNK_SIZE = 8
+
+# Start method for worker processes: forking a process whose other threads (log listener, prefetchers,
+# engine workers) may hold locks can deadlock the children, so workers start from a clean process instead
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Pools are created on first use and reused for every page of the run (one per worker count)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def markdownify_engine(html):
+    return md(html or "")
+
+
+def fast_engine(html):
+    try:
+        return fast_markdown.convert(html)
+    except fast_markdown.UnsupportedMarkup:
+        return md(html or "")
+
+
+# Engines by name; each converts one article's HTML to Markdown (inside worker processes, so they are module-level)
+ENGINES = {
+    "markdownify": markdownify_engine,
+    "fast": fast_engine
+}
+
+
+def get_engine(name=None):
+    """Look up a conversion engine by name, defaulting to SYNC_CONVERTER."""
+    name = name or CONVERTER_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown converter engine {name!r} - expected one of: {', '.join(ENGINES)}")
+    return ENGINES[name]
+
+
+def html_to_markdown(html, engine=None):
+    """Convert one article's HTML to Markdown with the configured engine."""
+    return get_engine(engine)(html)
+
+
+def _get_pool(workers):
+    # Several syncs may convert concurrently from different threads, so creation is locked
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+            _pools[workers] = pool
+        return pool
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+
+
+def convert_articles(articles, workers=None, serial_threshold=SERIAL_THRESHOLD, engine=None):
+    """Convert each Pylon article's current_published_content_html to Markdown, returning results in input order."""
+    workers = workers or CONVERT_WORKERS
+    convert = get_engine(engine)
+    htmls = [article.get("current_published_content_html", "") or "" for article in articles]
+
+    # Small knowledge bases (or a single worker) are converted serially
+    if workers <= 1 or len(htmls) < serial_threshold:
+        return [convert(html) for html in htmls]
+
+    # Executor.map preserves input order, so results line up with the articles passed in
+    return list(_get_pool(workers).map(convert, htmls, chunksize=CHUNK_SIZE))
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import random
+import signal
+import time
+
+from conversion_cache import ConversionCache
+from metrics import METRICS_HOST, METRICS_PORT, serve_prometheus
+from registry import SourceRegistry
+from sync_state import SyncState
+from update_sync import log_and_print, perform_delta_sync
+
+# Poll interval bounds in seconds: busy KBs are polled near the minimum, idle ones drift to the maximum
+MIN_POLL_INTERVAL = float(os.environ.get("SYNC_MIN_POLL_SECONDS", "15"))
+MAX_POLL_INTERVAL = float(os.environ.get("SYNC_MAX_POLL_SECONDS", "900"))
+
+# Factor applied to the interval after each poll that found no changes
+IDLE_GROWTH = 1.5
+
+# Maximum number of syncs running at once across all watched pairs
+MAX_CONCURRENT_SYNCS = int(os.environ.get("SYNC_MAX_CONCURRENT", "8"))
+
+
+class AdaptivePoller:
+    """Per-pair poll interval that snaps to the minimum when a KB changes and grows while it stays idle."""
+
+    def __init__(self, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def record(self, changes, error=False):
+        if error:
+            # Back off harder on errors so a broken KB doesn't burn the shared rate limits
+            self.interval = min(self.max_interval, self.interval * 2)
+        elif changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * IDLE_GROWTH)
+
+    def next_delay(self):
+        # Jitter keeps pairs that started together from polling in lockstep
+        return self.interval * random.uniform(0.9, 1.1)
+
+
+class Watcher:
+    """Keeps clients, caches and sync state warm and polls every pair on its own adaptive schedule."""
+
+    def __init__(self, pairs, max_concurrent=MAX_CONCURRENT_SYNCS,
+                 min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+        self.pairs = pairs
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stopping = asyncio.Event()
+        # One lock per Ada source, so two entries targeting the same source never sync at once
+        self.source_locks = {}
+        self.registry = SourceRegistry()
+
+    def stop(self):
+        self.stopping.set()
+
+    async def _sleep(self, seconds):
+        # Wake early when the daemon is asked to stop
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _watch_pair(self, pair):
+        bot_handle = pair["bot_handle"]
+        source_id = pair["source_id"]
+        lock = self.source_locks.setdefault((bot_handle, source_id), asyncio.Lock())
+        poller = AdaptivePoller(self.min_interval, self.max_interval)
+
+        # Stores stay open for the daemon's lifetime instead of being reopened on every poll
+        state = SyncState()
+        cache = ConversionCache()
+
+        while not self.stopping.is_set():
+            async with lock, self.slots:
+                started = time.monotonic()
+                try:
+                    result = await asyncio.to_thread(
+                        perform_delta_sync,
+                        pair["kb_id"],
+                        source_id,
+                        pair["pylon_api_key"],
+                        pair["ada_api_key"],
+                        pair.get("ada_bot_url") or f"https://{bot_handle}.ada.support",
+                        bot_handle,
+                        None,
+                        state,
+                        cache
+                    )
+                    changes = result["created"] + result["updated"] + result["deleted"]
+                    poller.record(changes)
+                except Exception as e:
+                    result = {"error": str(e)}
+                    poller.record(0, error=True)
+                    log_and_print(f"Delta sync failed: {e}", bot_handle, source_id)
+                result["seconds"] = time.monotonic() - started
+                self.registry.record_sync_result(bot_handle, source_id, pair["kb_id"], result)
+
+            delay = poller.next_delay()
+            log_and_print(f"Next poll in {delay:.0f}s", bot_handle, source_id)
+            await self._sleep(delay)
+
+        state.close()
+        cache.close()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Signal handlers are unavailable on some platforms/threads
+
+        log_and_print(f"Watching {len(self.pairs)} KB-to-source pairs (poll every {self.min_interval:.0f}-{self.max_interval:.0f}s)")
+        await asyncio.gather(*(self._watch_pair(pair) for pair in self.pairs))
+        self.registry.close()
+        log_and_print("Watcher stopped")
+
+
+def watch(pairs, max_concurrent=MAX_CONCURRENT_SYNCS, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL,
+          metrics_port=METRICS_PORT, metrics_host=METRICS_HOST):
+    """Blocking entry point: poll every pair until interrupted, optionally exposing Prometheus metrics."""
+    async def main():
+        await Watcher(pairs, max_concurrent, min_interval, max_interval).run()
+
+    metrics_server = None
+    if metrics_port:
+        metrics_server = serve_prometheus(metrics_port, metrics_host)
+        log_and_print(f"Serving Prometheus metrics on {metrics_host}:{metrics_server.server_address[1]} at /metrics")
+    try:
+        asyncio.run(main())
+    finally:
+        if metrics_server:
+            metrics_server.shutdown()
+            metrics_server.server_close()
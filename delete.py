@@ -1,5 +1,13 @@
-import requests
+import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import get_ada_client
+from metrics import run_in_context
+from registry import SourceRegistry
+
+# Number of knowledge sources deleted concurrently in bulk mode
+DELETE_SOURCE_WORKERS = 4
 
 def get_deletion_credentials():
     """Prompt user for their API credentials and bot handle for deletion."""
@@ -19,50 +27,136 @@ def get_deletion_credentials():
     # Construct Ada bot URL
     ada_bot_url = f"https://{bot_handle}.ada.support"
 
-    return ada_api_key, ada_bot_url
+    return bot_handle, ada_api_key, ada_bot_url
+
+def delete_ada_source(source_id, ada_api_key=None, ada_bot_url=None, bot_handle=None):
+    """Delete an Ada knowledge source, returning True on success.
 
-def delete_ada_source(source_id, ada_api_key=None, ada_bot_url=None):
+    The source is also removed from the registry entries of `bot_handle`, when one is given.
+    """
     # If credentials not provided, get them from user input
     if not ada_api_key or not ada_bot_url:
-        ada_api_key, ada_bot_url = get_deletion_credentials()
-
-    # Construct the API endpoint URL for deleting a specific knowledge source
-    url = f"{ada_bot_url}/api/v2/knowledge/sources/{source_id}"
-
-    # Send DELETE request to Ada API
-    res = requests.delete(
-        url,
-        headers={
-            "Authorization": f"Bearer {ada_api_key}",
-            "Content-Type": "application/json"
-        }
-    )
-    
+        bot_handle, ada_api_key, ada_bot_url = get_deletion_credentials()
+
+    result = _delete_source(source_id, ada_api_key, ada_bot_url)
+    if result["ok"]:
+        # Drop it from the registry too, so `fleet.py sources` and --all stop listing it
+        if bot_handle:
+            registry = SourceRegistry()
+            registry.forget_source(bot_handle, source_id)
+            registry.close()
+        print(f"Deleted Ada knowledge source: {source_id}")
+        return True
+
+    # Log error details if deletion failed
+    print(f"Failed to delete knowledge source {source_id}.")
+    print(f"Status Code: {result['status']}")
+    print(f"Response: {result['error']}")
+    return False
+
+def _delete_source(source_id, ada_api_key, ada_bot_url):
+    """Send the DELETE for one knowledge source and describe the outcome instead of raising."""
+    result = {"source_id": source_id, "ok": False, "status": None, "error": None}
+    try:
+        # Send DELETE request to Ada API for the specific knowledge source
+        res = get_ada_client(ada_api_key, ada_bot_url).delete(f"/api/v2/knowledge/sources/{source_id}")
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
     # Check if deletion was successful (204 = No Content, indicating successful deletion)
+    result["status"] = res.status_code
     if res.status_code == 204:
-        print(f"Deleted Ada knowledge source: {source_id}")
+        result["ok"] = True
     else:
-        # Log error details if deletion failed
-        print(f"Failed to delete knowledge source {source_id}.")
-        print(f"Status Code: {res.status_code}")
-        print(f"Response: {res.text}")
+        result["error"] = res.text
+    return result
+
+def delete_ada_sources(source_ids, ada_api_key, ada_bot_url, workers=DELETE_SOURCE_WORKERS, on_result=None):
+    """Delete many knowledge sources concurrently, returning one result per source in the given order.
+
+    Requests go through the shared Ada client, so they respect its per-host concurrency cap and
+    retry policy. `on_result`, if given, is called with each result in the caller's thread.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_in_context(_delete_source), source_id, ada_api_key, ada_bot_url) for source_id in source_ids]
+        results = []
+        for future in futures:
+            results.append(future.result())
+            if on_result:
+                on_result(results[-1])
+    return results
+
+def delete_registered_sources(bot_handle, ada_api_key, ada_bot_url, source_ids=None, workers=DELETE_SOURCE_WORKERS):
+    """Delete sources of one bot concurrently (every source in the registry when `source_ids` is None).
+
+    Deleted sources are removed from the registry. Returns the results, as delete_ada_sources does.
+    """
+    registry = SourceRegistry()
+    try:
+        if source_ids is None:
+            source_ids = [source["source_id"] for source in registry.sources(bot_handle)]
+
+        def report(result):
+            if result["ok"]:
+                registry.forget_source(bot_handle, result["source_id"])
+                print(f"Deleted Ada knowledge source: {result['source_id']}")
+            else:
+                print(f"Failed to delete knowledge source {result['source_id']} (status {result['status']}): {result['error']}")
+
+        results = delete_ada_sources(source_ids, ada_api_key, ada_bot_url, workers, on_result=report)
+    finally:
+        registry.close()
+
+    failed = [result["source_id"] for result in results if not result["ok"]]
+    print(f"Deleted {len(results) - len(failed)} of {len(results)} knowledge sources for {bot_handle}.")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return results
+
+def bulk_delete(argv):
+    """Bulk mode: python delete.py --bulk <BOT_HANDLE> [SOURCE_ID ...] [--all] [--api-key KEY] [--workers N]"""
+    arg_parser = argparse.ArgumentParser(prog="delete.py --bulk", description="Delete many Ada knowledge sources of one bot concurrently.")
+    arg_parser.add_argument("bot_handle")
+    arg_parser.add_argument("source_ids", nargs="*")
+    arg_parser.add_argument("--all", action="store_true", help="Delete every source registered for the bot in registry.sqlite3")
+    arg_parser.add_argument("--api-key", help="Ada API key (prompted for if omitted)")
+    arg_parser.add_argument("--workers", type=int, default=DELETE_SOURCE_WORKERS, help="Number of sources deleted concurrently")
+    args = arg_parser.parse_args(argv)
+
+    if args.all == bool(args.source_ids):
+        arg_parser.error("pass either source IDs or --all")
+
+    ada_api_key = args.api_key or input("Enter your Ada API key: ").strip()
+    if not ada_api_key:
+        raise ValueError("Ada API key is required")
+
+    results = delete_registered_sources(args.bot_handle, ada_api_key, f"https://{args.bot_handle}.ada.support",
+                                        None if args.all else args.source_ids, args.workers)
+    return 1 if any(not result["ok"] for result in results) else 0
 
 if __name__ == "__main__":
     # Support both old and new usage patterns
-    if len(sys.argv) == 2:
+    if len(sys.argv) > 1 and sys.argv[1] == "--bulk":
+        # Bulk usage: python delete.py --bulk <BOT_HANDLE> [SOURCE_ID ...] [--all]
+        sys.exit(bulk_delete(sys.argv[2:]))
+    elif len(sys.argv) == 2:
         # Old usage: python delete.py <SOURCE_ID>
         # Prompt user for credentials
         source_id = sys.argv[1]
         delete_ada_source(source_id)
-    elif len(sys.argv) == 4:
-        # New usage: python delete.py <SOURCE_ID> <ADA_BOT_URL> <ADA_API_KEY>
-        # Use provided credentials
+    elif len(sys.argv) in (4, 5):
+        # New usage: python delete.py <SOURCE_ID> <ADA_BOT_URL> <ADA_API_KEY> [<BOT_HANDLE>]
+        # Use provided credentials; the bot handle, if given, is used to update the source registry
         source_id = sys.argv[1]
         ada_bot_url = sys.argv[2]
         ada_api_key = sys.argv[3]
-        delete_ada_source(source_id, ada_api_key, ada_bot_url)
+        bot_handle = sys.argv[4] if len(sys.argv) == 5 else None
+        delete_ada_source(source_id, ada_api_key, ada_bot_url, bot_handle)
     else:
         print("Usage:")
         print("  python delete.py <SOURCE_ID>")
-        print("  python delete.py <SOURCE_ID> <ADA_BOT_URL> <ADA_API_KEY>")
+        print("  python delete.py <SOURCE_ID> <ADA_BOT_URL> <ADA_API_KEY> [<BOT_HANDLE>]")
+        print("  python delete.py --bulk <BOT_HANDLE> <SOURCE_ID>... [--api-key KEY] [--workers N]")
+        print("  python delete.py --bulk <BOT_HANDLE> --all [--api-key KEY] [--workers N]")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+
+from update_sync import log_and_print, perform_delta_sync
+
+# Maximum number of KB-to-source syncs running at once
+MAX_CONCURRENT_SYNCS = int(os.environ.get("SYNC_MAX_CONCURRENT", "8"))
+
+
+async def _run_pair(pair, slots):
+    """Run one delta sync in a worker thread once a concurrency slot is free, capturing its outcome."""
+    bot_handle = pair["bot_handle"]
+    source_id = pair["source_id"]
+    result = {"kb_id": pair["kb_id"], "bot_handle": bot_handle, "source_id": source_id, "error": None}
+
+    async with slots:
+        started = time.monotonic()
+        try:
+            # The HTTP layer is blocking (pooled requests sessions), so each sync runs on its own thread.
+            # Rate limits and per-host caps are enforced inside the shared clients, across all threads
+            counts = await asyncio.to_thread(
+                perform_delta_sync,
+                pair["kb_id"],
+                source_id,
+                pair["pylon_api_key"],
+                pair["ada_api_key"],
+                pair.get("ada_bot_url") or f"https://{bot_handle}.ada.support",
+                bot_handle,
+                pair.get("reconcile")
+            )
+            result.update(counts)
+        except Exception as e:
+            # One failing KB must not take down the others
+            result["error"] = str(e)
+            log_and_print(f"Delta sync failed: {e}", bot_handle, source_id)
+        result["seconds"] = time.monotonic() - started
+
+    return result
+
+
+async def run_syncs(pairs, max_concurrent=MAX_CONCURRENT_SYNCS):
+    """Run delta sync for many (kb_id, bot_handle, source_id) pairs concurrently and return per-pair results."""
+    slots = asyncio.Semaphore(max_concurrent)
+    return await asyncio.gather(*(_run_pair(pair, slots) for pair in pairs))
+
+
+def summarize(results, wall_seconds):
+    """Aggregate per-pair results into run totals, including how much the concurrency saved."""
+    summary = {
+        "pairs": len(results),
+        "succeeded": sum(1 for result in results if not result["error"]),
+        "errored": sum(1 for result in results if result["error"]),
+        "wall_seconds": wall_seconds,
+        "serial_seconds": sum(result["seconds"] for result in results),
+        "slowest_seconds": max((result["seconds"] for result in results), default=0.0)
+    }
+    for key in ("created", "updated", "deleted", "failed"):
+        summary[key] = sum(result.get(key, 0) for result in results)
+    return summary
+
+
+def sync_all(pairs, max_concurrent=MAX_CONCURRENT_SYNCS):
+    """Blocking entry point: run every pair, log an aggregate summary and return (results, summary)."""
+    started = time.monotonic()
+    results = asyncio.run(run_syncs(pairs, max_concurrent))
+    summary = summarize(results, time.monotonic() - started)
+
+    for result in results:
+        status = f"error: {result['error']}" if result["error"] else (
+            f"{result['created']} created, {result['updated']} updated, {result['deleted']} deleted, {result['failed']} failed"
+        )
+        log_and_print(f"KB {result['kb_id']} -> {result['bot_handle']}:{result['source_id']} ({result['seconds']:.1f}s): {status}")
+
+    log_and_print(
+        f"Synced {summary['pairs']} pairs ({summary['errored']} errored) in {summary['wall_seconds']:.1f}s "
+        f"(slowest {summary['slowest_seconds']:.1f}s, {summary['serial_seconds']:.1f}s if run serially): "
+        f"{summary['created']} created, {summary['updated']} updated, {summary['deleted']} deleted, {summary['failed']} failed"
+    )
+    return results, summary
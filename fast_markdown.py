@@ -0,0 +1,464 @@
+"""Single-pass HTML-to-Markdown converter for the subset of HTML that Pylon articles use.
+
+The HTML is parsed with the standard library's html.parser into a minimal tree, building it the
+way BeautifulSoup's html.parser builder does, and rendered in one recursive pass that follows
+markdownify's default rules (whitespace handling, escaping, lists, tables, code blocks). The two
+engines therefore produce the same Markdown, without BeautifulSoup's per-node overhead.
+
+Markup outside the supported subset (unknown tags, comments, scripts, nested tables, entities the
+two parsers decode differently) raises UnsupportedMarkup, and callers convert that article with
+markdownify instead.
+"""
+import re
+from html.entities import name2codepoint
+from html.parser import HTMLParser
+
+# Tags whose whitespace is trimmed inside and around them (markdownify's block-level elements)
+BLOCK_TAGS = {
+    "p", "blockquote", "article", "div", "section", "ol", "ul", "li",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6"
+}
+
+# Tags rendered as their content only
+PASSTHROUGH_TAGS = {"span", "u", "small", "mark", "font", "abbr", "cite", "ins"}
+
+# Everything else is left to markdownify
+SUPPORTED_TAGS = BLOCK_TAGS | PASSTHROUGH_TAGS | {
+    "a", "b", "strong", "i", "em", "del", "s", "code", "kbd", "samp", "pre", "br", "hr", "img"
+}
+
+# Tags that never have content; an explicit end tag after one is ignored
+VOID_TAGS = {"br", "hr", "img"}
+
+# Named entities decoded the same way by both parsers (BeautifulSoup maps lang/rang to their HTML 5 code points)
+ENTITIES = {name: chr(codepoint) for name, codepoint in name2codepoint.items() if name not in ("lang", "rang")}
+
+ASCII_SPACES = " \n\t\x0c\r"
+
+_newline_whitespace = re.compile(r"[\t \r\n]*[\r\n][\t \r\n]*")
+_whitespace = re.compile(r"[\t ]+")
+_all_whitespace = re.compile(r"[\t \r\n]+")
+_line_with_content = re.compile(r"^(.*)", flags=re.MULTILINE)
+_extract_newlines = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", flags=re.DOTALL)
+_pre_lstrip = re.compile(r"^[ \n]*\n")
+_pre_rstrip = re.compile(r"[ \n]*$")
+_backtick_runs = re.compile(r"`+")
+
+
+class UnsupportedMarkup(Exception):
+    """The HTML uses markup this converter doesn't render exactly like markdownify."""
+
+
+class _Node:
+    __slots__ = ("name", "attrs", "parent", "children")
+
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []  # _Node and str items
+
+
+class _TreeBuilder(HTMLParser):
+    """Builds the same tree as BeautifulSoup's html.parser builder, for supported markup only."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = _Node("[document]", {}, None)
+        self.current = self.root
+        self.open_counts = {}
+        self.data = []
+        self.pre_depth = 0
+        self.already_closed = []  # Void tags closed on their start tag, whose end tag is ignored if it shows up
+
+    def _end_data(self):
+        if not self.data:
+            return
+        text = "".join(self.data)
+        self.data = []
+        # Whitespace-only strings outside <pre> are collapsed to a single newline or space
+        if not self.pre_depth and not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        self.current.children.append(text)
+
+    def handle_starttag(self, tag, attrs, closes_itself=True):
+        if tag not in SUPPORTED_TAGS:
+            raise UnsupportedMarkup(f"<{tag}>")
+        if tag == "table" and self.open_counts.get("table"):
+            raise UnsupportedMarkup("nested <table>")
+        self._end_data()
+        node = _Node(tag, {key: "" if value is None else value for key, value in attrs}, self.current)
+        self.current.children.append(node)
+        self.current = node
+        self.open_counts[tag] = self.open_counts.get(tag, 0) + 1
+        if tag == "pre":
+            self.pre_depth += 1
+        if tag in VOID_TAGS and closes_itself:
+            self._pop_to(tag)
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, closes_itself=False)
+        self._end_data()
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.already_closed:
+            self.already_closed.remove(tag)
+            return
+        self._end_data()
+        self._pop_to(tag)
+
+    def _pop_to(self, tag):
+        # Close every element up to and including the innermost open `tag`; a stray end tag is ignored
+        if not self.open_counts.get(tag):
+            return
+        while True:
+            node = self.current
+            self.current = node.parent
+            self.open_counts[node.name] -= 1
+            if node.name == "pre":
+                self.pre_depth -= 1
+            if node.name == tag:
+                return
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_entityref(self, name):
+        character = ENTITIES.get(name)
+        if character is None:
+            raise UnsupportedMarkup(f"&{name};")
+        self.data.append(character)
+
+    def handle_charref(self, name):
+        try:
+            codepoint = int(name[1:], 16) if name[:1] in "xX" else int(name)
+        except ValueError:
+            raise UnsupportedMarkup(f"&#{name};")
+        # BeautifulSoup decodes 128-159 as Windows-1252 and replaces invalid code points
+        if codepoint == 0 or 128 <= codepoint <= 159 or 0xD800 <= codepoint <= 0xDFFF or codepoint > 0x10FFFF:
+            raise UnsupportedMarkup(f"&#{name};")
+        self.data.append(chr(codepoint))
+
+    def handle_comment(self, data):
+        raise UnsupportedMarkup("comment")
+
+    def handle_decl(self, decl):
+        raise UnsupportedMarkup("declaration")
+
+    def unknown_decl(self, data):
+        raise UnsupportedMarkup("declaration")
+
+    def handle_pi(self, data):
+        raise UnsupportedMarkup("processing instruction")
+
+
+def parse(html):
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    builder._end_data()
+    return builder.root
+
+
+def convert(html):
+    """Convert HTML to the Markdown markdownify produces with its default options.
+
+    Raises UnsupportedMarkup if the HTML uses anything outside the supported subset.
+    """
+    return _render(parse(html or ""), frozenset()).strip("\n")
+
+
+def _outside(node):
+    # Whether whitespace next to `node` is trimmed (block elements and <pre>)
+    return node.__class__ is _Node and (node.name in BLOCK_TAGS or node.name == "pre")
+
+
+def _render(node, parent_tags):
+    name = node.name
+    child_tags = parent_tags | {name}
+    if name in ("h1", "h2", "h3", "h4", "h5", "h6", "td", "th"):
+        child_tags |= {"_inline"}
+    if name in ("pre", "code", "kbd", "samp"):
+        child_tags |= {"_noformat"}
+
+    children = node.children
+    inside = name in BLOCK_TAGS
+    last = len(children) - 1
+    strings = []
+    for i, child in enumerate(children):
+        prev = children[i - 1] if i else None
+        nxt = children[i + 1] if i < last else None
+        if child.__class__ is str:
+            # Whitespace-only text at the edges of a block, or next to one, is dropped
+            if not child.strip() and ((inside and (prev is None or nxt is None)) or _outside(prev) or _outside(nxt)):
+                continue
+            text = _render_text(child, inside, prev, nxt, child_tags)
+        else:
+            text = _render(child, child_tags)
+        if text:
+            strings.append(text)
+
+    if name == "pre" or "pre" in parent_tags:
+        text = "".join(strings)
+    else:
+        # Where one child ends with newlines and the next starts with them, keep the larger run, at most two
+        collapsed = [""]
+        for string in strings:
+            if string[0] != "\n" and string[-1] != "\n":
+                collapsed.extend(("", string, ""))
+                continue
+            leading, content, trailing = _extract_newlines.match(string).groups()
+            if collapsed[-1] and leading:
+                leading = "\n" * min(2, max(len(collapsed.pop()), len(leading)))
+            collapsed.extend((leading, content, trailing))
+        text = "".join(collapsed)
+
+    render = _RENDERERS.get(name)
+    return render(node, text, parent_tags) if render else text
+
+
+def _render_text(text, in_block, prev, nxt, parent_tags):
+    if "pre" not in parent_tags:
+        text = _whitespace.sub(" ", _newline_whitespace.sub("\n", text))
+    if "_noformat" not in parent_tags:
+        text = text.replace("*", r"\*").replace("_", r"\_")
+    if _outside(prev) or (in_block and prev is None):
+        text = text.lstrip(" \t\r\n")
+    if _outside(nxt) or (in_block and nxt is None):
+        text = text.rstrip()
+    return text
+
+
+def _chomp(text):
+    # Move leading/trailing spaces outside inline markup, so "<b> foo</b>" becomes " **foo**"
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+def _inline(markup):
+    def render(node, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = _chomp(text)
+        return f"{prefix}{markup}{text}{markup}{suffix}" if text else ""
+    return render
+
+
+def _render_a(node, text, parent_tags):
+    if "_noformat" in parent_tags:
+        return text
+    prefix, suffix, text = _chomp(text)
+    if not text:
+        return ""
+    href = node.attrs.get("href")
+    title = node.attrs.get("title")
+    if text.replace(r"\_", "_") == href and not title:
+        return f"<{href}>"
+    title_part = ' "%s"' % title.replace('"', r"\"") if title else ""
+    return f"{prefix}[{text}]({href}{title_part}){suffix}" if href else text
+
+
+def _render_blockquote(node, text, parent_tags):
+    text = text.strip(" \t\r\n")
+    if "_inline" in parent_tags:
+        return " " + text + " "
+    if not text:
+        return "\n"
+    text = _line_with_content.sub(lambda match: "> " + match.group(1) if match.group(1) else ">", text)
+    return "\n" + text + "\n\n"
+
+
+def _render_br(node, text, parent_tags):
+    if "_inline" in parent_tags:
+        return text + " " if text else " "
+    return "  \n" + text
+
+
+def _render_code(node, text, parent_tags):
+    if "_noformat" in parent_tags:
+        return text
+    prefix, suffix, text = _chomp(text)
+    if not text:
+        return ""
+    # Delimit the span with one more backtick than the longest run inside it
+    backticks = max((len(run) for run in _backtick_runs.findall(text)), default=0)
+    if backticks:
+        text = " " + text + " "
+    delimiter = "`" * (backticks + 1)
+    return f"{prefix}{delimiter}{text}{delimiter}{suffix}"
+
+
+def _render_div(node, text, parent_tags):
+    if "_inline" in parent_tags:
+        return " " + text.strip() + " "
+    text = text.strip()
+    return f"\n\n{text}\n\n" if text else ""
+
+
+def _render_heading(node, text, parent_tags):
+    if "_inline" in parent_tags:
+        return text
+    level = int(node.name[1])
+    text = text.strip()
+    if level <= 2:
+        # Setext style: the text underlined with = or -
+        return f"\n\n{text}\n{('=' if level == 1 else '-') * len(text)}\n\n" if text else ""
+    return f"\n\n{'#' * level} {_all_whitespace.sub(' ', text)}\n\n"
+
+
+def _render_hr(node, text, parent_tags):
+    return "\n\n---\n\n"
+
+
+def _render_img(node, text, parent_tags):
+    alt = node.attrs.get("alt") or ""
+    if "_inline" in parent_tags:
+        return alt
+    src = node.attrs.get("src") or ""
+    title = node.attrs.get("title") or ""
+    title_part = ' "%s"' % title.replace('"', r"\"") if title else ""
+    return f"![{alt}]({src}{title_part})"
+
+
+def _render_list(node, text, parent_tags):
+    if "li" in parent_tags:
+        return "\n" + text.rstrip()
+    # A list followed by anything other than another list gets a blank line after it
+    siblings = node.parent.children
+    following = None
+    for sibling in siblings[siblings.index(node) + 1:]:
+        if sibling.__class__ is _Node or sibling.strip():
+            following = sibling
+            break
+    before_paragraph = following is not None and (following.__class__ is str or following.name not in ("ul", "ol"))
+    return "\n\n" + text + ("\n" if before_paragraph else "")
+
+
+def _render_li(node, text, parent_tags):
+    text = text.strip()
+    if not text:
+        return "\n"
+    parent = node.parent
+    if parent.name == "ol":
+        start = parent.attrs.get("start")
+        start = int(start) if start and start.isnumeric() else 1
+        bullet = f"{start + sum(1 for tag in _previous_tags(node) if tag.name == 'li')}."
+    else:
+        # Bullets cycle through * + - with the nesting depth of unordered lists
+        depth = -1
+        ancestor = node
+        while ancestor is not None:
+            if ancestor.name == "ul":
+                depth += 1
+            ancestor = ancestor.parent
+        bullet = "*+-"[depth % 3]
+    bullet += " "
+    indent = " " * len(bullet)
+    text = _line_with_content.sub(lambda match: indent + match.group(1) if match.group(1) else "", text)
+    return bullet + text[len(bullet):] + "\n"
+
+
+def _render_p(node, text, parent_tags):
+    if "_inline" in parent_tags:
+        return " " + text.strip(" \t\r\n") + " "
+    text = text.strip(" \t\r\n")
+    return f"\n\n{text}\n\n" if text else ""
+
+
+def _render_pre(node, text, parent_tags):
+    if not text:
+        return ""
+    text = _pre_rstrip.sub("", _pre_lstrip.sub("", text))
+    return f"\n\n```\n{text}\n```\n\n"
+
+
+def _render_table(node, text, parent_tags):
+    return "\n\n" + text.strip() + "\n\n"
+
+
+def _colspan(node):
+    colspan = node.attrs.get("colspan", "")
+    return max(1, min(1000, int(colspan))) if colspan.isdigit() else 1
+
+
+def _render_cell(node, text, parent_tags):
+    return " " + text.strip().replace("\n", " ") + " |" * _colspan(node)
+
+
+def _render_tr(node, text, parent_tags):
+    parent = node.parent
+    cells = list(_descendants(node, ("td", "th")))
+    is_first_row = next(_previous_tags(node), None) is None
+    is_head_row = (
+        all(cell.name == "th" for cell in cells)
+        or (parent.name == "thead" and sum(1 for _ in _descendants(parent, ("tr",))) == 1)
+    )
+    is_head_row_missing = is_first_row and (
+        parent.name != "tbody" or next(_descendants(parent.parent, ("thead",)), None) is None
+    )
+    columns = sum(_colspan(cell) for cell in cells)
+    overline = underline = ""
+    if is_head_row and is_first_row:
+        underline = "| " + " | ".join(["---"] * columns) + " |\n"
+    elif is_head_row_missing or (is_first_row and (
+            parent.name == "table" or (parent.name == "tbody" and next(_previous_tags(parent), None) is None))):
+        # Markdown tables need a header row, so an empty one is added above a table without one
+        overline = "| " + " | ".join([""] * columns) + " |\n" + "| " + " | ".join(["---"] * columns) + " |\n"
+    return overline + "|" + text + "\n" + underline
+
+
+def _previous_tags(node):
+    """Element siblings before `node`, nearest first."""
+    siblings = node.parent.children
+    for sibling in reversed(siblings[:siblings.index(node)]):
+        if sibling.__class__ is _Node:
+            yield sibling
+
+
+def _descendants(node, names):
+    for child in node.children:
+        if child.__class__ is _Node:
+            if child.name in names:
+                yield child
+            yield from _descendants(child, names)
+
+
+_RENDERERS = {
+    "a": _render_a,
+    "b": _inline("**"),
+    "strong": _inline("**"),
+    "i": _inline("*"),
+    "em": _inline("*"),
+    "del": _inline("~~"),
+    "s": _inline("~~"),
+    "code": _render_code,
+    "kbd": _render_code,
+    "samp": _render_code,
+    "blockquote": _render_blockquote,
+    "br": _render_br,
+    "div": _render_div,
+    "article": _render_div,
+    "section": _render_div,
+    "h1": _render_heading,
+    "h2": _render_heading,
+    "h3": _render_heading,
+    "h4": _render_heading,
+    "h5": _render_heading,
+    "h6": _render_heading,
+    "hr": _render_hr,
+    "img": _render_img,
+    "ul": _render_list,
+    "ol": _render_list,
+    "li": _render_li,
+    "p": _render_p,
+    "pre": _render_pre,
+    "table": _render_table,
+    "td": _render_cell,
+    "th": _render_cell,
+    "tr": _render_tr,
+    "[document]": lambda node, text, parent_tags: text,
+}
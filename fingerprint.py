@@ -0,0 +1,113 @@
+import hashlib
+import html
+import re
+import unicodedata
+
+# Bump when normalization or the hash changes, so old fingerprints are never compared with new ones
+FINGERPRINT_VERSION = "fp2"
+
+# Backslash escapes that different Markdown writers apply inconsistently
+_ESCAPE_RE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!|>~])")
+
+# <https://example.com> autolinks and [https://example.com](https://example.com) links are the same link
+_AUTOLINK_RE = re.compile(r"<((?:https?|mailto):[^>\s]+)>")
+_SELF_LINK_RE = re.compile(r"\[([^\]]+)\]\(\1\)")
+
+# List bullets: "*" and "+" are equivalent to "-"
+_BULLET_RE = re.compile(r"^([ \t]*)[*+]([ \t])", re.M)
+
+_TRAILING_WS_RE = re.compile(r"[ \t]+$", re.M)
+_INNER_WS_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_INVISIBLE_RE = re.compile("[\u200b\u200c\u200d\ufeff]")
+
+# Code is compared verbatim: an opening ``` or ~~~ fence (closed by a fence of the same kind at least as
+# long), a line indented by four spaces or a tab, and inline `code` spans
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_INDENTED_CODE_RE = re.compile(r"^(?: {4}|\t)")
+_INLINE_CODE_RE = re.compile(r"(`+)(?!`).*?(?<!`)\1(?!`)", re.S)
+_CODE_PLACEHOLDER_RE = re.compile("\0(\\d+)\0")
+
+
+def _split_code_blocks(text):
+    """Split text into (is_code, chunk) pairs, where code chunks are fenced or indented code blocks."""
+    chunks = []
+    lines = text.split("\n")
+    prose = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE_RE.match(line)
+        # Indented code can't interrupt a paragraph, so it must follow a blank line (or start the text)
+        indented = not fence and _INDENTED_CODE_RE.match(line) and (i == 0 or not lines[i - 1].strip())
+        if not fence and not indented:
+            prose.append(line)
+            i += 1
+            continue
+
+        start = i
+        i += 1
+        if fence:
+            marker = fence.group(1)
+            while i < len(lines):
+                closing = lines[i].strip()
+                i += 1
+                if closing.startswith(marker) and not closing.strip(marker[0]):
+                    break
+        else:
+            while i < len(lines) and (_INDENTED_CODE_RE.match(lines[i]) or not lines[i].strip()):
+                i += 1
+            # Blank lines after the block belong to the prose around it
+            while i > start + 1 and not lines[i - 1].strip():
+                i -= 1
+
+        if prose:
+            chunks.append((False, "\n".join(prose)))
+            prose = []
+        chunks.append((True, "\n".join(lines[start:i])))
+    if prose:
+        chunks.append((False, "\n".join(prose)))
+    return chunks
+
+
+def _normalize_prose(text):
+    # Inline code spans are set aside so the rules below never touch them
+    spans = []
+
+    def stash(match):
+        spans.append(match.group(0))
+        return f"\0{len(spans) - 1}\0"
+
+    text = _INLINE_CODE_RE.sub(stash, text)
+    text = html.unescape(text).replace("\u00a0", " ")
+    text = _INVISIBLE_RE.sub("", text)
+    text = _ESCAPE_RE.sub(r"\1", text)
+    text = _AUTOLINK_RE.sub(r"\1", text)
+    text = _SELF_LINK_RE.sub(r"\1", text)
+    text = _BULLET_RE.sub(r"\1-\2", text)
+    text = _TRAILING_WS_RE.sub("", text)
+    text = _INNER_WS_RE.sub(" ", text)
+    return _CODE_PLACEHOLDER_RE.sub(lambda match: spans[int(match.group(1))], text)
+
+
+def normalize_markdown(content):
+    """Canonicalize Markdown so formatting-only differences (whitespace, escapes, link forms) hash the same.
+
+    Fenced and indented code blocks and inline code spans are kept verbatim, since spacing there is content.
+    """
+    text = unicodedata.normalize("NFC", content or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(chunk if is_code else _normalize_prose(chunk) for is_code, chunk in _split_code_blocks(text))
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip("\n")
+
+
+def fingerprint(content):
+    """Hash normalized Markdown with BLAKE2b (faster than MD5), prefixed with the fingerprint version."""
+    digest = hashlib.blake2b(normalize_markdown(content).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{FINGERPRINT_VERSION}:{digest}"
+
+
+def is_current(content_hash):
+    """True if a stored hash was produced by the current fingerprint version (not e.g. a legacy MD5)."""
+    return bool(content_hash) and content_hash.startswith(f"{FINGERPRINT_VERSION}:")
@@ -0,0 +1,214 @@
+"""Non-interactive runner for syncing and deleting many Pylon KB / Ada source pairs from a config file.
+
+Usage:
+  python fleet.py sync <CONFIG> [--workers N] [--reconcile]
+  python fleet.py watch <CONFIG> [--workers N] [--min-interval S] [--max-interval S] [--metrics-port PORT]
+                        [--metrics-host HOST]
+  python fleet.py delete <CONFIG> <BOT> (<SOURCE_ID>... | --all) [--workers N]
+  python fleet.py sources [--bot BOT]
+  python fleet.py import-source-ids [PATH]
+
+The config file is JSON. API keys are never stored in it, only the names of the environment
+variables that hold them:
+
+  {
+    "pylon_api_key_env": "PYLON_API_KEY",
+    "bots": {
+      "my-bot": {"ada_api_key_env": "ADA_API_KEY_MY_BOT"}
+    },
+    "syncs": [
+      {"kb_id": "product-a-kb-id", "bot": "my-bot", "source_id": "product-a-kb-id"}
+    ]
+  }
+"""
+import argparse
+import json
+import os
+import sys
+
+from registry import SourceRegistry
+
+# Heavy modules (markdownify, dateutil, the sync engine) are imported inside the commands that
+# need them, so e.g. a delete run starts without loading the conversion stack
+
+
+def _default_ada_key_env(bot):
+    return "ADA_API_KEY_" + bot.upper().replace("-", "_")
+
+
+def _require_env(name):
+    value = os.environ.get(name, "").strip()
+    if not value:
+        raise ValueError(f"Environment variable {name} is not set")
+    return value
+
+
+def load_config(path):
+    """Read and validate a fleet config file.
+
+    API keys are not read here: each command resolves only the keys it uses, through
+    bot_credentials and sync_pairs, so e.g. deleting one bot's sources needs only that bot's key.
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    bots = {}
+    for bot, bot_config in (config.get("bots") or {}).items():
+        bot_config = bot_config or {}
+        bots[bot] = {
+            "ada_api_key_env": bot_config.get("ada_api_key_env") or _default_ada_key_env(bot),
+            "ada_bot_url": bot_config.get("ada_bot_url") or f"https://{bot}.ada.support"
+        }
+
+    syncs = []
+    for entry in config.get("syncs") or []:
+        bot = entry["bot"]
+        if bot not in bots:
+            raise ValueError(f"Sync entry for KB {entry['kb_id']} references unknown bot '{bot}'")
+        syncs.append({
+            "kb_id": entry["kb_id"],
+            "bot_handle": bot,
+            "source_id": entry.get("source_id") or entry["kb_id"]
+        })
+
+    return {"pylon_api_key_env": config.get("pylon_api_key_env", "PYLON_API_KEY"), "bots": bots, "syncs": syncs}
+
+
+def bot_credentials(config, bot):
+    """Resolve one bot's Ada API key from the environment; returns (ada_api_key, ada_bot_url)."""
+    if bot not in config["bots"]:
+        raise ValueError(f"Unknown bot '{bot}'")
+    bot_config = config["bots"][bot]
+    return _require_env(bot_config["ada_api_key_env"]), bot_config["ada_bot_url"]
+
+
+def sync_pairs(config):
+    """Return the config's sync entries with their API keys: the Pylon key and the keys of the bots they use."""
+    if not config["syncs"]:
+        return []
+    pylon_api_key = _require_env(config["pylon_api_key_env"])
+
+    credentials = {}
+    pairs = []
+    for entry in config["syncs"]:
+        bot = entry["bot_handle"]
+        if bot not in credentials:
+            credentials[bot] = bot_credentials(config, bot)
+        ada_api_key, ada_bot_url = credentials[bot]
+        pairs.append(dict(entry, pylon_api_key=pylon_api_key, ada_api_key=ada_api_key, ada_bot_url=ada_bot_url))
+    return pairs
+
+
+def run_sync(pairs, workers, reconcile):
+    from engine import sync_all
+
+    if reconcile:
+        for pair in pairs:
+            pair["reconcile"] = True
+
+    results, summary = sync_all(pairs, max_concurrent=workers)
+
+    registry = SourceRegistry()
+    for result in results:
+        registry.record_sync_result(
+            result["bot_handle"],
+            result["source_id"],
+            result["kb_id"],
+            {key: result.get(key) for key in ("created", "updated", "deleted", "failed", "error", "seconds")}
+        )
+    registry.close()
+
+    return 1 if summary["errored"] else 0
+
+
+def run_watch(pairs, workers, min_interval, max_interval, metrics_port, metrics_host):
+    from daemon import watch
+
+    watch(pairs, max_concurrent=workers, min_interval=min_interval, max_interval=max_interval,
+          metrics_port=metrics_port, metrics_host=metrics_host)
+    return 0
+
+
+def run_delete(config, bot, source_ids, workers):
+    from delete import delete_registered_sources
+
+    ada_api_key, ada_bot_url = bot_credentials(config, bot)
+
+    # No source IDs means every source registered for the bot
+    results = delete_registered_sources(bot, ada_api_key, ada_bot_url, source_ids or None, workers)
+    return 1 if any(not result["ok"] for result in results) else 0
+
+
+def list_sources(bot):
+    registry = SourceRegistry()
+    for source in registry.sources(bot):
+        result = source["last_result"] or {}
+        status = result.get("error") or (
+            f"{result.get('created', 0)} created, {result.get('updated', 0)} updated, "
+            f"{result.get('deleted', 0)} deleted, {result.get('failed', 0)} failed" if result else "never synced"
+        )
+        print(f"{source['bot']}:{source['source_id']} (KB {source['kb_id']}) - {status}")
+    registry.close()
+    return 0
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Sync or delete many Pylon KB / Ada source pairs from a config file.")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    sync_command = commands.add_parser("sync", help="Delta-sync every pair in the config")
+    sync_command.add_argument("config")
+    sync_command.add_argument("--workers", type=int, default=8, help="Number of pairs synced concurrently")
+    sync_command.add_argument("--reconcile", action="store_true", help="Re-read every Ada source instead of trusting local state")
+
+    watch_command = commands.add_parser("watch", help="Keep running and poll every pair on an adaptive schedule")
+    watch_command.add_argument("config")
+    watch_command.add_argument("--workers", type=int, default=8, help="Number of pairs synced concurrently")
+    watch_command.add_argument("--min-interval", type=float, default=15, help="Poll interval in seconds for KBs that are changing")
+    watch_command.add_argument("--max-interval", type=float, default=900, help="Poll interval in seconds for idle KBs")
+    watch_command.add_argument("--metrics-port", type=int, default=int(os.environ.get("SYNC_METRICS_PORT", "0")),
+                               help="Serve Prometheus metrics at /metrics on this port (0 = off)")
+    watch_command.add_argument("--metrics-host", default=os.environ.get("SYNC_METRICS_HOST", "127.0.0.1"),
+                               help="Interface the metrics endpoint listens on (0.0.0.0 for all)")
+
+    delete_command = commands.add_parser("delete", help="Delete Ada knowledge sources of one bot")
+    delete_command.add_argument("config")
+    delete_command.add_argument("bot")
+    delete_command.add_argument("source_ids", nargs="*")
+    delete_command.add_argument("--all", action="store_true", help="Delete every source registered for the bot")
+    delete_command.add_argument("--workers", type=int, default=4, help="Number of sources deleted concurrently")
+
+    sources_command = commands.add_parser("sources", help="List registered sources and their last sync result")
+    sources_command.add_argument("--bot")
+
+    import_command = commands.add_parser("import-source-ids", help="Import the legacy source_ids.txt log into the registry")
+    import_command.add_argument("path", nargs="?", default="source_ids.txt")
+
+    args = arg_parser.parse_args(argv)
+    if args.command == "delete" and args.all == bool(args.source_ids):
+        arg_parser.error("delete takes either source IDs or --all")
+
+    if args.command == "sources":
+        return list_sources(args.bot)
+    if args.command == "import-source-ids":
+        registry = SourceRegistry()
+        count = registry.import_source_ids_file(args.path)
+        registry.close()
+        print(f"Imported {count} distinct sources from {args.path}")
+        return 0
+
+    config = load_config(args.config)
+    if args.command == "sync":
+        return run_sync(sync_pairs(config), args.workers, args.reconcile)
+    if args.command == "watch":
+        return run_watch(sync_pairs(config), args.workers, args.min_interval, args.max_interval, args.metrics_port,
+                         args.metrics_host)
+    return run_delete(config, args.bot, args.source_ids, args.workers)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
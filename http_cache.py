@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# On-disk location of the HTTP response cache; set SYNC_HTTP_CACHE to an empty string to disable it
+HTTP_CACHE_PATH = os.environ.get("SYNC_HTTP_CACHE", "http_cache.sqlite3")
+
+# Seconds a cached response without validators (ETag / Last-Modified) or Cache-Control is reused before refetching
+DEFAULT_TTL = float(os.environ.get("SYNC_HTTP_CACHE_TTL", "3600"))
+
+# Response headers kept with a cached body
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+
+def cache_key(url, authorization):
+    """Key a response by its full URL and the credentials it was fetched with."""
+    return hashlib.sha256(f"{authorization}\0{url}".encode("utf-8")).hexdigest()
+
+
+def expires_at(headers, ttl, now):
+    """When a response stops being fresh, or None if it must not be reused at all.
+
+    The server's Cache-Control wins: no-store is never cached, no-cache is always revalidated and
+    max-age is served without a request until it runs out. Otherwise a response with validators is
+    revalidated on every use, and one without them is reused for `ttl` seconds. A `ttl` of 0 means
+    the caller must see the current version, so max-age is ignored and every use is revalidated.
+    """
+    directives = {}
+    for directive in (headers.get("Cache-Control") or "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('"')
+
+    has_validators = bool(headers.get("ETag") or headers.get("Last-Modified"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return now if has_validators else None
+    if ttl > 0 and directives.get("max-age", "").isdigit():
+        return now + int(directives["max-age"])
+    if has_validators:
+        return now
+    return now + ttl if ttl > 0 else None
+
+
+class ResponseCache:
+    """SQLite-backed store of GET response bodies and their validators, for conditional requests."""
+
+    def __init__(self, path=HTTP_CACHE_PATH):
+        # Concurrent syncs share this file, so wait for other writers instead of failing fast
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()  # Webhook and fleet workers share one instance
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def get(self, key):
+        """Return the cached entry for `key` ({headers, body, expires_at}), or None."""
+        with self.lock:
+            row = self.db.execute("SELECT headers, body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"headers": json.loads(row[0]), "body": zlib.decompress(row[1]), "expires_at": row[2]}
+
+    def store(self, key, url, res, ttl):
+        """Cache a 200 response, unless its headers forbid reuse."""
+        now = time.time()
+        expiry = expires_at(res.headers, ttl, now)
+        with self.lock:
+            if expiry is None:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            else:
+                headers = {name: res.headers[name] for name in STORED_HEADERS if name in res.headers}
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, url, json.dumps(headers), zlib.compress(res.content), now, expiry)
+                )
+            self.db.commit()
+
+    def refresh(self, key, entry, not_modified, ttl):
+        """Record that the server confirmed `entry` is current (a 304), taking any updated validators from it."""
+        headers = dict(entry["headers"])
+        for name in STORED_HEADERS:
+            if name in not_modified.headers and name != "Content-Type":
+                headers[name] = not_modified.headers[name]
+        now = time.time()
+        expiry = expires_at(headers, ttl, now)
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(headers), now, now if expiry is None else expiry, key)
+            )
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def conditional_headers(entry):
+    """Validators to send so the server can answer 304 Not Modified instead of resending the body."""
+    headers = {}
+    if entry["headers"].get("ETag"):
+        headers["If-None-Match"] = entry["headers"]["ETag"]
+    if entry["headers"].get("Last-Modified"):
+        headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+    return headers
+
+
+def cached_response(entry, url):
+    """Rebuild a 200 response from a cache entry, so callers can't tell it from a fetched one."""
+    res = requests.Response()
+    res.status_code = 200
+    res.reason = "OK"
+    res.url = url
+    res.headers = CaseInsensitiveDict(entry["headers"])
+    res.encoding = requests.utils.get_encoding_from_headers(res.headers)
+    res._content = entry["body"]
+    return res
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the shared response cache, opening it on first use, or None if it is disabled."""
+    global _cache
+    if not HTTP_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,207 @@
+import gzip
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import cache_key, cached_response, conditional_headers, get_response_cache
+from ratelimit import PYLON_RATE_LIMITS, RequestScheduler
+
+# Base URL for all Pylon API calls (overridable, e.g. to point at the benchmark mock server)
+PYLON_API_URL = os.environ.get("PYLON_API_URL", "https://api.usepylon.com")
+
+# Connect/read timeouts in seconds - without them a stalled connection hangs forever
+CONNECT_TIMEOUT = float(os.environ.get("SYNC_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.environ.get("SYNC_READ_TIMEOUT", "60"))
+
+# Number of keep-alive connections kept open per host (matches the upload worker pool headroom)
+POOL_SIZE = 8
+
+# Maximum number of requests in flight to a single host across all clients and threads
+HOST_CONCURRENCY = int(os.environ.get("SYNC_HOST_CONCURRENCY", "8"))
+
+# Gzip request bodies (off by default - only enable for hosts that accept Content-Encoding: gzip)
+COMPRESS_REQUESTS = os.environ.get("SYNC_GZIP_REQUESTS", "0") == "1"
+
+# Request bodies at least this large are gzip-compressed when compression is enabled
+GZIP_MIN_BYTES = 1024
+
+
+class ApiClient:
+    """Keep-alive HTTP client for one API host with pre-built auth headers, default timeouts and rate limiting."""
+
+    def __init__(self, base_url, api_key, connect_timeout=None, read_timeout=None,
+                 pool_size=POOL_SIZE, compress_requests=None, rate_limits=()):
+        self.base_url = base_url.rstrip("/")
+        self.scheduler = RequestScheduler(rate_limits)
+        self.timeout = (connect_timeout or CONNECT_TIMEOUT, read_timeout or READ_TIMEOUT)
+        self.compress_requests = COMPRESS_REQUESTS if compress_requests is None else compress_requests
+
+        # One session per host so TCP+TLS connections are reused across calls and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Auth headers are built once instead of on every call
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate"
+        })
+
+    def url(self, path):
+        """Resolve an API path against the base URL, passing absolute URLs (e.g. next-page links) through."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, json_body=None, idempotent=None, **kwargs):
+        """Send a request through the pooled session and scheduler, serializing (and optionally gzipping) any JSON body."""
+        url = self.url(path)
+        headers = dict(kwargs.pop("headers", None) or {})
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            if self.compress_requests and len(data) >= GZIP_MIN_BYTES:
+                data = gzip.compress(data)
+                headers["Content-Encoding"] = "gzip"
+
+        kwargs.setdefault("timeout", self.timeout)
+        parsed = urlparse(url)
+        host_slots = _host_semaphore(parsed.netloc)
+        endpoint = self.scheduler.endpoint_for(method, parsed.path)
+
+        def send():
+            # The host slot is held only while the request is on the wire, not while it waits on the rate limit
+            with host_slots:
+                res = self.session.request(method, url, data=data, headers=headers, **kwargs)
+            # Prefer the on-the-wire size; a streamed body without Content-Length is not read here to measure it
+            received = res.headers.get("Content-Length")
+            received = int(received) if received else (0 if kwargs.get("stream") else len(res.content))
+            self.scheduler.record_transfer(endpoint, len(data or b""), received)
+            return res
+
+        return self.scheduler.send(method, parsed.path, send, idempotent)
+
+    def get(self, path, cache_ttl=None, **kwargs):
+        """GET a path. With `cache_ttl`, the response goes through the local response cache (see http_cache.py):
+        a cached copy is revalidated with If-None-Match/If-Modified-Since, or reused for `cache_ttl` seconds
+        when the server sent no validators (0 = only ever revalidate)."""
+        cache = get_response_cache() if cache_ttl is not None else None
+        if cache is None:
+            return self.request("GET", path, **kwargs)
+        return self._cached_get(cache, path, cache_ttl, **kwargs)
+
+    def _cached_get(self, cache, path, ttl, **kwargs):
+        url = requests.Request("GET", self.url(path), params=kwargs.get("params")).prepare().url
+        key = cache_key(url, self.session.headers["Authorization"])
+        endpoint = self.scheduler.endpoint_for("GET", urlparse(url).path)
+
+        # Still fresh (server max-age, or TTL without validators): no request at all, unless the
+        # caller asked for revalidation (an entry stored by another caller may still be fresh)
+        entry = cache.get(key)
+        if entry and ttl > 0 and entry["expires_at"] > time.time():
+            self.scheduler.record_cache(endpoint, "fresh", len(entry["body"]))
+            return cached_response(entry, url)
+
+        headers = dict(kwargs.pop("headers", {}))
+        if entry:
+            headers.update(conditional_headers(entry))
+        res = self.request("GET", path, headers=headers, **kwargs)
+
+        # Not modified: the server sent headers only, and the cached body is served
+        if res.status_code == 304 and entry:
+            cache.refresh(key, entry, res, ttl)
+            self.scheduler.record_cache(endpoint, "revalidated", len(entry["body"]))
+            return cached_response(entry, url)
+
+        self.scheduler.record_cache(endpoint, "miss")
+        if res.status_code == 200:
+            cache.store(key, url, res, ttl)
+        return res
+
+    def post(self, path, json_body=None, **kwargs):
+        return self.request("POST", path, json_body=json_body, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+
+# Clients are shared per (host, API key) so every module reuses the same connection pool
+# and every sync using the same Pylon key shares one set of rate-limit buckets
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Per-host caps on concurrent requests, shared by every client talking to that host
+_host_semaphores = {}
+
+
+def _host_semaphore(host):
+    with _clients_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(HOST_CONCURRENCY)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def get_client(base_url, api_key, **options):
+    """Return the shared client for a host and API key, creating it on first use."""
+    key = (base_url.rstrip("/"), api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ApiClient(base_url, api_key, **options)
+            _clients[key] = client
+        return client
+
+
+def get_pylon_client(pylon_api_key):
+    """Return the shared Pylon API client."""
+    return get_client(PYLON_API_URL, pylon_api_key, rate_limits=PYLON_RATE_LIMITS)
+
+
+def get_ada_client(ada_api_key, ada_bot_url):
+    """Return the shared client for an Ada bot."""
+    return get_client(ada_bot_url, ada_api_key)
+
+
+def request_stats():
+    """Return per-endpoint request, retry and queue-wait statistics for every shared client."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    stats = {}
+    for client in clients:
+        for endpoint, endpoint_stats in client.scheduler.summary().items():
+            stats[f"{client.base_url} {endpoint}"] = endpoint_stats
+    return stats
+
+
+def request_stats_lines(stats=None):
+    """Format request statistics (default: every shared client's) as one human-readable line per endpoint."""
+    if stats is None:
+        stats = request_stats()
+    return [
+        f"{endpoint}: {endpoint_stats['requests']} requests, {endpoint_stats['retries']} retries, "
+        f"{endpoint_stats['latency']['sum'] / max(endpoint_stats['latency']['count'], 1) * 1000:.0f}ms avg latency, "
+        f"{(endpoint_stats['bytes_sent'] + endpoint_stats['bytes_received']) / 1024:.0f} KB transferred, "
+        f"waited {endpoint_stats['wait_seconds']:.1f}s in queue (max {endpoint_stats['max_wait']:.1f}s), "
+        f"{endpoint_stats['throttle_seconds'] + endpoint_stats['backoff_seconds']:.1f}s before retries"
+        f"{_cache_summary(endpoint_stats)}"
+        for endpoint, endpoint_stats in sorted(stats.items())
+    ]
+
+
+def _cache_summary(endpoint_stats):
+    cache = endpoint_stats.get("cache") or {}
+    lookups = sum(cache.values())
+    if not lookups:
+        return ""
+    hits = cache["fresh"] + cache["revalidated"]
+    return (f", cache: {cache['fresh']} fresh + {cache['revalidated']} revalidated of {lookups} lookups "
+            f"({hits / lookups:.0%} hit rate, {endpoint_stats['cache_bytes_saved'] / 1024:.0f} KB not downloaded)")
@@ -0,0 +1,195 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from logs import log_and_print
+
+# On-disk location of the run journal
+JOURNAL_PATH = os.environ.get("SYNC_JOURNAL_DB", "sync_journal.sqlite3")
+
+# Journals of failed runs older than this are not resumed, since the Pylon pages they hold are stale
+MAX_RESUME_AGE = float(os.environ.get("SYNC_JOURNAL_MAX_AGE_HOURS", "24")) * 3600
+
+
+class RunJournal:
+    """Checkpoints of unfinished sync runs, keyed by (kind, KB, bot, source).
+
+    A run records each Pylon page it fetched (with the cursor of the page after it), whether the
+    listing finished, and the article IDs of every upload or delete batch Ada acknowledged. A
+    successful run clears its entries; a failed one leaves them for `--resume`.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        # Concurrent syncs share this file, so wait for other writers instead of failing fast
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " kind TEXT NOT NULL,"
+            " kb_id TEXT NOT NULL,"
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " started_at REAL NOT NULL,"
+            " listing_done INTEGER NOT NULL DEFAULT 0,"
+            " meta TEXT NOT NULL DEFAULT '{}',"
+            " PRIMARY KEY (kind, kb_id, bot, source_id))"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " kind TEXT NOT NULL,"
+            " kb_id TEXT NOT NULL,"
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " next_cursor TEXT,"
+            " articles BLOB NOT NULL,"
+            " PRIMARY KEY (kind, kb_id, bot, source_id, seq))"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS acked ("
+            " kind TEXT NOT NULL,"
+            " kb_id TEXT NOT NULL,"
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " action TEXT NOT NULL,"
+            " article_id TEXT NOT NULL,"
+            " PRIMARY KEY (kind, kb_id, bot, source_id, action, article_id))"
+        )
+        self.db.commit()
+
+    def begin(self, kind, kb_id, bot, source_id, resume=False, max_age=MAX_RESUME_AGE):
+        """Start journaling a run. With `resume`, an unfinished run's checkpoints are kept and returned with it."""
+        key = (kind, kb_id, bot or "", source_id)
+        row = self.db.execute(
+            "SELECT started_at FROM runs WHERE kind = ? AND kb_id = ? AND bot = ? AND source_id = ?", key
+        ).fetchone()
+        if resume and row and time.time() - row[0] < max_age:
+            return JournalRun(self, key, resumed=True, started_at=row[0])
+
+        self._clear(key)
+        started_at = time.time()
+        self.db.execute("INSERT INTO runs (kind, kb_id, bot, source_id, started_at) VALUES (?, ?, ?, ?, ?)", (*key, started_at))
+        self.db.commit()
+        return JournalRun(self, key, resumed=False, started_at=started_at)
+
+    def _clear(self, key):
+        for table in ("runs", "pages", "acked"):
+            self.db.execute(f"DELETE FROM {table} WHERE kind = ? AND kb_id = ? AND bot = ? AND source_id = ?", key)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+class JournalRun:
+    """The checkpoints of one run; every record is committed straight away so it survives a crash."""
+
+    def __init__(self, journal, key, resumed, started_at):
+        self.journal = journal
+        self.db = journal.db
+        self.key = key
+        self.resumed = resumed
+        self.started_at = started_at
+        self._where = "kind = ? AND kb_id = ? AND bot = ? AND source_id = ?"
+
+    def pages(self):
+        """Fetched pages in order, as (raw articles, cursor of the next page) pairs."""
+        rows = self.db.execute(f"SELECT articles, next_cursor FROM pages WHERE {self._where} ORDER BY seq", self.key)
+        return [(json.loads(zlib.decompress(articles)), next_cursor) for articles, next_cursor in rows]
+
+    def record_page(self, seq, page, next_cursor):
+        self.db.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*self.key, seq, next_cursor, zlib.compress(json.dumps(page).encode("utf-8")))
+        )
+        self.db.commit()
+
+    @property
+    def listing_done(self):
+        row = self.db.execute(f"SELECT listing_done FROM runs WHERE {self._where}", self.key).fetchone()
+        return bool(row and row[0])
+
+    def mark_listing_done(self):
+        self.db.execute(f"UPDATE runs SET listing_done = 1 WHERE {self._where}", self.key)
+        self.db.commit()
+
+    def acked(self, action):
+        """IDs of articles whose `action` ("upsert" or "delete") Ada already acknowledged in this run."""
+        rows = self.db.execute(f"SELECT article_id FROM acked WHERE {self._where} AND action = ?", (*self.key, action))
+        return {row[0] for row in rows}
+
+    def record_acked(self, action, article_ids):
+        self.db.executemany(
+            "INSERT OR IGNORE INTO acked VALUES (?, ?, ?, ?, ?, ?)",
+            [(*self.key, action, article_id) for article_id in article_ids]
+        )
+        self.db.commit()
+
+    def get(self, name, default=None):
+        row = self.db.execute(f"SELECT meta FROM runs WHERE {self._where}", self.key).fetchone()
+        return json.loads(row[0]).get(name, default) if row else default
+
+    def set(self, name, value):
+        """Store a small run-specific value, e.g. that a step finished."""
+        meta = json.loads(self.db.execute(f"SELECT meta FROM runs WHERE {self._where}", self.key).fetchone()[0])
+        meta[name] = value
+        self.db.execute(f"UPDATE runs SET meta = ? WHERE {self._where}", (json.dumps(meta), *self.key))
+        self.db.commit()
+
+    def summary_line(self):
+        pages = self.db.execute(f"SELECT COUNT(*) FROM pages WHERE {self._where}", self.key).fetchone()[0]
+        counts = dict(self.db.execute(f"SELECT action, COUNT(*) FROM acked WHERE {self._where} GROUP BY action", self.key))
+        return (f"{pages} pages fetched{' (listing complete)' if self.listing_done else ''}, "
+                f"{counts.get('upsert', 0)} upserts and {counts.get('delete', 0)} deletes acknowledged")
+
+    def finish(self):
+        """Drop the run's checkpoints once it completed without failures."""
+        for table in ("runs", "pages", "acked"):
+            self.db.execute(f"DELETE FROM {table} WHERE {self._where}", self.key)
+        self.db.commit()
+
+
+def open_run(kind, kb_id, bot_handle, source_id, resume=False, path=JOURNAL_PATH):
+    """Open the journal and start a run in it, reporting what a resumed run picks up from the interrupted one."""
+    run = RunJournal(path).begin(kind, kb_id, bot_handle, source_id, resume)
+    if run.resumed:
+        log_and_print(f"Resuming interrupted run: {run.summary_line()}", bot_handle, source_id, event="run_resumed")
+    elif resume:
+        log_and_print("No interrupted run to resume - starting from scratch", bot_handle, source_id)
+    return run
+
+
+def close_run(run, failed_count, bot_handle=None, source_id=None):
+    """Drop the run's checkpoints if it fully succeeded, otherwise keep them for --resume, and close the journal."""
+    if failed_count:
+        log_and_print(f"{failed_count} articles failed - rerun with --resume to retry only the unfinished work", bot_handle, source_id)
+    else:
+        run.finish()
+    run.journal.close()
+
+
+def journaled_pages(run, fetch_pages, stop=None):
+    """Yield raw Pylon pages, replaying the pages `run` already holds before fetching the rest.
+
+    `fetch_pages(cursor)` must yield (page, next_cursor) pairs starting at `cursor` (None for the
+    first page). Every fetched page is checkpointed before it is yielded. `stop` is called on
+    replayed pages too, so a watermark check sees the same pages as in the original run.
+    """
+    seq = 0
+    cursor = None
+    for page, next_cursor in run.pages() if run.resumed else ():
+        if stop:
+            stop(page)
+        seq += 1
+        cursor = next_cursor
+        yield page
+
+    if seq and (run.listing_done or not cursor):
+        return
+
+    for page, next_cursor in fetch_pages(cursor):
+        seq += 1
+        run.record_page(seq, page, next_cursor)
+        yield page
+    run.mark_listing_done()
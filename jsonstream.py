@@ -0,0 +1,102 @@
+import codecs
+import json
+
+_WHITESPACE = " \t\r\n"
+
+_decoder = json.JSONDecoder()
+
+
+def _decoded(chunks):
+    """Decode a stream of UTF-8 byte chunks into text without splitting multi-byte characters."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class JsonArrayStream:
+    """Parses `{"...": ..., "<key>": [item, item, ...], ...}` incrementally, yielding one array item at a time.
+
+    Only the item being parsed is held in memory, never the whole response. The object's other
+    top-level fields (e.g. pagination cursors) are available from `envelope` once iteration ends.
+    """
+
+    def __init__(self, chunks, key="data"):
+        self.chunks = _decoded(chunks)
+        self.key = key
+        self.envelope = {}
+
+    def _more(self, buffer):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            raise ValueError("Unexpected end of JSON stream")
+        return buffer + chunk
+
+    def _skip(self, buffer, chars=_WHITESPACE):
+        """Drop leading `chars`, reading on until something else is buffered."""
+        buffer = buffer.lstrip(chars)
+        while not buffer:
+            buffer = self._more(buffer).lstrip(chars)
+        return buffer
+
+    def _decode(self, buffer):
+        """Decode the JSON value at the start of the buffer, returning it and the rest of the buffer."""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                buffer = self._more(buffer)
+                continue
+            # A number cut off by the chunk boundary decodes too early, so it must be followed by something
+            if end == len(buffer):
+                buffer = self._more(buffer)
+                continue
+            return value, buffer[end:]
+
+    def _expect(self, buffer, char):
+        buffer = self._skip(buffer)
+        if buffer[0] != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {buffer[0]!r}")
+        return buffer[1:]
+
+    def __iter__(self):
+        # Walk the top-level object key by key, so text inside other values is never mistaken for the array
+        buffer = self._expect("", "{")
+        while True:
+            buffer = self._skip(buffer)
+            if buffer[0] == "}":
+                return
+            key, buffer = self._decode(buffer)
+            if not isinstance(key, str):
+                raise ValueError("Expected an object key in JSON stream")
+            buffer = self._skip(self._expect(buffer, ":"))
+
+            if key == self.key and buffer[0] == "[":
+                buffer = yield from self._items(buffer[1:])
+            else:
+                # Everything but the streamed array is small (e.g. pagination metadata), so it is decoded whole
+                self.envelope[key], buffer = self._decode(buffer)
+
+            buffer = self._skip(buffer)
+            if buffer[0] == ",":
+                buffer = buffer[1:]
+            elif buffer[0] != "}":
+                raise ValueError(f"Expected ',' or '}}' in JSON stream, found {buffer[0]!r}")
+
+    def _items(self, buffer):
+        """Yield the array's items one at a time and return the text after its closing bracket."""
+        while True:
+            buffer = self._skip(buffer)
+            if buffer[0] == "]":
+                return buffer[1:]
+            item, buffer = self._decode(buffer)
+            yield item
+            buffer = self._skip(buffer)
+            if buffer[0] == ",":
+                buffer = buffer[1:]
+            elif buffer[0] != "]":
+                raise ValueError(f"Expected ',' or ']' in JSON stream, found {buffer[0]!r}")
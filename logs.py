@@ -0,0 +1,223 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Log file format: "json" (one JSON object per line) or "text" (the classic human-readable lines)
+LOG_FORMAT = os.environ.get("SYNC_LOG_FORMAT", "json")
+
+# How much per-article detail is written: "quiet" (none), "normal" (a sample), "verbose" (every article).
+# Per-run aggregates (counts, batches, timings) are always written
+VERBOSITY = os.environ.get("SYNC_LOG_VERBOSITY", "normal")
+
+# Fraction of per-article events written at "normal" verbosity
+ARTICLE_SAMPLE_RATE = float(os.environ.get("SYNC_LOG_SAMPLE_RATE", "0.01"))
+
+# Minimum seconds between redraws of the live console progress line
+PROGRESS_INTERVAL = 0.5
+
+logger = logging.getLogger("pylon_ada")
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one JSON object: timestamp, level, message and any structured fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(filename):
+    """Send all log records to `filename` through a queue, so writing the file never blocks a sync thread.
+
+    Only the first call takes effect, like logging.basicConfig.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        handler = logging.FileHandler(filename)
+        if LOG_FORMAT == "json":
+            handler.setFormatter(JsonLinesFormatter())
+        else:
+            handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.setLevel(logging.INFO)
+
+
+def _fields(bot_handle, source_id, fields):
+    if bot_handle:
+        fields["bot"] = bot_handle
+    if source_id:
+        fields["source"] = source_id
+    return fields
+
+
+def _prefixed(msg, bot_handle, source_id):
+    # Add bot handle and source ID context to message
+    if bot_handle and source_id:
+        return f"[{bot_handle}:{source_id}] {msg}"
+    if bot_handle:
+        return f"[{bot_handle}] {msg}"
+    return msg
+
+
+def log_event(msg, bot_handle=None, source_id=None, level=logging.INFO, **fields):
+    """Write a structured record to the log file only (no console output)."""
+    logger.log(level, _prefixed(msg, bot_handle, source_id), extra={"fields": _fields(bot_handle, source_id, fields)})
+
+
+def log_and_print(msg, bot_handle=None, source_id=None, **fields):
+    """Write a per-run message to the console and a structured record to the log file."""
+    formatted_msg = _prefixed(msg, bot_handle, source_id)
+    console(formatted_msg)
+    logger.info(formatted_msg, extra={"fields": _fields(bot_handle, source_id, fields)})
+
+
+def log_article(event, msg, bot_handle=None, source_id=None, level=logging.INFO, **fields):
+    """Per-article detail: every event when verbose, a random sample at normal verbosity, nothing when quiet."""
+    if VERBOSITY == "verbose":
+        sampled = False
+    elif VERBOSITY != "quiet" and random.random() < ARTICLE_SAMPLE_RATE:
+        sampled = True
+    else:
+        return
+    log_event(msg, bot_handle, source_id, level, event=event, sampled=sampled, **fields)
+
+
+class _ProgressBoard:
+    """Live console status: one line on a terminal (redrawn in place), a periodic line otherwise."""
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.lines = {}  # label -> status text, for every run currently reporting progress
+        self.lock = threading.Lock()
+        self.drawn = 0  # Length of the status line currently on screen
+        self.last_draw = 0.0
+
+    @property
+    def interactive(self):
+        return self.stream.isatty()
+
+    def _clear(self):
+        if self.drawn:
+            self.stream.write("\r" + " " * self.drawn + "\r")
+            self.drawn = 0
+
+    def _draw(self, force=False):
+        now = time.monotonic()
+        # Without a terminal the status is printed as a plain line, so it is written far less often
+        interval = PROGRESS_INTERVAL if self.interactive else 30.0
+        if not self.lines or (not force and now - self.last_draw < interval):
+            return
+        self.last_draw = now
+        status = " | ".join(f"{label} {text}" for label, text in self.lines.items())
+        if self.interactive:
+            self._clear()
+            width = max(20, _terminal_width() - 1)
+            status = status[:width]
+            self.stream.write(status)
+            self.drawn = len(status)
+        else:
+            self.stream.write(status + "\n")
+        self.stream.flush()
+
+    def update(self, label, text):
+        with self.lock:
+            self.lines[label] = text
+            self._draw()
+
+    def remove(self, label):
+        with self.lock:
+            self.lines.pop(label, None)
+            if self.interactive:
+                self._clear()
+                self._draw(force=True)
+
+    def print(self, line):
+        with self.lock:
+            if self.interactive:
+                self._clear()
+            print(line, file=self.stream)
+            if self.interactive:
+                self._draw(force=True)
+
+
+def _terminal_width():
+    try:
+        return os.get_terminal_size().columns
+    except OSError:
+        return 80
+
+
+_board = _ProgressBoard()
+
+
+def console(line):
+    """Print a line without garbling the live progress status."""
+    _board.print(line)
+
+
+class Progress:
+    """Running counts for one run, shown in the live console status instead of one line per article."""
+
+    def __init__(self, bot_handle=None, source_id=None):
+        self.label = _prefixed("", bot_handle, source_id).strip() or "sync"
+        self.stage = ""
+        self.counts = {}
+        self.lock = threading.Lock()  # Pipeline stages add counts from their own threads
+        self.last_shown = 0.0
+
+    def set_stage(self, stage):
+        self.stage = stage
+        self._show(force=True)
+
+    def add(self, **counts):
+        with self.lock:
+            for name, count in counts.items():
+                self.counts[name] = self.counts.get(name, 0) + count
+        self._show()
+
+    def _show(self, force=False):
+        # Called once per article in the hot loops, so the status text is only built when it could be drawn
+        now = time.monotonic()
+        if not force and now - self.last_shown < PROGRESS_INTERVAL:
+            return
+        self.last_shown = now
+        with self.lock:
+            counts = ", ".join(f"{count} {name}" for name, count in self.counts.items())
+        _board.update(self.label, f"{self.stage}: {counts}" if counts else self.stage)
+
+    def close(self):
+        _board.remove(self.label)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,362 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Each run appends one JSON summary line here; set SYNC_METRICS_FILE to an empty string to disable
+METRICS_PATH = os.environ.get("SYNC_METRICS_FILE", "sync_metrics.jsonl")
+
+# Port for the Prometheus text endpoint in watch mode (0 = disabled)
+METRICS_PORT = int(os.environ.get("SYNC_METRICS_PORT", "0"))
+
+# Interface the Prometheus endpoint listens on; loopback by default, since it exposes bot handles and source IDs
+METRICS_HOST = os.environ.get("SYNC_METRICS_HOST", "127.0.0.1")
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with cumulative counts, as Prometheus expects them."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(self.bounds)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound label, cumulative count) pairs, ending with "+Inf"."""
+        total = 0
+        buckets = []
+        for bound, count in zip([*map(str, self.bounds), "+Inf"], self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def to_dict(self):
+        return {"buckets": dict(self.cumulative()), "count": self.count, "sum": round(self.sum, 4)}
+
+
+class EndpointStats:
+    """Request counters for one endpoint: attempts, outcomes, latency, bytes and time spent waiting."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0  # Connection errors and timeouts
+        self.status = {}
+        self.latency = Histogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.wait_seconds = 0.0  # Queued behind the client-side rate limit
+        self.max_wait = 0.0
+        self.throttle_seconds = 0.0  # Sleeping on a server Retry-After
+        self.backoff_seconds = 0.0  # Sleeping before retrying a failure
+        self.cache = {"fresh": 0, "revalidated": 0, "miss": 0}  # Response cache lookups by outcome (see http_cache.py)
+        self.cache_bytes_saved = 0  # Response bytes served from the cache instead of downloaded
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "status": dict(self.status),
+            "latency": self.latency.to_dict(),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "wait_seconds": self.wait_seconds,
+            "max_wait": self.max_wait,
+            "throttle_seconds": self.throttle_seconds,
+            "backoff_seconds": self.backoff_seconds,
+            "cache": dict(self.cache),
+            "cache_bytes_saved": self.cache_bytes_saved
+        }
+
+
+class RequestMetrics:
+    """Thread-safe per-endpoint request statistics."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def _endpoint(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record_attempt(self, endpoint, waited, retried):
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            if retried:
+                stats.retries += 1
+            else:
+                stats.requests += 1
+            stats.wait_seconds += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+    def record_response(self, endpoint, seconds, status=None):
+        """Record one completed attempt; `status` is None when the connection failed."""
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            stats.latency.observe(seconds)
+            if status is None:
+                stats.errors += 1
+            else:
+                stats.status[status] = stats.status.get(status, 0) + 1
+
+    def record_transfer(self, endpoint, sent, received):
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+
+    def record_sleep(self, endpoint, seconds, throttled):
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            if throttled:
+                stats.throttle_seconds += seconds
+            else:
+                stats.backoff_seconds += seconds
+
+    def record_cache(self, endpoint, outcome, saved):
+        """Record one response cache lookup: "fresh" (no request), "revalidated" (a 304) or "miss"."""
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            stats.cache[outcome] += 1
+            stats.cache_bytes_saved += saved
+
+    def snapshot(self):
+        with self.lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in self.endpoints.items()}
+
+
+# The run being measured in the current thread/task; worker threads inherit it from their parent
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+
+def current_run():
+    return _current_run.get()
+
+
+def run_in_context(fn):
+    """Wrap `fn` so it runs in a copy of the caller's context, e.g. for threads that should report to the same run."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def add_phase(name, seconds):
+    """Add `seconds` to phase `name` of the current run (a no-op outside a run)."""
+    run = current_run()
+    if run is not None:
+        run.add_phase(name, seconds)
+
+
+@contextmanager
+def phase(name):
+    """Add the wall time of the block to phase `name` of the current run (a no-op outside a run)."""
+    run = current_run()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_phase(name, time.perf_counter() - started)
+
+
+class RunMetrics:
+    """Per-run instrumentation: wall time per phase and this run's own request statistics."""
+
+    def __init__(self, kind, **labels):
+        self.kind = kind
+        self.labels = labels
+        self.phases = {}
+        self.requests = RequestMetrics()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self._token = None
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def __enter__(self):
+        self._token = _current_run.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current_run.reset(self._token)
+
+    def summary(self, result=None, error=None):
+        """Machine-readable summary of the run."""
+        with self.lock:
+            phases = {name: round(seconds, 4) for name, seconds in self.phases.items()}
+        return {
+            "kind": self.kind,
+            **self.labels,
+            "started_at": self.started_at,
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "phases": phases,
+            "requests": self.requests.snapshot(),
+            "result": result,
+            "error": error
+        }
+
+    def phase_line(self):
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: -item[1])
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in phases)
+
+    def finish(self, result=None, error=None, path=METRICS_PATH):
+        """Write the run's JSON summary, fold it into the process totals and return it."""
+        summary = self.summary(result, error)
+        if path:
+            line = json.dumps(summary) + "\n"
+            with _file_lock, open(path, "a") as f:
+                f.write(line)
+        RUN_TOTALS.record(summary)
+        return summary
+
+
+_file_lock = threading.Lock()
+
+
+class RunTotals:
+    """Process-wide aggregates of finished runs per (kind, bot, source), exported in watch mode."""
+
+    def __init__(self):
+        self.pairs = {}
+        self.lock = threading.Lock()
+
+    def record(self, summary):
+        key = (summary["kind"], summary.get("bot") or "", summary.get("source") or "")
+        with self.lock:
+            totals = self.pairs.setdefault(key, {"runs": 0, "errors": 0, "seconds": 0.0, "last_seconds": 0.0,
+                                                 "last_finished": 0.0, "phases": {}, "articles": {}})
+            totals["runs"] += 1
+            totals["errors"] += 1 if summary["error"] else 0
+            totals["seconds"] += summary["seconds"]
+            totals["last_seconds"] = summary["seconds"]
+            totals["last_finished"] = summary["started_at"] + summary["seconds"]
+            for name, seconds in summary["phases"].items():
+                totals["phases"][name] = totals["phases"].get(name, 0.0) + seconds
+            for action, count in (summary["result"] or {}).items():
+                if action in ("created", "updated", "deleted", "failed"):
+                    totals["articles"][action] = totals["articles"].get(action, 0) + count
+
+    def snapshot(self):
+        with self.lock:
+            return {key: json.loads(json.dumps(totals)) for key, totals in self.pairs.items()}
+
+
+RUN_TOTALS = RunTotals()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(request_stats):
+    """Render process-wide request statistics and run totals in the Prometheus text exposition format."""
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    family("pylon_ada_requests_total", "counter", "Requests sent, excluding retries")
+    for endpoint, stats in sorted(request_stats.items()):
+        lines.append(f'pylon_ada_requests_total{{endpoint="{_label(endpoint)}"}} {stats["requests"]}')
+    family("pylon_ada_request_retries_total", "counter", "Retried request attempts")
+    for endpoint, stats in sorted(request_stats.items()):
+        lines.append(f'pylon_ada_request_retries_total{{endpoint="{_label(endpoint)}"}} {stats["retries"]}')
+    family("pylon_ada_responses_total", "counter", "Responses by HTTP status")
+    for endpoint, stats in sorted(request_stats.items()):
+        for status, count in sorted(stats["status"].items()):
+            lines.append(f'pylon_ada_responses_total{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+    family("pylon_ada_request_duration_seconds", "histogram", "Request latency")
+    for endpoint, stats in sorted(request_stats.items()):
+        labels = f'endpoint="{_label(endpoint)}"'
+        for bound, count in stats["latency"]["buckets"].items():
+            lines.append(f'pylon_ada_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f"pylon_ada_request_duration_seconds_sum{{{labels}}} {stats['latency']['sum']}")
+        lines.append(f"pylon_ada_request_duration_seconds_count{{{labels}}} {stats['latency']['count']}")
+    for key, help_text in (("bytes_sent", "Request body bytes sent"), ("bytes_received", "Response body bytes received")):
+        family(f"pylon_ada_{key}_total", "counter", help_text)
+        for endpoint, stats in sorted(request_stats.items()):
+            lines.append(f'pylon_ada_{key}_total{{endpoint="{_label(endpoint)}"}} {stats[key]}')
+    family("pylon_ada_wait_seconds_total", "counter", "Time spent waiting before requests, by reason")
+    for endpoint, stats in sorted(request_stats.items()):
+        for reason, key in (("rate_limit", "wait_seconds"), ("retry_after", "throttle_seconds"), ("backoff", "backoff_seconds")):
+            lines.append(f'pylon_ada_wait_seconds_total{{endpoint="{_label(endpoint)}",reason="{reason}"}} {stats[key]:.4f}')
+    family("pylon_ada_http_cache_lookups_total", "counter", "Response cache lookups by outcome (fresh, revalidated, miss)")
+    for endpoint, stats in sorted(request_stats.items()):
+        for outcome, count in sorted(stats["cache"].items()):
+            if count:
+                lines.append(f'pylon_ada_http_cache_lookups_total{{endpoint="{_label(endpoint)}",outcome="{outcome}"}} {count}')
+
+    totals = sorted(RUN_TOTALS.snapshot().items())
+    run_labels = {key: f'kind="{_label(key[0])}",bot="{_label(key[1])}",source="{_label(key[2])}"' for key, _ in totals}
+    for name, kind, help_text, field in (
+        ("pylon_ada_sync_runs_total", "counter", "Finished sync runs", "runs"),
+        ("pylon_ada_sync_errors_total", "counter", "Sync runs that raised an error", "errors"),
+        ("pylon_ada_sync_last_duration_seconds", "gauge", "Wall time of the latest run", "last_seconds"),
+        ("pylon_ada_sync_last_finished_timestamp_seconds", "gauge", "When the latest run finished", "last_finished"),
+    ):
+        family(name, kind, help_text)
+        for key, pair in totals:
+            lines.append(f"{name}{{{run_labels[key]}}} {pair[field]}")
+    family("pylon_ada_sync_phase_seconds_total", "counter", "Wall time per sync phase")
+    for key, pair in totals:
+        for name, seconds in sorted(pair["phases"].items()):
+            lines.append(f'pylon_ada_sync_phase_seconds_total{{{run_labels[key]},phase="{_label(name)}"}} {seconds:.4f}')
+    family("pylon_ada_sync_articles_total", "counter", "Articles created, updated, deleted or failed")
+    for key, pair in totals:
+        for action, count in sorted(pair["articles"].items()):
+            lines.append(f'pylon_ada_sync_articles_total{{{run_labels[key]},action="{action}"}} {count}')
+
+    return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(port, host=METRICS_HOST):
+    """Expose /metrics in a background thread and return the server."""
+    from http_client import request_stats
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = prometheus_text(request_stats()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
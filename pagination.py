@@ -0,0 +1,174 @@
+import os
+import queue
+import threading
+
+from http_client import get_ada_client, get_pylon_client
+from jsonstream import JsonArrayStream
+from metrics import run_in_context
+
+# Maximum page size accepted by the Pylon articles endpoint
+PYLON_PAGE_SIZE = 200
+
+# Pylon does not document a server-side timestamp filter or sort order for the articles listing.
+# Set PYLON_LISTING_NEWEST_FIRST=1 only if your listing is ordered by newest last_published_at first;
+# incremental syncs can then stop paginating at the first page that is entirely older than the watermark
+PYLON_LISTING_NEWEST_FIRST = os.environ.get("PYLON_LISTING_NEWEST_FIRST", "0") == "1"
+
+# Marker placed on the prefetch queue once the source iterator is exhausted
+_DONE = object()
+
+# How often (seconds) a producer blocked on a full prefetch queue checks whether its consumer has stopped
+_PUT_INTERVAL = 0.1
+
+
+def prefetch(iterable, depth=1):
+    """Iterate over `iterable` in a background thread, keeping up to `depth` items ready ahead of the consumer.
+
+    If the consumer stops early (it raises, breaks out or closes the generator), the producer is
+    told to stop and joined, and `iterable` is closed, so no thread or streamed response is left behind.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(entry):
+        # Returns False, without queueing, once the consumer has gone away
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=_PUT_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            # Hand the error to the consumer so it is raised in the caller's thread
+            put((None, e))
+            return
+        finally:
+            close = getattr(iterable, "close", None)
+            if close:
+                close()
+        put((_DONE, None))
+
+    # The producer reports its requests to the same run as the consumer
+    thread = threading.Thread(target=run_in_context(producer), daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _fetch_pylon_article_pages(kb_id, pylon_api_key, page_size, stop=None, cursor=None, with_cursors=False):
+    """Walk the Pylon articles endpoint cursor by cursor, yielding the raw article list of each page.
+
+    If `stop` returns True for a page, pagination ends after that page is yielded. The walk starts
+    at `cursor` when given; with `with_cursors`, (page, next page cursor or None) pairs are yielded.
+    """
+    client = get_pylon_client(pylon_api_key)
+    while True:
+        params = {"limit": page_size}
+        if cursor:
+            params["cursor"] = cursor
+
+        res = client.get(f"/knowledge-bases/{kb_id}/articles", params=params)
+        res.raise_for_status()
+        body = res.json()
+
+        page = body.get("data") or []
+        # Pylon returns the cursor for the next page alongside a has_next_page flag
+        pagination = body.get("pagination") or {}
+        next_cursor = pagination.get("cursor") if pagination.get("has_next_page") else None
+        yield (page, next_cursor) if with_cursors else page
+
+        # Let the caller end the walk early, e.g. once articles are older than its watermark
+        if stop and stop(page):
+            return
+
+        cursor = next_cursor
+        if not cursor:
+            return
+
+
+def iter_pylon_article_pages(kb_id, pylon_api_key, page_size=PYLON_PAGE_SIZE, prefetch_depth=1, stop=None,
+                             cursor=None, with_cursors=False):
+    """Yield pages of raw Pylon articles, fetching the next page while the caller processes the current one."""
+    return prefetch(_fetch_pylon_article_pages(kb_id, pylon_api_key, page_size, stop, cursor, with_cursors), prefetch_depth)
+
+
+# Size of the raw response chunks fed to the incremental JSON parser
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _stream_pylon_articles(kb_id, pylon_api_key, page_size):
+    """Walk the Pylon articles endpoint like _fetch_pylon_article_pages, but yield raw articles one at a time.
+
+    Each response body is parsed incrementally as it arrives, so neither the raw page nor the
+    full decoded page is ever held in memory.
+    """
+    client = get_pylon_client(pylon_api_key)
+    cursor = None
+    while True:
+        params = {"limit": page_size}
+        if cursor:
+            params["cursor"] = cursor
+
+        res = client.get(f"/knowledge-bases/{kb_id}/articles", params=params, stream=True)
+        try:
+            res.raise_for_status()
+            body = JsonArrayStream(res.iter_content(chunk_size=STREAM_CHUNK_BYTES))
+            yield from body
+        finally:
+            res.close()
+
+        pagination = body.envelope.get("pagination") or {}
+        cursor = pagination.get("cursor")
+        if not pagination.get("has_next_page") or not cursor:
+            return
+
+
+def iter_pylon_articles(kb_id, pylon_api_key, page_size=PYLON_PAGE_SIZE, prefetch_depth=PYLON_PAGE_SIZE):
+    """Yield raw Pylon articles one by one, keeping at most `prefetch_depth` articles parsed ahead of the caller."""
+    return prefetch(_stream_pylon_articles(kb_id, pylon_api_key, page_size), prefetch_depth)
+
+
+# Maximum page size accepted by the Ada knowledge articles endpoint
+ADA_PAGE_SIZE = 100
+
+
+def _fetch_ada_article_pages(source_id, ada_api_key, ada_bot_url, page_size):
+    """Walk the Ada knowledge articles endpoint page by page, yielding the raw article list of each page."""
+    client = get_ada_client(ada_api_key, ada_bot_url)
+    url = "/api/v2/knowledge/articles/"
+    params = {
+        "knowledge_source_id": source_id,
+        "limit": page_size
+    }
+    while url:
+        res = client.get(url, params=params)
+        res.raise_for_status()
+        body = res.json()
+
+        yield body.get("data") or []
+
+        # Ada returns a fully-qualified next_page_url that already carries the query string
+        url = (body.get("meta") or {}).get("next_page_url")
+        params = None
+
+
+def iter_ada_article_pages(source_id, ada_api_key, ada_bot_url, page_size=ADA_PAGE_SIZE, prefetch_depth=2):
+    """Yield pages of raw Ada articles, keeping at most `prefetch_depth` pages fetched ahead of the caller."""
+    return prefetch(_fetch_ada_article_pages(source_id, ada_api_key, ada_bot_url, page_size), prefetch_depth)
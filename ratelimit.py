@@ -0,0 +1,163 @@
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from metrics import RequestMetrics, current_run
+
+# Documented Pylon limits: (limit name, HTTP method, path pattern, requests per minute)
+# The single-article pattern is listed first so it wins over the listing pattern
+PYLON_RATE_LIMITS = [
+    ("pylon GET /articles/{id}", "GET", re.compile(r"^/knowledge-bases/[^/]+/articles/[^/]+/?$"), 20),
+    ("pylon GET /articles", "GET", re.compile(r"^/knowledge-bases/[^/]+/articles/?$"), 60),
+]
+
+# Status codes worth retrying - 429 means throttled, 5xx means the server failed transiently
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Methods that are safe to repeat after a server error or dropped connection
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Retry policy: up to MAX_RETRIES attempts with full-jitter exponential backoff
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket that spaces requests to stay within a per-minute limit."""
+
+    def __init__(self, rate_per_minute, capacity=1):
+        # A capacity of 1 spaces requests evenly, which also stays under sliding-window limits
+        self.interval = 60.0 / rate_per_minute
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and return how many seconds the caller waited."""
+        start = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - start
+                delay = max(self.blocked_until - now, (1 - self.tokens) * self.interval)
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds`, e.g. after the server returned Retry-After."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (delta-seconds or HTTP date) into seconds, or None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given (zero-based) retry attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class RequestScheduler:
+    """Throttles requests per endpoint, retries transient failures and records queue-wait statistics."""
+
+    def __init__(self, rate_limits=(), max_retries=MAX_RETRIES):
+        self.rules = [(name, method, pattern) for name, method, pattern, _ in rate_limits]
+        self.buckets = {name: TokenBucket(per_minute) for name, _, _, per_minute in rate_limits}
+        self.max_retries = max_retries
+        self.metrics = RequestMetrics()
+
+    def endpoint_for(self, method, path):
+        """Return the rate-limit name for a request, or a generic method/path label when none applies."""
+        for name, rule_method, pattern in self.rules:
+            if method == rule_method and pattern.match(path):
+                return name
+        return f"{method} {path}"
+
+    def _recorders(self):
+        # Everything is counted process-wide, and again for the run being measured in this thread, if any
+        run = current_run()
+        return (self.metrics,) if run is None else (self.metrics, run.requests)
+
+    def record_transfer(self, endpoint, sent, received):
+        for metrics in self._recorders():
+            metrics.record_transfer(endpoint, sent, received)
+
+    def record_cache(self, endpoint, outcome, saved=0):
+        for metrics in self._recorders():
+            metrics.record_cache(endpoint, outcome, saved)
+
+    def _sleep(self, endpoint, seconds, throttled):
+        for metrics in self._recorders():
+            metrics.record_sleep(endpoint, seconds, throttled)
+        time.sleep(seconds)
+
+    def send(self, method, path, send_request, idempotent=None):
+        """Send a request through the endpoint's rate limit, retrying 429s and (for idempotent calls) 5xx/connection errors."""
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        endpoint = self.endpoint_for(method, path)
+        bucket = self.buckets.get(endpoint)
+
+        attempt = 0
+        while True:
+            waited = bucket.acquire() if bucket else 0.0
+            recorders = self._recorders()
+            for metrics in recorders:
+                metrics.record_attempt(endpoint, waited, retried=attempt > 0)
+
+            started = time.perf_counter()
+            try:
+                res = send_request()
+            except (requests.ConnectionError, requests.Timeout):
+                for metrics in recorders:
+                    metrics.record_response(endpoint, time.perf_counter() - started)
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                self._sleep(endpoint, backoff_delay(attempt), throttled=False)
+                attempt += 1
+                continue
+            for metrics in recorders:
+                metrics.record_response(endpoint, time.perf_counter() - started, res.status_code)
+
+            # A throttled request was never processed, so it is safe to repeat regardless of method
+            retryable = res.status_code == 429 or (idempotent and res.status_code in RETRY_STATUS_CODES)
+            if not retryable or attempt >= self.max_retries:
+                return res
+
+            delay = parse_retry_after(res.headers.get("Retry-After"))
+            # Release the connection back to the pool; a streamed response holds it until closed
+            res.close()
+            throttled = delay is not None
+            if delay is None:
+                delay = backoff_delay(attempt)
+            elif bucket:
+                # Everyone sharing this endpoint has to respect the server's pause, not just this request
+                bucket.pause(delay)
+            self._sleep(endpoint, delay, throttled)
+            attempt += 1
+
+    def summary(self):
+        """Return a copy of the per-endpoint request, retry, latency, transfer and wait statistics."""
+        return self.metrics.snapshot()
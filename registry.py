@@ -0,0 +1,95 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+# On-disk location of the source registry (replaces the append-only source_ids.txt log)
+REGISTRY_PATH = os.environ.get("SYNC_REGISTRY_DB", "registry.sqlite3")
+
+
+class SourceRegistry:
+    """Indexed record of Ada knowledge sources created by this tool and the result of their last sync."""
+
+    def __init__(self, path=REGISTRY_PATH):
+        # Concurrent syncs share this file, so wait for other writers instead of failing fast
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " kb_id TEXT,"
+            " kb_name TEXT,"
+            " created_at REAL NOT NULL,"
+            " last_sync_at REAL,"
+            " last_result TEXT,"
+            " PRIMARY KEY (bot, source_id))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS sources_kb_id ON sources (kb_id)")
+        self.db.commit()
+
+    def record_source(self, bot, source_id, kb_id=None, kb_name=None, created_at=None):
+        """Register a source, keeping its original creation time if it is already known."""
+        self.db.execute(
+            "INSERT INTO sources (bot, source_id, kb_id, kb_name, created_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (bot, source_id) DO UPDATE SET"
+            " kb_id = COALESCE(excluded.kb_id, sources.kb_id),"
+            " kb_name = COALESCE(excluded.kb_name, sources.kb_name)",
+            (bot, source_id, kb_id, kb_name, created_at or time.time())
+        )
+        self.db.commit()
+
+    def record_sync_result(self, bot, source_id, kb_id, result):
+        """Store the outcome of the latest sync for a source (registering the source if needed)."""
+        self.record_source(bot, source_id, kb_id)
+        self.db.execute(
+            "UPDATE sources SET last_sync_at = ?, last_result = ? WHERE bot = ? AND source_id = ?",
+            (time.time(), json.dumps(result), bot, source_id)
+        )
+        self.db.commit()
+
+    def forget_source(self, bot, source_id):
+        """Remove a source after it was deleted from Ada."""
+        self.db.execute("DELETE FROM sources WHERE bot = ? AND source_id = ?", (bot, source_id))
+        self.db.commit()
+
+    def sources(self, bot=None):
+        """List registered sources, optionally for a single bot."""
+        query = "SELECT bot, source_id, kb_id, kb_name, created_at, last_sync_at, last_result FROM sources"
+        params = ()
+        if bot:
+            query += " WHERE bot = ?"
+            params = (bot,)
+        return [
+            {
+                "bot": row[0],
+                "source_id": row[1],
+                "kb_id": row[2],
+                "kb_name": row[3],
+                "created_at": row[4],
+                "last_sync_at": row[5],
+                "last_result": json.loads(row[6]) if row[6] else None
+            }
+            for row in self.db.execute(query + " ORDER BY bot, source_id", params)
+        ]
+
+    def import_source_ids_file(self, path="source_ids.txt"):
+        """Import the legacy source_ids.txt log, collapsing duplicates. Returns the number of distinct sources."""
+        seen = set()
+        with open(path) as f:
+            for line in f:
+                # Lines look like "<iso timestamp> - <bot>:<source_id>" (older lines have no bot)
+                timestamp, _, entry = line.strip().partition(" - ")
+                if not entry:
+                    continue
+                bot, _, source_id = entry.rpartition(":")
+                try:
+                    created_at = datetime.fromisoformat(timestamp).timestamp()
+                except ValueError:
+                    created_at = None
+                self.record_source(bot, source_id, kb_id=source_id, created_at=created_at)
+                seen.add((bot, source_id))
+        return len(seen)
+
+    def close(self):
+        self.db.close()
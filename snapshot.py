@@ -0,0 +1,354 @@
+"""Compressed local snapshots of Pylon knowledge bases for offline diffs and fast re-seeding of Ada sources.
+
+Usage:
+  python snapshot.py capture <KB_ID> <PATH>
+  python snapshot.py diff <OLD_PATH> <NEW_PATH> [--json]
+  python snapshot.py show <PATH> <ARTICLE_ID>
+  python snapshot.py seed <PATH> <BOT_HANDLE> [--source-id ID] [--existing-source] [--api-key KEY]
+
+A snapshot is a gzip-compressed JSON-lines file (readable with zcat) holding one record per
+article: the raw Pylon article plus its converted Markdown and content hash. The file is written
+as independent gzip blocks of a few dozen articles, and a JSON index next to it (`<PATH>.idx`)
+maps each article ID to its block, so a single article is read by decompressing one block.
+The index also carries each article's hash and timestamp, so two snapshots are diffed without
+decompressing either.
+
+`capture` reads the Pylon API key from PYLON_API_KEY (or prompts for it). `seed` uploads every
+article of a snapshot to an Ada source without calling Pylon at all, creating the source first
+unless --existing-source is given.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+from articles import DEFAULT_TIMESTAMP, PylonArticle, convert_pending
+from batching import upload_batches
+from conversion_cache import ConversionCache
+from http_cache import DEFAULT_TTL
+from http_client import get_pylon_client
+from logs import Progress, log_and_print
+from metrics import phase
+from pagination import iter_pylon_article_pages
+from registry import SourceRegistry
+from sync_state import SyncState
+from update_sync import get_content_hash, log_batch_result, measure_run
+
+# Version of the snapshot record and index layout
+SNAPSHOT_FORMAT = 1
+
+# Articles per independently compressed block; larger blocks compress better, smaller ones make lookups cheaper
+BLOCK_ARTICLES = 64
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+class SnapshotWriter:
+    """Writes a snapshot block by block; the file and its index only appear under `path` once closed."""
+
+    def __init__(self, path, kb_id, kb_name=None, block_articles=BLOCK_ARTICLES):
+        self.path = path
+        self.block_articles = block_articles
+        self.meta = {
+            "format": SNAPSHOT_FORMAT,
+            "kb_id": kb_id,
+            "kb_name": kb_name,
+            "captured_at": time.time()
+        }
+        self.blocks = []  # [offset, compressed length] per block
+        self.articles = {}  # article ID -> [block, line, content_hash, updated_at]
+        self.pending = []
+        self.file = open(path + ".tmp", "wb")
+
+    def add(self, raw_article, article):
+        """Append one article: the raw Pylon record and its converted PylonArticle."""
+        record = {
+            "id": article.id,
+            "title": article.title,
+            "url": article.url,
+            "updated_at": article.updated_at,
+            "content_hash": article.content_hash,
+            "markdown": article.content,
+            "raw": raw_article
+        }
+        self.articles[article.id] = [len(self.blocks), len(self.pending), article.content_hash, article.updated_at]
+        self.pending.append(json.dumps(record, ensure_ascii=False))
+        if len(self.pending) >= self.block_articles:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        # A fixed mtime keeps snapshots of identical content byte-identical
+        block = gzip.compress(("\n".join(self.pending) + "\n").encode("utf-8"), mtime=0)
+        self.blocks.append([self.file.tell(), len(block)])
+        self.file.write(block)
+        self.pending = []
+
+    def close(self):
+        self._flush()
+        self.file.close()
+        index = dict(self.meta, count=len(self.articles), blocks=self.blocks, articles=self.articles)
+        with open(index_path(self.path) + ".tmp", "w") as f:
+            json.dump(index, f)
+        # Replace the data file first: an index never points into a file it wasn't written for
+        os.replace(self.path + ".tmp", self.path)
+        os.replace(index_path(self.path) + ".tmp", index_path(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.path + ".tmp")
+
+
+class Snapshot:
+    """Read access to a snapshot: metadata and per-article hashes from the index, records from the data file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(index_path(path)) as f:
+            index = json.load(f)
+        if index.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {index.get('format')} in {path}")
+        self.blocks = index.pop("blocks")
+        self.articles = index.pop("articles")
+        self.meta = index
+        self._cached_block = (None, None)  # Last decompressed block, so neighbouring lookups are free
+
+    @property
+    def kb_id(self):
+        return self.meta["kb_id"]
+
+    def __len__(self):
+        return len(self.articles)
+
+    def __contains__(self, article_id):
+        return article_id in self.articles
+
+    def get(self, article_id):
+        """Return one article record, decompressing only the block that holds it, or None if absent."""
+        entry = self.articles.get(article_id)
+        if entry is None:
+            return None
+        block, line = entry[0], entry[1]
+        if self._cached_block[0] != block:
+            offset, length = self.blocks[block]
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                # Records are split on "\n" only: splitlines() would also break on U+2028 and the like inside them
+                lines = gzip.decompress(f.read(length)).decode("utf-8").split("\n")
+            self._cached_block = (block, lines)
+        return json.loads(self._cached_block[1][line])
+
+    def __iter__(self):
+        """Stream every record in capture order; the concatenated blocks read as one gzip stream."""
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def capture_snapshot(kb_id, pylon_api_key, path, cache=None):
+    """List a Pylon KB once and write it, converted, to a snapshot at `path`. Returns the article count."""
+    res = get_pylon_client(pylon_api_key).get(f"/knowledge-bases/{kb_id}", cache_ttl=DEFAULT_TTL)
+    res.raise_for_status()
+    kb_name = res.json()["data"].get("title")
+
+    owns_cache = cache is None
+    if owns_cache:
+        cache = ConversionCache()
+
+    undated = 0
+    with SnapshotWriter(path, kb_id, kb_name) as writer, Progress() as progress:
+        progress.set_stage("Capturing snapshot")
+        for page in iter_pylon_article_pages(kb_id, pylon_api_key):
+            articles = [PylonArticle.from_pylon(raw_article) for raw_article in page]
+            for article in articles:
+                if not article.updated_at:
+                    undated += 1
+                    article.updated_at = DEFAULT_TIMESTAMP
+            # Every article gets its Markdown and hash, including empty ones that a seed will skip
+            convert_pending(articles, cache, get_content_hash)
+            for raw_article, article in zip(page, articles):
+                writer.add(raw_article, article)
+            progress.add(captured=len(page))
+
+    if owns_cache:
+        cache.close()
+
+    if undated:
+        log_and_print(f"Warning: {undated} articles have no timestamp - using default date",
+                      event="missing_timestamps", kb=kb_id, count=undated)
+    log_and_print(f"Captured {len(writer.articles)} articles from KB '{kb_name}' to {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)",
+                  event="snapshot_captured", kb=kb_id, count=len(writer.articles), path=path)
+    return len(writer.articles)
+
+
+def diff_snapshots(old, new):
+    """Compare two Snapshots by their indexes. Returns lists of added, removed, changed and retimed article IDs.
+
+    "changed" articles have different content; "retimed" ones only a different timestamp.
+    """
+    added = [article_id for article_id in new.articles if article_id not in old.articles]
+    removed = [article_id for article_id in old.articles if article_id not in new.articles]
+    changed = []
+    retimed = []
+    for article_id, entry in new.articles.items():
+        previous = old.articles.get(article_id)
+        if previous is None:
+            continue
+        if previous[2] != entry[2]:
+            changed.append(article_id)
+        elif previous[3] != entry[3]:
+            retimed.append(article_id)
+    return {"added": added, "removed": removed, "changed": changed, "retimed": retimed}
+
+
+def seed_from_snapshot(path, ada_api_key, ada_bot_url, bot_handle, source_id=None, create_source=True, state=None):
+    """Upsert every non-empty article of a snapshot to an Ada source, without any Pylon requests.
+
+    The source defaults to the snapshot's KB ID, like sync.py. Acknowledged articles are recorded
+    in the local sync state, so the next delta sync only uploads what changed since the capture.
+    """
+    snapshot = Snapshot(path)
+    source_id = source_id or snapshot.kb_id
+    return measure_run(
+        "snapshot_seed", snapshot.kb_id, source_id, bot_handle, _seed,
+        snapshot, ada_api_key, ada_bot_url, bot_handle, source_id, create_source, state
+    )
+
+
+def _seed(snapshot, ada_api_key, ada_bot_url, bot_handle, source_id, create_source, state):
+    if create_source:
+        from sync import create_ada_source
+        with phase("source_create"):
+            source_id = create_ada_source(source_id, snapshot.meta.get("kb_name"), ada_api_key, ada_bot_url, bot_handle)
+    # Map the source to the snapshot's KB so later delta syncs and fleet.py find it
+    registry = SourceRegistry()
+    registry.record_source(bot_handle, source_id, snapshot.kb_id, snapshot.meta.get("kb_name"))
+    registry.close()
+
+    owns_state = state is None
+    if owns_state:
+        state = SyncState()
+
+    in_flight = {}  # Article records awaiting Ada's acknowledgement, for record_pushed
+    skipped = 0
+    failed = set()
+
+    def formatted():
+        nonlocal skipped
+        for record in snapshot:
+            if not (record["markdown"] or "").strip():
+                skipped += 1
+                continue
+            article = PylonArticle(record["id"], record["title"], record["url"], record["updated_at"], None)
+            article.content_hash = record["content_hash"]
+            in_flight[article.id] = article
+            yield {
+                "id": article.id,
+                "name": article.title,
+                "content": record["markdown"],
+                "knowledge_source_id": source_id,
+                "external_updated": article.updated_at,
+                "url": article.url
+            }
+
+    def on_result(result):
+        if result["ok"]:
+            state.record_pushed(bot_handle, source_id, [in_flight[article_id] for article_id in result["ids"]])
+        else:
+            failed.update(result["ids"])
+        log_batch_result(result, progress, bot_handle, source_id)
+        for article_id in result["ids"]:
+            in_flight.pop(article_id, None)
+
+    with Progress(bot_handle, source_id) as progress, phase("upsert"):
+        progress.set_stage(f"Seeding {len(snapshot)} articles from snapshot")
+        upload_batches(formatted(), ada_api_key, ada_bot_url, on_result=on_result)
+
+    if owns_state:
+        state.close()
+
+    uploaded = len(snapshot) - skipped - len(failed)
+    log_and_print(f"Seeded {uploaded} articles from snapshot ({skipped} skipped with empty content, {len(failed)} failed)",
+                  bot_handle, source_id, event="snapshot_seeded", created=uploaded, skipped=skipped, failed=len(failed))
+    return {"source_id": source_id, "created": uploaded, "skipped": skipped, "failed": len(failed)}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Capture, diff and seed from compressed Pylon KB snapshots.")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    capture_command = commands.add_parser("capture", help="List a Pylon KB once and save it as a snapshot")
+    capture_command.add_argument("kb_id")
+    capture_command.add_argument("path")
+
+    diff_command = commands.add_parser("diff", help="Show articles added, removed or changed between two snapshots")
+    diff_command.add_argument("old_path")
+    diff_command.add_argument("new_path")
+    diff_command.add_argument("--json", action="store_true", help="Print the full diff as JSON")
+
+    show_command = commands.add_parser("show", help="Print one article record from a snapshot")
+    show_command.add_argument("path")
+    show_command.add_argument("article_id")
+
+    seed_command = commands.add_parser("seed", help="Upload every article of a snapshot to an Ada source")
+    seed_command.add_argument("path")
+    seed_command.add_argument("bot_handle")
+    seed_command.add_argument("--source-id", help="Ada knowledge source ID (default: the snapshot's KB ID)")
+    seed_command.add_argument("--existing-source", action="store_true", help="Upload into an existing source instead of creating it")
+    seed_command.add_argument("--api-key", help="Ada API key (prompted for if omitted)")
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "capture":
+        pylon_api_key = os.environ.get("PYLON_API_KEY", "").strip() or input("Enter your Pylon API key: ").strip()
+        if not pylon_api_key:
+            raise ValueError("Pylon API key is required")
+        capture_snapshot(args.kb_id, pylon_api_key, args.path)
+        return 0
+
+    if args.command == "diff":
+        old, new = Snapshot(args.old_path), Snapshot(args.new_path)
+        diff = diff_snapshots(old, new)
+        if args.json:
+            print(json.dumps(diff, indent=2))
+            return 0
+        print(f"{len(old)} -> {len(new)} articles: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+              f"{len(diff['changed'])} changed, {len(diff['retimed'])} with only a new timestamp")
+        for label, key, snapshot in (("+", "added", new), ("-", "removed", old), ("~", "changed", new)):
+            for article_id in diff[key]:
+                print(f"{label} {article_id}: {snapshot.get(article_id)['title']}")
+        return 0
+
+    if args.command == "show":
+        record = Snapshot(args.path).get(args.article_id)
+        if record is None:
+            print(f"Article {args.article_id} is not in {args.path}")
+            return 1
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+        return 0
+
+    ada_api_key = args.api_key or input("Enter your Ada API key: ").strip()
+    if not ada_api_key:
+        raise ValueError("Ada API key is required")
+    result = seed_from_snapshot(args.path, ada_api_key, f"https://{args.bot_handle}.ada.support", args.bot_handle,
+                                args.source_id, create_source=not args.existing_source)
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
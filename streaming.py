@@ -0,0 +1,238 @@
+import logging
+import os
+import sys
+import tracemalloc
+
+from dateutil import parser
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from articles import DEFAULT_TIMESTAMP, PylonArticle, convert_pending
+from batching import upload_batches
+from conversion_cache import ConversionCache
+from fingerprint import is_current
+from logs import Progress, log_and_print, log_article
+from metrics import phase
+from pagination import iter_pylon_articles, prefetch
+from sync_state import SyncState
+from update_sync import (CHANGE_DETECTION, delete_articles_from_ada, get_ada_articles, get_content_hash,
+                         log_batch_result, measure_run)
+
+# Maximum number of articles buffered between two pipeline stages; a slow stage blocks the ones before it
+STREAM_QUEUE_SIZE = int(os.environ.get("SYNC_STREAM_QUEUE_SIZE", "256"))
+
+# Articles converted together, so the conversion cache and worker pool still see small batches
+CONVERT_CHUNK_SIZE = 32
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB, or None where the platform can't report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def memory_report_line():
+    peak = peak_memory_mb()
+    line = f"Peak memory: {peak:.1f} MB RSS" if peak is not None else "Peak memory: unavailable"
+    # Run with PYTHONTRACEMALLOC=1 to also see the Python heap peak, which excludes interpreter overhead
+    if tracemalloc.is_tracing():
+        line += f", {tracemalloc.get_traced_memory()[1] / (1024 * 1024):.1f} MB Python heap"
+    return line
+
+
+def _fetch(kb_id, pylon_api_key, run, bot_handle, source_id):
+    """Stage 1: stream Pylon articles as compact records."""
+    for raw_article in iter_pylon_articles(kb_id, pylon_api_key):
+        article = PylonArticle.from_pylon(raw_article)
+        if not article.updated_at:
+            run["undated"] += 1
+            log_article("missing_timestamp", f"Article '{article.title}' has no timestamp - using default date",
+                        bot_handle, source_id, level=logging.WARNING, article_id=article.id)
+            article.updated_at = DEFAULT_TIMESTAMP
+        yield article
+
+
+def _diff(articles, known, detection, run, bot_handle, source_id):
+    """Stage 2: pass on only articles that may need uploading, as (action, article) pairs.
+
+    Tracks every ID seen (for deletes) and the newest timestamp (for the watermark) in `run`.
+    "check" articles are compared by content fingerprint once converted.
+    """
+    for article in articles:
+        run["seen"].add(article.id)
+        run["progress"].add(fetched=1)
+        try:
+            if run["newest"] is None or article.timestamp > run["newest"].timestamp:
+                run["newest"] = article
+        except (ValueError, OverflowError, TypeError):
+            pass  # Unparseable timestamps never become the watermark
+
+        previous = known.get(article.id)
+        if previous is None:
+            yield "create", article
+            continue
+
+        if detection == "hash" and is_current(previous["content_hash"]):
+            yield "check", article
+            continue
+
+        try:
+            if article.timestamp > parser.parse(previous["updated_at"]):
+                yield "update", article
+        except Exception as e:
+            log_article("timestamp_unparseable", f"Timestamp parsing failed for '{article.title}': {e}",
+                        bot_handle, source_id, level=logging.WARNING, article_id=article.id, error=str(e))
+            yield "check", article
+
+
+def _convert(changes, known, cache, source_id, run, bot_handle):
+    """Stage 3: convert changed articles in small chunks and yield them in Ada's bulk format.
+
+    Articles whose content is empty are skipped; those already in Ada were emptied in Pylon and are
+    collected in `run["emptied"]` for the delete stage.
+    """
+    def flush(chunk):
+        converted = convert_pending([article for _, article in chunk], cache, get_content_hash)
+        run["skipped"] += len(chunk) - len(converted)
+        non_empty = {id(article) for article in converted}
+        for action, article in chunk:
+            if id(article) not in non_empty:
+                if article.id in known:
+                    run["emptied"].add(article.id)
+                continue
+            if action == "check":
+                if article.content_hash == known[article.id]["content_hash"]:
+                    continue
+                action = "update"
+                log_article("article_changed", f"Article updated (content changed): '{article.title}' (ID: {article.id})",
+                            bot_handle, source_id, article_id=article.id, reason="content")
+            run[action + "d"] += 1
+            # Only what record_pushed needs is kept until Ada acknowledges the batch
+            run["in_flight"][article.id] = article
+            yield {
+                "id": article.id,
+                "name": article.title,
+                "content": article.content,
+                "knowledge_source_id": source_id,
+                "external_updated": article.updated_at,
+                "url": article.url
+            }
+            article.content = None
+
+    chunk = []
+    for change in changes:
+        chunk.append(change)
+        if len(chunk) >= CONVERT_CHUNK_SIZE:
+            yield from flush(chunk)
+            chunk = []
+    yield from flush(chunk)
+
+
+def stream_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile=None,
+                      state=None, cache=None, detection=None, queue_size=STREAM_QUEUE_SIZE):
+    """Delta sync as a bounded pipeline (fetch -> diff -> convert -> upload) for very large knowledge bases.
+
+    Produces the same result as perform_delta_sync, but articles flow through the stages one at
+    a time over bounded queues instead of being collected first, so memory stays roughly flat
+    as the KB grows: only article IDs, the local sync state and `queue_size` articles per stage
+    are held at once. The listing is always complete, so deletes are detected on every run.
+    """
+    return measure_run(
+        "stream_sync", kb_id, source_id, bot_handle, _stream_delta_sync,
+        kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile, state, cache, detection, queue_size
+    )
+
+
+def _stream_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile, state, cache,
+                       detection, queue_size):
+    detection = detection or CHANGE_DETECTION
+    log_and_print("Starting streaming delta sync...", bot_handle, source_id)
+    owns_stores = state is None
+    if owns_stores:
+        state = SyncState()
+        cache = ConversionCache()
+
+    try:
+        if reconcile is None:
+            reconcile = state.reconcile_due(bot_handle, source_id)
+        if reconcile:
+            log_and_print("Reconciling local sync state against Ada...", bot_handle, source_id)
+            with phase("ada_fetch"):
+                known = get_ada_articles(source_id, ada_api_key, ada_bot_url, bot_handle)
+                state.replace(bot_handle, source_id, known)
+        else:
+            with phase("state_load"):
+                known = state.load(bot_handle, source_id)
+            log_and_print(f"Loaded {len(known)} articles from local sync state", bot_handle, source_id)
+
+        progress = Progress(bot_handle, source_id)
+        run = {"seen": set(), "emptied": set(), "newest": None, "created": 0, "updated": 0, "skipped": 0, "undated": 0, "in_flight": {},
+               "progress": progress}
+        failed = set()
+
+        def on_result(result):
+            # Runs in this thread as each batch completes, so acknowledged articles are recorded straight away
+            in_flight = run["in_flight"]
+            if result["ok"]:
+                state.record_pushed(bot_handle, source_id, [in_flight[article_id] for article_id in result["ids"]])
+            else:
+                failed.update(result["ids"])
+            log_batch_result(result, progress, bot_handle, source_id)
+            for article_id in result["ids"]:
+                in_flight.pop(article_id, None)
+
+        # Each stage runs in its own thread behind a bounded queue, so fetching, diffing, converting
+        # and uploading overlap while a slow stage (usually the upload) throttles the rest, so they are timed as one phase
+        fetched = prefetch(_fetch(kb_id, pylon_api_key, run, bot_handle, source_id), queue_size)
+        changes = prefetch(_diff(fetched, known, detection, run, bot_handle, source_id), queue_size)
+        formatted = prefetch(_convert(changes, known, cache, source_id, run, bot_handle), queue_size)
+        with progress, phase("pipeline"):
+            progress.set_stage("Streaming Pylon -> Ada")
+            upload_batches(formatted, ada_api_key, ada_bot_url, on_result=on_result)
+
+        if run["undated"]:
+            log_and_print(f"Warning: {run['undated']} articles have no timestamp - using default date", bot_handle, source_id,
+                          event="missing_timestamps", count=run["undated"])
+        log_and_print(f"Retrieved {len(run['seen'])} articles from Pylon", bot_handle, source_id,
+                      event="pylon_fetched", count=len(run["seen"]))
+        if run["skipped"]:
+            log_and_print(f"Skipped {run['skipped']} articles with empty content", bot_handle, source_id,
+                          event="articles_skipped", count=run["skipped"])
+        log_and_print(cache.stats_line(), bot_handle, source_id)
+
+        to_delete = [article_id for article_id in known if article_id not in run["seen"] or article_id in run["emptied"]]
+        log_and_print(f"Articles to delete: {len(to_delete)}", bot_handle, source_id, event="to_delete", count=len(to_delete))
+        delete_failed = set()
+        if to_delete:
+            with phase("delete"):
+                delete_failed = delete_articles_from_ada(to_delete, ada_api_key, ada_bot_url, bot_handle, source_id)
+                state.forget(bot_handle, source_id, [article_id for article_id in to_delete if article_id not in delete_failed])
+        deleted = len(to_delete) - len(delete_failed)
+
+        if not failed:
+            newest = run["newest"]
+            state.set_watermark(kb_id, bot_handle, source_id, newest.updated_at if newest else None, full_sweep=True)
+    finally:
+        if owns_stores:
+            state.close()
+            cache.close()
+
+    # Failed deletes count as failed articles too, but don't hold back the watermark
+    failed_count = len(failed) + len(delete_failed)
+    log_and_print(f"Streaming delta sync completed: {run['created']} created, {run['updated']} updated, {deleted} deleted, {failed_count} failed", bot_handle, source_id,
+                  event="sync_completed", created=run["created"], updated=run["updated"], deleted=deleted, failed=failed_count)
+    log_and_print(memory_report_line(), bot_handle, source_id)
+
+    return {
+        "created": run["created"],
+        "updated": run["updated"],
+        "deleted": deleted,
+        "failed": failed_count,
+        "peak_memory_mb": peak_memory_mb()
+    }
@@ -1,16 +1,19 @@
-# Standard library imports for HTTP requests, logging, and date handling
-import requests
-from markdownify import markdownify as md  # Converts HTML content to Markdown format
+# Standard library imports for logging and command-line flags
 import logging
-from datetime import datetime
+import sys
+from http_client import get_ada_client, get_pylon_client, request_stats_lines  # Pooled keep-alive clients with timeouts
+from http_cache import DEFAULT_TTL  # Reuse window for cached Pylon responses without validators
+from pagination import iter_pylon_article_pages  # Shared cursor-paginated Pylon fetcher
+from batching import upload_batches  # Size-bounded, parallel bulk uploads to Ada
+from convert import convert_articles  # Parallel HTML to Markdown conversion
+from registry import SourceRegistry  # Indexed record of created sources
+from metrics import RunMetrics, phase  # Per-phase timings and per-run request metrics
+from logs import Progress, configure_logging, log_and_print, log_article, log_event  # Structured, queued logging
+from journal import close_run, journaled_pages, open_run  # Checkpoints for resuming interrupted runs
 
 # Configure logging to write sync operations and errors to a file
-# This helps track the sync process and debug any issues
-logging.basicConfig(
-    filename='sync.log',  # Log file name
-    level=logging.INFO,   # Log level - captures INFO and above (WARNING, ERROR, CRITICAL)
-    format='%(asctime)s [%(levelname)s] %(message)s'  # Include timestamp and log level
-)
+# Records are JSON lines written by a background thread, so logging never slows the sync down
+configure_logging('sync.log')
 
 def get_user_credentials():
     """Prompt user for their API credentials and bot handle."""
@@ -41,27 +44,12 @@ def get_user_credentials():
 
     return pylon_api_key, ada_api_key, ada_bot_url
 
-def log_and_print(msg, bot_handle=None, source_id=None):
-    # Add bot handle and source ID context to message
-    if bot_handle and source_id:
-        formatted_msg = f"[{bot_handle}:{source_id}] {msg}"
-    elif bot_handle:
-        formatted_msg = f"[{bot_handle}] {msg}"
-    else:
-        formatted_msg = msg
-
-    print(formatted_msg)        # Display message to user in real-time
-    logging.info(formatted_msg) # Write message to log file for permanent record
-
 def get_pylon_kb(kb_id, pylon_api_key, bot_handle=None):
     # Make authenticated GET request to fetch the specific knowledge base
-    res = requests.get(
-        f"https://api.usepylon.com/knowledge-bases/{kb_id}",
-        headers={
-            "Authorization": f"Bearer {pylon_api_key}",  # Bearer token authentication
-            "Content-Type": "application/json"           # Specify JSON content type
-        }
-    )
+    # The shared client carries the auth headers and reuses its pooled connection
+    # KB metadata rarely changes, so it goes through the response cache: a conditional request
+    # (answered with a bodyless 304 when unchanged), or no request at all while the cached copy is fresh
+    res = get_pylon_client(pylon_api_key).get(f"/knowledge-bases/{kb_id}", cache_ttl=DEFAULT_TTL)
 
     # Raise exception if request failed (4xx or 5xx status codes)
     res.raise_for_status()
@@ -75,27 +63,33 @@ def get_pylon_kb(kb_id, pylon_api_key, bot_handle=None):
 
     return kb_id, kb_name
 
-def get_articles(kb_id, pylon_api_key, bot_handle=None, source_id=None):
-    # Make authenticated GET request to fetch articles from specific knowledge base
-    # Limit set to 200 to fetch more articles while avoiding overwhelming the API
-    res = requests.get(
-        f"https://api.usepylon.com/knowledge-bases/{kb_id}/articles?limit=200",
-        headers={
-            "Authorization": f"Bearer {pylon_api_key}",  # Bearer token authentication
-            "Content-Type": "application/json"           # Specify JSON content type
-        }
-    )
+def get_articles(kb_id, pylon_api_key, bot_handle=None, source_id=None, progress=None, journal_run=None):
+    # Stream articles page by page using Pylon's cursor pagination
+    # Each page is yielded as soon as it arrives so it can be converted and uploaded
+    # while the next page is prefetched in the background
+    # With a run journal, each page is checkpointed and a resumed run replays its pages instead of refetching them
+    if journal_run is None:
+        pages = iter_pylon_article_pages(kb_id, pylon_api_key)
+    else:
+        pages = journaled_pages(
+            journal_run,
+            lambda cursor: iter_pylon_article_pages(kb_id, pylon_api_key, cursor=cursor, with_cursors=True)
+        )
 
-    # Raise exception if request failed
-    res.raise_for_status()
+    total = 0
+    for page in pages:
+        total += len(page)
 
-    # Extract articles array from JSON response
-    articles = res.json()["data"]
+        # Show progress on the live status line and record each page in the log file only
+        if progress:
+            progress.add(fetched=len(page))
+        log_event(f"Retrieved {len(page)} articles ({total} so far).", bot_handle, source_id,
+                  event="page_fetched", count=len(page), total=total)
 
-    # Log the number of articles retrieved for tracking
-    log_and_print(f"Retrieved {len(articles)} articles.", bot_handle, source_id)
+        yield page
 
-    return articles
+    # Log the number of articles retrieved for tracking
+    log_and_print(f"Retrieved {total} articles.", bot_handle, source_id, event="pylon_fetched", count=total)
 
 def create_ada_source(kb_id, kb_name, ada_api_key, ada_bot_url, bot_handle=None):
     # Prepare the payload for creating Ada knowledge source
@@ -108,13 +102,9 @@ def create_ada_source(kb_id, kb_name, ada_api_key, ada_bot_url, bot_handle=None)
     log_and_print(f"Creating Ada knowledge source with: {payload}", bot_handle)
 
     # Make authenticated POST request to create the knowledge source
-    res = requests.post(
-        f"{ada_bot_url}/api/v2/knowledge/sources",
-        headers={
-            "Authorization": f"Bearer {ada_api_key}",  # Bearer token authentication
-            "Content-Type": "application/json"         # Specify JSON payload
-        },
-        json=payload  # Automatically serializes dict to JSON
+    res = get_ada_client(ada_api_key, ada_bot_url).post(
+        "/api/v2/knowledge/sources",
+        json_body=payload  # Serialized to JSON by the client
     )
 
     # Handle potential API errors with detailed error information
@@ -129,25 +119,32 @@ def create_ada_source(kb_id, kb_name, ada_api_key, ada_bot_url, bot_handle=None)
     source_id = payload["id"]
     log_and_print(f"Created Ada knowledge source: {source_id}", bot_handle, source_id)
 
-    # Record the created source ID with timestamp for cleanup tracking
-    # This file helps identify sources that can be deleted later
-    with open("source_ids.txt", "a") as f:
-        f.write(f"{datetime.now().isoformat()} - {bot_handle}:{source_id}\n")
+    # Record the created source in the registry for cleanup tracking and later delta syncs
+    # Re-running a sync for the same source updates its entry instead of adding a duplicate
+    registry = SourceRegistry()
+    registry.record_source(bot_handle, source_id, kb_id, kb_name)
+    registry.close()
 
     return source_id
 
-def upsert_articles(articles, source_id, ada_api_key, ada_bot_url, bot_handle=None):
+def upsert_articles(articles, source_id, ada_api_key, ada_bot_url, bot_handle=None, progress=None, journal_run=None):
     formatted = []  # List to store Ada-formatted article objects
 
+    # Convert HTML content to Markdown for the whole page at once using a process pool
+    # This makes the content more readable and compatible with Ada; results keep the input order
+    with phase("conversion"):
+        contents = convert_articles(articles)
+
     # Process each Pylon article and convert to Ada format
-    for article in articles:
-        # Convert HTML content to Markdown using markdownify library
-        # This makes the content more readable and compatible with Ada
-        content = md(article.get("current_published_content_html", "") or "")
+    for article, content in zip(articles, contents):
 
         # Skip articles with empty content (Ada requires non-empty content)
         if not content.strip():
-            log_and_print(f"Skipping article '{article.get('title', 'Untitled')}' - empty content", bot_handle, source_id)
+            # Per-article detail is sampled (see logs.py); the run's totals are always shown
+            if progress:
+                progress.add(skipped=1)
+            log_article("article_skipped", f"Skipping article '{article.get('title', 'Untitled')}' - empty content",
+                        bot_handle, source_id, article_id=article.get("id"), reason="empty_content")
             continue
 
         # Extract the most recent update timestamp, with fallback options
@@ -170,7 +167,10 @@ def upsert_articles(articles, source_id, ada_api_key, ada_bot_url, bot_handle=No
 
         # Log articles with missing timestamps to help identify data issues
         if not updated_at:
-            log_and_print(f"Warning: Article '{article_title}' has no timestamp - using default date", bot_handle, source_id)
+            if progress:
+                progress.add(undated=1)
+            log_article("missing_timestamp", f"Warning: Article '{article_title}' has no timestamp - using default date",
+                        bot_handle, source_id, level=logging.WARNING, article_id=article.get("id"))
             updated_at = "2020-01-01T00:00:00Z"  # Use a default historical date instead of current time
 
         # Create Ada-compatible article object
@@ -185,31 +185,108 @@ def upsert_articles(articles, source_id, ada_api_key, ada_bot_url, bot_handle=No
 
     # Check if we have any articles to upload
     if not formatted:
-        log_and_print("No articles with valid content found to upload.", bot_handle, source_id)
-        return
-
-    log_and_print(f"Uploading {len(formatted)} articles to Ada.", bot_handle, source_id)
-
-    # Use Ada's bulk upload API to efficiently upload all articles at once
-    # This is much faster than individual article uploads
-    res = requests.post(
-        f"{ada_bot_url}/api/v2/knowledge/bulk/articles/",
-        headers={
-            "Authorization": f"Bearer {ada_api_key}",  # Bearer token authentication
-            "Content-Type": "application/json"         # Specify JSON payload
-        },
-        json=formatted  # Send the formatted articles array
-    )
-
-    # Handle potential API errors with detailed error information
-    try:
-        res.raise_for_status()  # Raises HTTPError for bad responses
-    except Exception:
-        # Print Ada's error response for debugging before re-raising
-        print("Ada response:", res.text)
-        raise
-
-    log_and_print(f"Uploaded {len(formatted)} articles to Ada.", bot_handle, source_id)
+        log_event("No articles with valid content found to upload.", bot_handle, source_id, event="page_empty")
+        return 0
+
+    log_event(f"Uploading {len(formatted)} articles to Ada.", bot_handle, source_id, event="page_uploading", count=len(formatted))
+
+    # Use Ada's bulk upload API, split into size-bounded batches sent over a small worker pool
+    # A bad article only fails its own batch instead of the whole upload
+    uploaded = 0
+    failed = 0
+    # Each acknowledged batch is checkpointed right away, so a resumed run doesn't upload it again
+    def checkpoint(result):
+        if journal_run and result["ok"]:
+            journal_run.record_acked("upsert", result["ids"])
+
+    with phase("upsert"):
+        results = upload_batches(formatted, ada_api_key, ada_bot_url, on_result=checkpoint)
+    for result in results:
+        if result["ok"]:
+            uploaded += len(result["ids"])
+            log_event(f"Batch {result['batch']}: uploaded {len(result['ids'])} articles.", bot_handle, source_id,
+                      event="batch_upserted", batch=result["batch"], count=len(result["ids"]))
+        else:
+            # Report which articles were in the failed batch so they can be investigated
+            failed += len(result["ids"])
+            log_and_print(f"Batch {result['batch']}: failed to upload {len(result['ids'])} articles ({', '.join(result['titles'][:3])}{'...' if len(result['titles']) > 3 else ''}): {result['error']}", bot_handle, source_id,
+                          event="batch_failed", batch=result["batch"], count=len(result["ids"]), article_ids=result["ids"],
+                          error=result["error"])
+
+    if progress:
+        progress.add(uploaded=uploaded, failed=failed)
+    log_event(f"Uploaded {uploaded} articles to Ada.", bot_handle, source_id, event="page_uploaded", count=uploaded)
+
+    # Return the failure count so the caller can report a partial sync
+    return failed
+
+def sync_knowledge_base(kb_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle=None, resume=False):
+    # Run the whole initial sync for one KB, returning the created source ID and the failed article count
+    # Wall time per phase and request metrics are collected for the run and written to the metrics file
+    # Progress is checkpointed in the run journal; with `resume`, an interrupted run continues where it stopped
+    with RunMetrics("initial_sync", kb=kb_id, bot=bot_handle, source=kb_id) as run:
+        try:
+            journal_run = open_run("initial_sync", kb_id, bot_handle, kb_id, resume)
+
+            # Step 1: Get the Pylon knowledge base information
+            # This validates the KB ID and gets the KB name
+            with phase("kb_lookup"):
+                kb_id, kb_name = get_pylon_kb(kb_id, pylon_api_key, bot_handle)
+
+            # Step 2: Create a corresponding knowledge source in Ada
+            # This creates the container where Pylon articles will be stored
+            # (a resumed run reuses the source its interrupted run already created)
+            if journal_run.get("source_created"):
+                ada_source_id = kb_id
+                log_and_print(f"Using Ada knowledge source created by the interrupted run: {ada_source_id}", bot_handle, ada_source_id)
+            else:
+                with phase("source_create"):
+                    ada_source_id = create_ada_source(kb_id, kb_name, ada_api_key, ada_bot_url, bot_handle)
+                journal_run.set("source_created", True)
+
+            # Step 3: Stream all articles from the Pylon knowledge base and upload them page by page
+            # Each page is converted and uploaded before the next one is processed,
+            # so memory use stays flat no matter how large the knowledge base is
+            # Time spent waiting for the next page counts as the Pylon fetch phase
+            # Running totals are shown on one live console line instead of a line per page and batch
+            # Articles the interrupted run already uploaded are skipped, so only its unfinished tail is sent
+            failed = 0
+            already_uploaded = journal_run.acked("upsert")
+            with Progress(bot_handle, ada_source_id) as progress:
+                progress.set_stage("Syncing articles")
+                pages = get_articles(kb_id, pylon_api_key, bot_handle, ada_source_id, progress, journal_run)
+                while True:
+                    with phase("pylon_fetch"):
+                        page = next(pages, None)
+                    if page is None:
+                        break
+                    if already_uploaded:
+                        remaining = [article for article in page if (article.get("id") or article.get("_id")) not in already_uploaded]
+                        progress.add(resumed=len(page) - len(remaining))
+                        page = remaining
+                    failed += upsert_articles(page, ada_source_id, ada_api_key, ada_bot_url, bot_handle, progress, journal_run)
+            counts = progress.counts
+            if counts.get("resumed"):
+                log_and_print(f"Skipped {counts['resumed']} articles already uploaded by the interrupted run.", bot_handle, ada_source_id,
+                              event="resume_skipped", count=counts["resumed"])
+            if counts.get("undated"):
+                log_and_print(f"Warning: {counts['undated']} articles have no timestamp - using default date", bot_handle, ada_source_id,
+                              event="missing_timestamps", count=counts["undated"])
+            log_and_print(f"Uploaded {counts.get('uploaded', 0)} articles to Ada ({counts.get('skipped', 0)} skipped with empty content, {failed} failed).",
+                          bot_handle, ada_source_id, event="sync_uploaded", uploaded=counts.get("uploaded", 0),
+                          skipped=counts.get("skipped", 0), failed=failed)
+        except Exception as e:
+            run.finish(error=str(e))
+            raise
+
+        # Keep the journal for --resume if any batch failed, otherwise clear it
+        close_run(journal_run, failed, bot_handle, ada_source_id)
+
+        # Log where the time went, then write the machine-readable run summary
+        log_and_print(f"Phase timings - {run.phase_line()}", bot_handle, ada_source_id, event="phase_timings", phases=dict(run.phases))
+        run.finish({"failed": failed})
+
+    return ada_source_id, failed
 
 # Main execution block - only runs when script is executed directly (not imported)
 if __name__ == "__main__":
@@ -225,28 +302,24 @@ if __name__ == "__main__":
         # Extract bot handle from URL
         bot_handle = ada_bot_url.replace("https://", "").replace(".ada.support", "")
 
-        # Step 1: Get the Pylon knowledge base information
-        # This validates the KB ID and gets the KB name
-        kb_id, kb_name = get_pylon_kb(kb_id, pylon_api_key, bot_handle)
-
-        # Step 2: Retrieve all articles from the Pylon knowledge base
-        # This fetches the actual content that needs to be synced
-        articles = get_articles(kb_id, pylon_api_key, bot_handle)
-
-        # Step 3: Create a corresponding knowledge source in Ada
-        # This creates the container where Pylon articles will be stored
-        ada_source_id = create_ada_source(kb_id, kb_name, ada_api_key, ada_bot_url, bot_handle)
+        # Steps 1-3: Look up the KB, create its Ada source and upload every article
+        # Pass --resume to continue an interrupted or partly failed run instead of starting over
+        ada_source_id, failed = sync_knowledge_base(kb_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle,
+                                                    resume="--resume" in sys.argv)
 
-        # Step 4: Convert and upload all articles to Ada
-        # This performs the actual content migration
-        upsert_articles(articles, ada_source_id, ada_api_key, ada_bot_url, bot_handle)
+        # Log completion, calling out any articles whose batches were rejected
+        if failed:
+            log_and_print(f"Sync completed with {failed} articles that failed to upload - see batch errors above.", bot_handle, ada_source_id)
+        else:
+            log_and_print("Sync completed successfully.", bot_handle, ada_source_id)
 
-        # Log successful completion
-        log_and_print("Sync completed successfully.", bot_handle, ada_source_id)
+        # Report request counts, retries and time spent queued behind rate limits
+        for line in request_stats_lines():
+            log_and_print(f"Requests - {line}", bot_handle, ada_source_id)
 
         # Provide cleanup instructions for the user
         # The delete.py script can be used to remove the created source if needed
-        log_and_print(f"To delete this source, run: python delete.py {ada_source_id} {ada_bot_url} {ada_api_key}", bot_handle, ada_source_id)
+        log_and_print(f"To delete this source, run: python delete.py {ada_source_id} {ada_bot_url} {ada_api_key} {bot_handle}", bot_handle, ada_source_id)
 
     except Exception as e:
         # Handle any errors that occur during the sync process
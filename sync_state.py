@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import time
+
+# On-disk location of the local sync state
+STATE_PATH = os.environ.get("SYNC_STATE_DB", "sync_state.sqlite3")
+
+# How often delta sync re-reads the whole Ada source to catch drift (changes made outside this tool)
+RECONCILE_INTERVAL = float(os.environ.get("SYNC_RECONCILE_HOURS", "24")) * 3600
+
+# How often delta sync ignores the watermark and sweeps the whole Pylon KB to catch deletions
+FULL_SWEEP_INTERVAL = float(os.environ.get("SYNC_FULL_SWEEP_HOURS", "24")) * 3600
+
+
+class SyncState:
+    """Local record of what was last pushed to each Ada knowledge source, keyed by (bot, source, article)."""
+
+    def __init__(self, path=STATE_PATH):
+        # Concurrent syncs share this file, so wait for other writers instead of failing fast.
+        # A long-running caller may use one instance from successive worker threads (never concurrently)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pushed_articles ("
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " article_id TEXT NOT NULL,"
+            " external_updated TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " pushed_at REAL NOT NULL,"
+            " PRIMARY KEY (bot, source_id, article_id))"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS reconciles ("
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " reconciled_at REAL NOT NULL,"
+            " PRIMARY KEY (bot, source_id))"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            " kb_id TEXT NOT NULL,"
+            " bot TEXT NOT NULL,"
+            " source_id TEXT NOT NULL,"
+            " high_water TEXT,"
+            " full_sweep_at REAL,"
+            " PRIMARY KEY (kb_id, bot, source_id))"
+        )
+        self.db.commit()
+
+    def load(self, bot, source_id):
+        """Return the last-pushed state of a source in the same shape as get_ada_articles."""
+        rows = self.db.execute(
+            "SELECT article_id, external_updated, content_hash FROM pushed_articles WHERE bot = ? AND source_id = ?",
+            (bot, source_id)
+        )
+        return {
+            article_id: {"id": article_id, "content_hash": content_hash, "updated_at": external_updated}
+            for article_id, external_updated, content_hash in rows
+        }
+
+    def get(self, bot, source_id, article_id):
+        """Return the last-pushed state of one article in the same shape as load, or None."""
+        row = self.db.execute(
+            "SELECT external_updated, content_hash FROM pushed_articles WHERE bot = ? AND source_id = ? AND article_id = ?",
+            (bot, source_id, article_id)
+        ).fetchone()
+        return {"id": article_id, "content_hash": row[1], "updated_at": row[0]} if row else None
+
+    def record_pushed(self, bot, source_id, articles):
+        """Remember articles Ada acknowledged, with the timestamp and content hash that were sent."""
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO pushed_articles VALUES (?, ?, ?, ?, ?, ?)",
+            [(bot, source_id, article.id, article.updated_at, article.content_hash, now) for article in articles]
+        )
+        self.db.commit()
+
+    def forget(self, bot, source_id, article_ids):
+        """Drop articles that were deleted from Ada."""
+        self.db.executemany(
+            "DELETE FROM pushed_articles WHERE bot = ? AND source_id = ? AND article_id = ?",
+            [(bot, source_id, article_id) for article_id in article_ids]
+        )
+        self.db.commit()
+
+    def replace(self, bot, source_id, ada_articles):
+        """Overwrite a source's state with a fresh snapshot from Ada (the reconcile pass)."""
+        now = time.time()
+        self.db.execute("DELETE FROM pushed_articles WHERE bot = ? AND source_id = ?", (bot, source_id))
+        self.db.executemany(
+            "INSERT INTO pushed_articles VALUES (?, ?, ?, ?, ?, ?)",
+            [(bot, source_id, article["id"], article["updated_at"] or "", article["content_hash"], now)
+             for article in ada_articles.values()]
+        )
+        self.db.execute("INSERT OR REPLACE INTO reconciles VALUES (?, ?, ?)", (bot, source_id, now))
+        self.db.commit()
+
+    def reconcile_due(self, bot, source_id, interval=RECONCILE_INTERVAL):
+        """True if the source was never reconciled against Ada or the last reconcile is older than `interval`."""
+        row = self.db.execute(
+            "SELECT reconciled_at FROM reconciles WHERE bot = ? AND source_id = ?", (bot, source_id)
+        ).fetchone()
+        return row is None or time.time() - row[0] >= interval
+
+    def get_watermark(self, kb_id, bot, source_id):
+        """Return the newest Pylon timestamp already synced from a KB to a source, or None."""
+        row = self.db.execute(
+            "SELECT high_water FROM watermarks WHERE kb_id = ? AND bot = ? AND source_id = ?", (kb_id, bot, source_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, kb_id, bot, source_id, high_water, full_sweep=False):
+        """Advance the KB's watermark, also stamping the sweep time when the whole KB was listed."""
+        self.db.execute(
+            "INSERT INTO watermarks (kb_id, bot, source_id, high_water, full_sweep_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (kb_id, bot, source_id) DO UPDATE SET high_water = excluded.high_water,"
+            " full_sweep_at = COALESCE(excluded.full_sweep_at, watermarks.full_sweep_at)",
+            (kb_id, bot, source_id, high_water, time.time() if full_sweep else None)
+        )
+        self.db.commit()
+
+    def full_sweep_due(self, kb_id, bot, source_id, interval=FULL_SWEEP_INTERVAL):
+        """True if the KB was never fully listed for this source or the last full sweep is older than `interval`."""
+        row = self.db.execute(
+            "SELECT full_sweep_at FROM watermarks WHERE kb_id = ? AND bot = ? AND source_id = ?", (kb_id, bot, source_id)
+        ).fetchone()
+        return row is None or row[0] is None or time.time() - row[0] >= interval
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,86 @@
+"""Shared setup for the tests: an isolated working directory and local mock Pylon and Ada servers.
+
+Import this before any module of the tool. It moves the process into a temporary directory, so
+the log, metrics and SQLite files the tool creates next to itself never touch the checkout, and
+lifts the client-side Pylon rate limits so runs against the mocks don't wait.
+"""
+import os
+import sys
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+WORKDIR = tempfile.mkdtemp(prefix="pylon-ada-tests-")
+os.environ["SYNC_HTTP_CACHE"] = ""
+os.chdir(WORKDIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import ratelimit  # noqa: E402
+ratelimit.PYLON_RATE_LIMITS.clear()  # Must happen before the first Pylon client is created
+
+import http_client  # noqa: E402
+from conversion_cache import ConversionCache  # noqa: E402
+from mock_servers import MockAda, MockPylon  # noqa: E402
+from sync_state import SyncState  # noqa: E402
+
+KB_ID = "test-kb"
+SOURCE_ID = "test-source"
+BOT_HANDLE = "test-bot"
+API_KEY = "test-key"
+
+
+def article(article_id, html, published_at="2024-01-01T00:00:00Z"):
+    """A raw Pylon article."""
+    return {
+        "id": article_id,
+        "title": f"Article {article_id}",
+        "url": f"https://help.example.com/articles/{article_id}",
+        "last_published_at": published_at,
+        "current_published_content_html": html
+    }
+
+
+class MockKnowledgeBase:
+    """One Pylon KB and one Ada bot served locally, with their own sync state and conversion cache.
+
+    Use as a context manager; `articles` is the KB's live article list and can be edited between runs.
+    """
+
+    def __init__(self, articles):
+        self.articles = articles
+        self.pylon = MockPylon({KB_ID: {"title": "Test KB", "articles": articles}}, enforce_rate_limits=False)
+        self.ada = MockAda()
+        self.dir = tempfile.mkdtemp(dir=WORKDIR)
+        self.state = None
+        self.cache = None
+
+    def __enter__(self):
+        self.pylon.start()
+        self.ada.start()
+        http_client.PYLON_API_URL = self.pylon.url
+        self.state = SyncState(os.path.join(self.dir, "sync_state.sqlite3"))
+        self.cache = ConversionCache(os.path.join(self.dir, "conversion_cache.sqlite3"))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.state.close()
+        self.cache.close()
+        self.pylon.stop()
+        self.ada.stop()
+
+    def find(self, article_id):
+        return next(a for a in self.articles if a["id"] == article_id)
+
+    def delta_sync(self, **options):
+        """Run update_sync's delta sync against the mocks and return its counts."""
+        from update_sync import perform_delta_sync
+        return perform_delta_sync(KB_ID, SOURCE_ID, API_KEY, API_KEY, self.ada.url, BOT_HANDLE,
+                                  state=self.state, cache=self.cache, **options)
+
+    def stream_sync(self, **options):
+        """Run the streaming delta sync against the mocks and return its counts."""
+        from streaming import stream_delta_sync
+        return stream_delta_sync(KB_ID, SOURCE_ID, API_KEY, API_KEY, self.ada.url, BOT_HANDLE,
+                                 state=self.state, cache=self.cache, **options)
@@ -0,0 +1,73 @@
+"""Upsert batches and delete chunks stay within their size and count limits."""
+import json
+import unittest
+from urllib.parse import urlencode
+
+from harness import API_KEY, MockKnowledgeBase
+from batching import iter_batches, iter_id_chunks, upload_batches
+
+
+def ada_article(article_id, size=50):
+    return {"id": article_id, "name": f"Article {article_id}", "content": "x" * size, "knowledge_source_id": "source"}
+
+
+class IterBatchesTest(unittest.TestCase):
+
+    def test_serialized_batches_stay_under_the_byte_limit(self):
+        articles = [ada_article(str(i), size=i % 90) for i in range(300)]
+        for max_bytes in range(300, 6000, 97):
+            batches = list(iter_batches(articles, max_bytes=max_bytes, max_articles=100))
+            self.assertEqual([a for batch in batches for a in batch], articles)
+            for batch in batches:
+                self.assertLessEqual(len(json.dumps(batch).encode("utf-8")), max_bytes)
+
+    def test_full_batches_of_near_limit_articles_fit(self):
+        article_bytes = len(json.dumps(ada_article("0", size=1000)).encode("utf-8"))
+        max_bytes = 2 + 10 * (article_bytes + 1)  # Room for ten articles if separators were one byte each
+        articles = [ada_article(str(i % 10), size=1000) for i in range(30)]
+        for batch in iter_batches(articles, max_bytes=max_bytes, max_articles=100):
+            self.assertLessEqual(len(json.dumps(batch).encode("utf-8")), max_bytes)
+
+    def test_article_count_limit(self):
+        batches = list(iter_batches([ada_article(str(i)) for i in range(250)], max_articles=100))
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 50])
+
+    def test_oversized_article_goes_out_alone(self):
+        articles = [ada_article("small"), ada_article("big", size=5000), ada_article("small2")]
+        batches = list(iter_batches(articles, max_bytes=1000))
+        self.assertEqual([[a["id"] for a in batch] for batch in batches], [["small"], ["big"], ["small2"]])
+
+    def test_multi_byte_content_is_measured_in_bytes(self):
+        articles = [dict(ada_article(str(i)), content="é" * 200) for i in range(10)]
+        for batch in iter_batches(articles, max_bytes=3000):
+            self.assertLessEqual(len(json.dumps(batch).encode("utf-8")), 3000)
+
+
+class IterIdChunksTest(unittest.TestCase):
+
+    def test_query_strings_stay_under_the_limit(self):
+        article_ids = [f"article/{i}?&é" for i in range(500)]
+        chunks = list(iter_id_chunks(article_ids, max_query_bytes=1000, max_ids=100))
+        self.assertEqual([article_id for chunk in chunks for article_id in chunk], article_ids)
+        for chunk in chunks:
+            self.assertLessEqual(len(urlencode({"id": chunk}, doseq=True)), 1000)
+
+    def test_id_count_limit(self):
+        chunks = list(iter_id_chunks([str(i) for i in range(150)], max_ids=100))
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 50])
+
+
+class UploadBatchesTest(unittest.TestCase):
+
+    def test_every_batch_reaches_ada(self):
+        articles = [ada_article(str(i)) for i in range(40)]
+        with MockKnowledgeBase([]) as kb:
+            results = upload_batches(articles, API_KEY, kb.ada.url, max_articles=10)
+            self.assertEqual([result["batch"] for result in results], [1, 2, 3, 4])
+            self.assertTrue(all(result["ok"] for result in results))
+            self.assertEqual(set(kb.ada.articles), {article["id"] for article in articles})
+            self.assertEqual(kb.ada.stats()["requests"]["POST /bulk/articles"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Watch mode backs off on KBs that stay idle."""
+import asyncio
+import unittest
+from unittest import mock
+
+from harness import API_KEY, BOT_HANDLE, KB_ID, SOURCE_ID, MockKnowledgeBase, article
+import daemon  # noqa: E402  (after harness, which moves the process into a scratch directory)
+from metrics import serve_prometheus  # noqa: E402
+
+
+class WatcherBackoffTest(unittest.TestCase):
+
+    def test_idle_kb_with_empty_article_backs_off_to_max_interval(self):
+        polls = []
+        record = daemon.AdaptivePoller.record
+
+        def recording(poller, changes, error=False):
+            record(poller, changes, error)
+            polls.append((changes, error, poller.interval))
+            if len(polls) == 8:
+                watcher.stop()
+
+        with MockKnowledgeBase([article("a1", "<p>Hello</p>"), article("a2", "")]) as kb:
+            watcher = daemon.Watcher([{
+                "kb_id": KB_ID, "bot_handle": BOT_HANDLE, "source_id": SOURCE_ID, "ada_bot_url": kb.ada.url,
+                "pylon_api_key": API_KEY, "ada_api_key": API_KEY
+            }], min_interval=0.01, max_interval=0.05)
+            with mock.patch.object(daemon.AdaptivePoller, "record", recording):
+                asyncio.run(watcher.run())
+
+        self.assertEqual(polls[0][:2], (1, False))  # a1 is created; the empty a2 is not a change
+        self.assertEqual([changes for changes, _, _ in polls[1:]], [0] * 7)
+        self.assertEqual(polls[-1][2], 0.05)
+
+
+class MetricsEndpointTest(unittest.TestCase):
+
+    def test_listens_on_loopback_by_default(self):
+        server = serve_prometheus(0)
+        try:
+            self.assertEqual(server.server_address[0], "127.0.0.1")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
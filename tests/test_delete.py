@@ -0,0 +1,29 @@
+"""Deleting a knowledge source also removes it from the source registry."""
+import functools
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from harness import API_KEY, BOT_HANDLE, MockKnowledgeBase
+from delete import delete_ada_source
+from registry import SourceRegistry
+
+
+class DeleteSourceTest(unittest.TestCase):
+
+    def test_single_source_delete_forgets_the_source(self):
+        # A registry of its own, since other tests' syncs record sources for the same bot in the default one
+        path = os.path.join(tempfile.mkdtemp(), "registry.sqlite3")
+        with MockKnowledgeBase([]) as kb, \
+                mock.patch("delete.SourceRegistry", functools.partial(SourceRegistry, path)):
+            kb.ada.sources["src-1"] = {"id": "src-1", "name": "KB"}
+            registry = SourceRegistry(path)
+            registry.record_source(BOT_HANDLE, "src-1", "kb-1", "KB")
+            self.assertTrue(delete_ada_source("src-1", API_KEY, kb.ada.url, BOT_HANDLE))
+            self.assertEqual(registry.sources(BOT_HANDLE), [])
+            registry.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Articles whose content converts to nothing are never uploaded, counted or left behind in Ada."""
+import unittest
+
+from harness import MockKnowledgeBase, article
+
+
+class DeltaSyncEmptyArticlesTest(unittest.TestCase):
+
+    def test_always_empty_article_is_not_counted(self):
+        articles = [article("a1", "<p>Hello</p>"), article("a2", "")]
+        with MockKnowledgeBase(articles) as kb:
+            first = kb.delta_sync()
+            self.assertEqual((first["created"], first["updated"], first["deleted"], first["failed"]), (1, 0, 0, 0))
+            self.assertEqual(set(kb.ada.articles), {"a1"})
+
+            second = kb.delta_sync()
+            self.assertEqual((second["created"], second["updated"], second["deleted"], second["failed"]), (0, 0, 0, 0))
+
+    def test_article_emptied_in_pylon_is_deleted(self):
+        articles = [article("a1", "<p>Hello</p>"), article("a2", "<p>Soon gone</p>")]
+        with MockKnowledgeBase(articles) as kb:
+            self.assertEqual(kb.delta_sync()["created"], 2)
+
+            emptied = kb.find("a2")
+            emptied["current_published_content_html"] = "<p> </p>"
+            emptied["last_published_at"] = "2024-06-01T00:00:00Z"
+            result = kb.delta_sync()
+            self.assertEqual((result["created"], result["updated"], result["deleted"], result["failed"]), (0, 0, 1, 0))
+            self.assertEqual(set(kb.ada.articles), {"a1"})
+            self.assertEqual(set(kb.state.load("test-bot", "test-source")), {"a1"})
+
+            again = kb.delta_sync()
+            self.assertEqual((again["created"], again["updated"], again["deleted"]), (0, 0, 0))
+
+    def test_article_emptied_in_pylon_is_deleted_in_hash_mode(self):
+        articles = [article("a1", "<p>Hello</p>"), article("a2", "<p>Soon gone</p>")]
+        with MockKnowledgeBase(articles) as kb:
+            kb.delta_sync(detection="hash")
+
+            kb.find("a2")["current_published_content_html"] = ""
+            result = kb.delta_sync(detection="hash")
+            self.assertEqual((result["created"], result["updated"], result["deleted"]), (0, 0, 1))
+            self.assertEqual(set(kb.ada.articles), {"a1"})
+
+
+class StreamingEmptyArticlesTest(unittest.TestCase):
+
+    def test_always_empty_article_is_not_counted(self):
+        articles = [article("a1", "<p>Hello</p>"), article("a2", "")]
+        with MockKnowledgeBase(articles) as kb:
+            first = kb.stream_sync()
+            self.assertEqual((first["created"], first["updated"], first["deleted"], first["failed"]), (1, 0, 0, 0))
+
+            second = kb.stream_sync()
+            self.assertEqual((second["created"], second["updated"], second["deleted"], second["failed"]), (0, 0, 0, 0))
+
+    def test_article_emptied_in_pylon_is_deleted(self):
+        articles = [article("a1", "<p>Hello</p>"), article("a2", "<p>Soon gone</p>")]
+        with MockKnowledgeBase(articles) as kb:
+            self.assertEqual(kb.stream_sync()["created"], 2)
+
+            emptied = kb.find("a2")
+            emptied["current_published_content_html"] = ""
+            emptied["last_published_at"] = "2024-06-01T00:00:00Z"
+            result = kb.stream_sync()
+            self.assertEqual((result["created"], result["updated"], result["deleted"], result["failed"]), (0, 0, 1, 0))
+            self.assertEqual(set(kb.ada.articles), {"a1"})
+            self.assertEqual(set(kb.state.load("test-bot", "test-source")), {"a1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+"""Fingerprints ignore formatting-only differences in prose but never inside code."""
+import unittest
+
+import harness  # noqa: F401  (puts the checkout on sys.path)
+from fingerprint import fingerprint
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def test_prose_spacing_and_escapes_are_ignored(self):
+        self.assertEqual(fingerprint("Call  the \\_api\\_ now  \n\n\n* step"), fingerprint("Call the _api_ now\n\n- step"))
+
+    def test_spacing_change_in_fenced_code_is_detected(self):
+        self.assertNotEqual(fingerprint("Example:\n\n```\nfoo(a,  b)\n```"), fingerprint("Example:\n\n```\nfoo(a, b)\n```"))
+
+    def test_spacing_change_in_indented_code_is_detected(self):
+        self.assertNotEqual(fingerprint("Example:\n\n    x  = 1\n    y = 2"), fingerprint("Example:\n\n    x = 1\n    y = 2"))
+
+    def test_spacing_change_in_inline_code_is_detected(self):
+        self.assertNotEqual(fingerprint("Run `make  all` first"), fingerprint("Run `make all` first"))
+
+    def test_escapes_in_code_are_kept(self):
+        self.assertNotEqual(fingerprint("```\n* a\\_b\n```"), fingerprint("```\n- a_b\n```"))
+
+
+if __name__ == "__main__":
+    unittest.main()
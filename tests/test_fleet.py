@@ -0,0 +1,58 @@
+"""Fleet commands only require the API keys they actually use."""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from harness import WORKDIR
+from fleet import bot_credentials, load_config, main, sync_pairs
+
+CONFIG = {
+    "pylon_api_key_env": "TEST_PYLON_KEY",
+    "bots": {
+        "bot-a": {"ada_api_key_env": "TEST_ADA_KEY_A"},
+        "bot-b": {"ada_api_key_env": "TEST_ADA_KEY_B", "ada_bot_url": "http://127.0.0.1:9/"}
+    },
+    "syncs": [{"kb_id": "kb-1", "bot": "bot-a"}]
+}
+
+
+class FleetConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json", dir=WORKDIR)
+        with os.fdopen(fd, "w") as f:
+            json.dump(CONFIG, f)
+
+    def test_loading_needs_no_keys(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            config = load_config(self.path)
+        self.assertEqual(config["syncs"], [{"kb_id": "kb-1", "bot_handle": "bot-a", "source_id": "kb-1"}])
+
+    def test_delete_needs_only_the_named_bots_key(self):
+        config = load_config(self.path)
+        with mock.patch.dict(os.environ, {"TEST_ADA_KEY_B": "key-b"}, clear=True):
+            self.assertEqual(bot_credentials(config, "bot-b"), ("key-b", "http://127.0.0.1:9/"))
+            with self.assertRaisesRegex(ValueError, "TEST_ADA_KEY_A"):
+                bot_credentials(config, "bot-a")
+
+    def test_sync_needs_pylon_key_and_keys_of_bots_in_use(self):
+        config = load_config(self.path)
+        with mock.patch.dict(os.environ, {"TEST_PYLON_KEY": "pylon", "TEST_ADA_KEY_A": "key-a"}, clear=True):
+            pairs = sync_pairs(config)
+        self.assertEqual(pairs[0]["pylon_api_key"], "pylon")
+        self.assertEqual(pairs[0]["ada_api_key"], "key-a")
+        self.assertEqual(pairs[0]["ada_bot_url"], "https://bot-a.ada.support")
+
+        with mock.patch.dict(os.environ, {"TEST_ADA_KEY_A": "key-a"}, clear=True):
+            with self.assertRaisesRegex(ValueError, "TEST_PYLON_KEY"):
+                sync_pairs(config)
+
+    def test_sources_needs_no_keys(self):
+        with mock.patch.dict(os.environ, {}, clear=True), mock.patch("builtins.print"):
+            self.assertEqual(main(["sources"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
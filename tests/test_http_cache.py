@@ -0,0 +1,98 @@
+"""Pylon reads go through the response cache: fresh hits, 304 revalidation and forced revalidation."""
+import os
+import unittest
+from unittest import mock
+
+from harness import API_KEY, KB_ID, MockKnowledgeBase, article
+from http_cache import ResponseCache, expires_at
+from http_client import get_pylon_client
+
+ARTICLE_ENDPOINT = "GET /knowledge-bases/{kb}/articles/{id}"
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.kb = MockKnowledgeBase([article("a1", "<p>Hello</p>")]).__enter__()
+        self.addCleanup(self.kb.__exit__)
+        self.cache = ResponseCache(os.path.join(self.kb.dir, "http_cache.sqlite3"))
+        self.addCleanup(self.cache.close)
+        patcher = mock.patch("http_client.get_response_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, cache_ttl):
+        res = get_pylon_client(API_KEY).get(f"/knowledge-bases/{KB_ID}/articles/a1", cache_ttl=cache_ttl)
+        res.raise_for_status()
+        return res.json()["data"]["current_published_content_html"]
+
+    def requests_sent(self):
+        return self.kb.pylon.stats()["requests"].get(ARTICLE_ENDPOINT, 0)
+
+    def not_modified(self):
+        return self.kb.pylon.stats()["not_modified"].get(ARTICLE_ENDPOINT, 0)
+
+    def test_unchanged_resource_is_revalidated_with_a_304(self):
+        self.assertEqual(self.fetch(60), "<p>Hello</p>")
+        self.assertEqual(self.fetch(60), "<p>Hello</p>")
+        self.assertEqual((self.requests_sent(), self.not_modified()), (2, 1))
+
+        self.kb.find("a1")["current_published_content_html"] = "<p>Changed</p>"
+        self.assertEqual(self.fetch(60), "<p>Changed</p>")
+        self.assertEqual((self.requests_sent(), self.not_modified()), (3, 1))
+
+    def test_max_age_is_served_without_a_request(self):
+        self.kb.pylon.cache_control = "max-age=600"
+        self.fetch(60)
+        self.kb.find("a1")["current_published_content_html"] = "<p>Changed</p>"
+        self.assertEqual(self.fetch(60), "<p>Hello</p>")
+        self.assertEqual(self.requests_sent(), 1)
+
+    def test_no_store_is_never_cached(self):
+        self.kb.pylon.cache_control = "no-store"
+        self.fetch(60)
+        self.fetch(60)
+        self.assertEqual((self.requests_sent(), self.not_modified()), (2, 0))
+
+    def test_response_without_validators_is_reused_for_the_ttl(self):
+        self.kb.pylon.etags = False
+        self.fetch(60)
+        self.assertEqual(self.fetch(60), "<p>Hello</p>")
+        self.assertEqual(self.requests_sent(), 1)
+
+        self.fetch(0)
+        self.assertEqual(self.requests_sent(), 2)
+
+    def test_ttl_zero_revalidates_despite_max_age(self):
+        self.kb.pylon.cache_control = "max-age=600"
+        self.assertEqual(self.fetch(0), "<p>Hello</p>")
+
+        self.kb.find("a1")["current_published_content_html"] = "<p>Changed</p>"
+        self.assertEqual(self.fetch(0), "<p>Changed</p>")
+        self.assertEqual(self.requests_sent(), 2)
+
+    def test_ttl_zero_revalidates_an_entry_another_caller_stored_as_fresh(self):
+        self.kb.pylon.cache_control = "max-age=600"
+        self.fetch(60)
+        self.kb.find("a1")["current_published_content_html"] = "<p>Changed</p>"
+        self.assertEqual(self.fetch(0), "<p>Changed</p>")
+
+
+class ExpiresAtTest(unittest.TestCase):
+
+    def test_cache_control_directives(self):
+        etag = {"ETag": '"v1"'}
+        self.assertIsNone(expires_at({"Cache-Control": "no-store", **etag}, 60, 1000))
+        self.assertEqual(expires_at({"Cache-Control": "no-cache", **etag}, 60, 1000), 1000)
+        self.assertIsNone(expires_at({"Cache-Control": "no-cache"}, 60, 1000))
+        self.assertEqual(expires_at({"Cache-Control": "public, max-age=30"}, 60, 1000), 1030)
+        self.assertEqual(expires_at({"Cache-Control": "max-age=30", **etag}, 0, 1000), 1000)
+
+    def test_without_cache_control(self):
+        self.assertEqual(expires_at({"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, 60, 1000), 1000)
+        self.assertEqual(expires_at({}, 60, 1000), 1060)
+        self.assertIsNone(expires_at({}, 0, 1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
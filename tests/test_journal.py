@@ -0,0 +1,28 @@
+"""Only interactive runs keep a run journal; unattended delta syncs rely on the sync state."""
+import unittest
+from unittest import mock
+
+from harness import MockKnowledgeBase, article
+import journal  # noqa: E402  (after harness, which moves the process into a scratch directory)
+
+
+class DeltaSyncJournalTest(unittest.TestCase):
+
+    def test_unattended_run_writes_no_journal(self):
+        with MockKnowledgeBase([article("a1", "<p>Hello</p>")]) as kb, \
+                mock.patch("update_sync.open_run", wraps=journal.open_run) as open_run:
+            self.assertEqual(kb.delta_sync()["created"], 1)
+            open_run.assert_not_called()
+
+    def test_journaled_run_clears_its_entry_on_success(self):
+        with MockKnowledgeBase([article("a1", "<p>Hello</p>")]) as kb, \
+                mock.patch("update_sync.open_run", wraps=journal.open_run) as open_run:
+            self.assertEqual(kb.delta_sync(journal=True)["created"], 1)
+            open_run.assert_called_once()
+        runs = journal.RunJournal()
+        self.assertEqual(runs.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0], 0)
+        runs.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
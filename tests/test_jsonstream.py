@@ -0,0 +1,59 @@
+"""JsonArrayStream yields array items incrementally, however the response is split into chunks."""
+import json
+import unittest
+
+import harness  # noqa: F401  (puts the checkout on sys.path)
+from jsonstream import JsonArrayStream
+
+DOCUMENT = {
+    "note": 'not the array: "data": [1, 2]',
+    "total": 1234567,
+    "data": [{"id": str(i), "title": "Café ☕ " * i, "tags": [i, None, True]} for i in range(6)],
+    "pagination": {"cursor": "next", "has_next_page": True}
+}
+
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class JsonArrayStreamTest(unittest.TestCase):
+
+    def test_items_and_envelope_across_any_chunk_boundary(self):
+        raw = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+        envelope = {key: value for key, value in DOCUMENT.items() if key != "data"}
+        for size in (1, 2, 3, 5, 17, len(raw)):
+            stream = JsonArrayStream(chunked(raw, size))
+            self.assertEqual(list(stream), DOCUMENT["data"], size)
+            self.assertEqual(stream.envelope, envelope, size)
+
+    def test_items_are_yielded_before_the_stream_ends(self):
+        raw = json.dumps({"data": [{"id": "1"}, {"id": "2"}]}).encode("utf-8")
+        read = []
+
+        def chunks():
+            for chunk in chunked(raw, 4):
+                read.append(chunk)
+                yield chunk
+
+        items = iter(JsonArrayStream(chunks()))
+        self.assertEqual(next(items), {"id": "1"})
+        self.assertLess(sum(map(len, read)), len(raw))
+
+    def test_empty_array(self):
+        stream = JsonArrayStream([b'{"data": [], "pagination": {}}'])
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.envelope, {"pagination": {}})
+
+    def test_other_key(self):
+        stream = JsonArrayStream([b'{"data": "x", "items": [1, 2]}'], key="items")
+        self.assertEqual(list(stream), [1, 2])
+        self.assertEqual(stream.envelope, {"data": "x"})
+
+    def test_truncated_stream_raises(self):
+        with self.assertRaises(ValueError):
+            list(JsonArrayStream(chunked(b'{"data": [{"id": "1"}, {"id"', 4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
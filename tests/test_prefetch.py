@@ -0,0 +1,56 @@
+"""prefetch hands items, errors and early exits across its producer thread."""
+import itertools
+import threading
+import unittest
+
+from harness import API_KEY, KB_ID, MockKnowledgeBase, article
+from pagination import iter_pylon_articles, prefetch
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def test_yields_every_item_in_order(self):
+        self.assertEqual(list(prefetch(range(50), depth=4)), list(range(50)))
+
+    def test_source_error_is_raised_in_the_consumer(self):
+        def source():
+            yield 1
+            raise RuntimeError("listing failed")
+
+        items = prefetch(source())
+        self.assertEqual(next(items), 1)
+        with self.assertRaisesRegex(RuntimeError, "listing failed"):
+            next(items)
+
+    def test_consumer_stopping_early_stops_the_producer(self):
+        closed = threading.Event()
+
+        def source():
+            try:
+                yield from itertools.count()
+            finally:
+                closed.set()
+
+        before = threading.active_count()
+        items = prefetch(source(), depth=1)
+        self.assertEqual(next(items), 0)
+        items.close()
+        self.assertTrue(closed.is_set())
+        self.assertEqual(threading.active_count(), before)
+
+    def test_abandoned_streaming_listing_leaves_no_thread(self):
+        def client_threads():
+            # The mock server's per-connection threads outlive the request on a kept-alive connection
+            return {thread for thread in threading.enumerate() if "process_request_thread" not in thread.name}
+
+        with MockKnowledgeBase([article(f"a{i}", "<p>Hello</p>") for i in range(50)]) as kb:
+            before = client_threads()
+            articles = iter_pylon_articles(KB_ID, API_KEY, page_size=10)
+            self.assertEqual(next(articles)["id"], "a0")
+            articles.close()
+            self.assertEqual(client_threads(), before)
+            self.assertLess(kb.pylon.stats()["requests"]["GET /knowledge-bases/{kb}/articles"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
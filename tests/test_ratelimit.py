@@ -0,0 +1,110 @@
+"""The scheduler spaces requests, honours Retry-After and retries only what is safe to repeat."""
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+import requests
+
+from harness import API_KEY, MockKnowledgeBase
+from ratelimit import BACKOFF_MAX, RequestScheduler, TokenBucket, backoff_delay, parse_retry_after
+
+
+def response(status, retry_after=None):
+    return mock.Mock(status_code=status, headers={"Retry-After": retry_after} if retry_after else {})
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_requests_are_spaced_by_the_rate(self):
+        bucket = TokenBucket(600)  # One every 0.1s
+        self.assertLess(bucket.acquire(), 0.05)
+        started = time.monotonic()
+        bucket.acquire()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_pause_blocks_until_it_runs_out(self):
+        bucket = TokenBucket(6000)
+        bucket.pause(0.2)
+        self.assertGreaterEqual(bucket.acquire(), 0.18)
+
+
+class RetryAfterTest(unittest.TestCase):
+
+    def test_delta_seconds(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertEqual(parse_retry_after("-3"), 0.0)
+
+    def test_http_date(self):
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(parse_retry_after(formatdate(time.time() - 30, usegmt=True)), 0.0)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class BackoffTest(unittest.TestCase):
+
+    def test_delay_grows_and_is_capped(self):
+        with mock.patch("ratelimit.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual([backoff_delay(attempt) for attempt in range(3)], [1.0, 2.0, 4.0])
+            self.assertEqual(backoff_delay(20), BACKOFF_MAX)
+
+
+class SchedulerRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = RequestScheduler(max_retries=2)
+        patcher = mock.patch("ratelimit.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retry_after_is_honoured_and_the_throttled_response_closed(self):
+        throttled = response(429, "3")
+        responses = iter([throttled, response(200)])
+        res = self.scheduler.send("POST", "/api", lambda: next(responses))
+        self.assertEqual(res.status_code, 200)
+        self.sleep.assert_called_once_with(3.0)
+        throttled.close.assert_called_once()
+
+    def test_server_errors_are_retried_only_for_idempotent_requests(self):
+        responses = iter([response(503), response(200)])
+        self.assertEqual(self.scheduler.send("GET", "/api", lambda: next(responses)).status_code, 200)
+        self.assertEqual(self.scheduler.send("POST", "/api", lambda: response(503)).status_code, 503)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_gives_up_after_max_retries(self):
+        attempts = []
+        res = self.scheduler.send("GET", "/api", lambda: attempts.append(1) or response(429))
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(len(attempts), 3)
+
+    def test_connection_errors_are_retried_for_idempotent_requests(self):
+        def fail():
+            raise requests.ConnectionError("reset")
+
+        responses = iter([fail, lambda: response(200)])
+        self.assertEqual(self.scheduler.send("GET", "/api", lambda: next(responses)()).status_code, 200)
+        with self.assertRaises(requests.ConnectionError):
+            self.scheduler.send("POST", "/api", fail)
+
+
+class SchedulerAgainstMockTest(unittest.TestCase):
+
+    def test_throttled_requests_succeed_after_retry_after(self):
+        from http_client import get_ada_client
+        with MockKnowledgeBase([]) as kb, mock.patch("ratelimit.time.sleep") as sleep:
+            kb.ada.throttle_rate = 0.5  # Each throttled answer carries Retry-After: 1
+            client = get_ada_client(API_KEY, kb.ada.url)
+            for _ in range(5):
+                self.assertEqual(client.get("/api/v2/knowledge/sources").status_code, 200)
+            throttled = kb.ada.stats()["faults"].get("429", 0)
+            self.assertGreater(throttled, 0)
+            self.assertEqual(kb.ada.stats()["requests"]["GET /sources"], 5 + throttled)
+            self.assertEqual(sleep.call_count, throttled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+"""Snapshot records come back intact, whatever characters the articles contain."""
+import os
+import unittest
+
+from harness import API_KEY, KB_ID, MockKnowledgeBase, article
+from snapshot import Snapshot, capture_snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def test_line_separator_characters_do_not_split_records(self):
+        articles = [article("a1", "<p>One\u2028two\u2029three\x85four</p>"), article("a2", "<p>After</p>")]
+        with MockKnowledgeBase(articles) as kb:
+            path = os.path.join(kb.dir, "kb.snap")
+            self.assertEqual(capture_snapshot(KB_ID, API_KEY, path, cache=kb.cache), 2)
+
+            snapshot = Snapshot(path)
+            self.assertEqual(snapshot.get("a1")["raw"], articles[0])
+            self.assertEqual(snapshot.get("a2")["raw"], articles[1])
+            self.assertEqual([record["id"] for record in snapshot], ["a1", "a2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
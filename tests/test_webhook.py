@@ -0,0 +1,75 @@
+"""Webhook events only name an article; what is synced is decided by what Pylon returns."""
+import http.client
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+from harness import API_KEY, BOT_HANDLE, KB_ID, SOURCE_ID, MockKnowledgeBase, article
+from webhook import SingleArticleSyncer, make_handler, serve
+
+
+class SingleArticleSyncerTest(unittest.TestCase):
+
+    def syncer(self, kb):
+        syncer = SingleArticleSyncer([{
+            "kb_id": KB_ID, "bot_handle": BOT_HANDLE, "source_id": SOURCE_ID, "ada_bot_url": kb.ada.url,
+            "pylon_api_key": API_KEY, "ada_api_key": API_KEY
+        }])
+        syncer.state.close()
+        syncer.cache.close()
+        syncer.state, syncer.cache = kb.state, kb.cache
+        return syncer
+
+    def test_delete_event_for_published_article_keeps_it(self):
+        with MockKnowledgeBase([article("a1", "<p>Hello</p>")]) as kb:
+            kb.delta_sync()
+            self.syncer(kb)(KB_ID, "a1", "delete")
+            self.assertEqual(set(kb.ada.articles), {"a1"})
+
+    def test_article_gone_from_pylon_is_deleted(self):
+        articles = [article("a1", "<p>Hello</p>"), article("a2", "<p>Bye</p>")]
+        with MockKnowledgeBase(articles) as kb:
+            kb.delta_sync()
+            del articles[1]
+            self.syncer(kb)(KB_ID, "a2", "upsert")
+            self.assertEqual(set(kb.ada.articles), {"a1"})
+            self.assertIsNone(kb.state.get(BOT_HANDLE, SOURCE_ID, "a2"))
+
+    def test_unchanged_article_is_not_pushed_again(self):
+        with MockKnowledgeBase([article("a1", "<p>Hello</p>")]) as kb:
+            kb.delta_sync()
+            syncer = self.syncer(kb)
+            kb.ada.reset_stats()
+            syncer(KB_ID, "a1", "upsert")
+            self.assertNotIn("POST /bulk/articles", kb.ada.stats()["requests"])
+
+            kb.find("a1")["current_published_content_html"] = "<p>Hello again</p>"
+            syncer(KB_ID, "a1", "upsert")
+            self.assertEqual(kb.ada.stats()["requests"]["POST /bulk/articles"], 1)
+            self.assertEqual(kb.ada.articles["a1"]["content"], "Hello again")
+
+    def test_serve_requires_a_secret(self):
+        with self.assertRaises(ValueError):
+            serve([], port=0, secret="")
+
+    def test_non_ascii_secret_is_rejected(self):
+        coalescer = mock.Mock()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(coalescer, "s3cret"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            connection.putrequest("POST", "/")
+            connection.putheader("X-Webhook-Secret", "s3cr\u00e9t".encode("utf-8"))
+            connection.putheader("Content-Length", "2")
+            connection.endheaders(b"{}")
+            self.assertEqual(connection.getresponse().status, 401)
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        coalescer.add.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
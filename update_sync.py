@@ -1,239 +1,407 @@
-import requests
-from markdownify import markdownify as md
 import logging
-from datetime import datetime
-import hashlib
+import os
+import sys
+import time
 from dateutil import parser
+from http_client import request_stats_lines
+from pagination import PYLON_LISTING_NEWEST_FIRST, iter_ada_article_pages, iter_pylon_article_pages
+from batching import delete_batches, upload_batches
+from conversion_cache import ConversionCache
+from sync_state import SyncState
+from registry import SourceRegistry
+from articles import DEFAULT_TIMESTAMP, PylonArticle, convert_pending, resolve_timestamp
+from fingerprint import fingerprint, is_current
+from metrics import RunMetrics, add_phase, phase
+from logs import Progress, configure_logging, log_and_print, log_article, log_event
+from journal import close_run, journaled_pages, open_run
+
+# How changed articles are detected: "timestamp" (default) compares last-published timestamps,
+# "hash" compares normalized content fingerprints
+CHANGE_DETECTION = os.environ.get("SYNC_CHANGE_DETECTION", "timestamp")
+
+# Configure logging: JSON lines written through a background queue (see logs.py)
+configure_logging('update_sync.log')
 
-# Configure logging
-logging.basicConfig(
-    filename='update_sync.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s'
-)
-
-def log_and_print(msg, bot_handle=None, source_id=None):
-    # Add bot handle and source ID context to message
-    if bot_handle and source_id:
-        formatted_msg = f"[{bot_handle}:{source_id}] {msg}"
-    elif bot_handle:
-        formatted_msg = f"[{bot_handle}] {msg}"
-    else:
-        formatted_msg = msg
+def get_content_hash(content):
+    """Generate a fingerprint of normalized article content for comparison."""
+    # Normalizing first means HTML/Markdown conversion noise doesn't look like a content change
+    return fingerprint(content)
 
-    print(formatted_msg)
-    logging.info(formatted_msg)
 
-def get_content_hash(content):
-    """Generate hash of article content for comparison."""
-    return hashlib.md5(content.encode('utf-8')).hexdigest()
-
-
-def get_pylon_articles(kb_id, pylon_api_key, bot_handle=None, source_id=None):
-    """Fetch all articles from Pylon knowledge base."""
-    res = requests.get(
-        f"https://api.usepylon.com/knowledge-bases/{kb_id}/articles?limit=200",
-        headers={
-            "Authorization": f"Bearer {pylon_api_key}",
-            "Content-Type": "application/json"
-        }
-    )
-    res.raise_for_status()
-    articles = res.json()["data"]
+def get_pylon_articles(kb_id, pylon_api_key, bot_handle=None, source_id=None, since=None, journal_run=None):
+    """Fetch all articles from Pylon knowledge base as lazy PylonArticle records.
+
+    Markdown and content hashes are not computed here; convert_pending does that later for
+    the articles the diff actually needs. Returns the articles and whether the whole KB was
+    listed (False if pagination stopped at the `since` watermark). With a `journal_run`, every
+    page is checkpointed and the pages of a resumed run are replayed instead of fetched again.
+    """
+    # Stop paginating at the first page whose newest article is not newer than the watermark,
+    # when the listing order allows it
+    complete = True
+
+    def reached_watermark(page):
+        nonlocal complete
+        try:
+            older = bool(page) and parser.parse(resolve_timestamp(page[0]) or DEFAULT_TIMESTAMP) <= since_timestamp
+        except (ValueError, OverflowError, TypeError):
+            older = False
+        complete = complete and not older
+        return older
+
+    stop = None
+    if since and PYLON_LISTING_NEWEST_FIRST:
+        since_timestamp = parser.parse(since)
+        stop = reached_watermark
+
+    if journal_run is None:
+        pages = iter_pylon_article_pages(kb_id, pylon_api_key, stop=stop)
+    else:
+        pages = journaled_pages(
+            journal_run,
+            lambda cursor: iter_pylon_article_pages(kb_id, pylon_api_key, stop=stop, cursor=cursor, with_cursors=True),
+            stop
+        )
 
-    # Process articles into standardized format with content hash
     processed_articles = {}
-    for article in articles:
-        content = md(article.get("current_published_content_html", "") or "")
-        if content.strip():  # Only include articles with content
-            article_id = article.get("id") or article.get("_id")
-            article_title = article.get("title") or article.get("name") or "Untitled"
-
-            # Extract timestamp for comparison
-
-            # Try various timestamp field names that might exist
-            updated_at = (
-                article.get("updated_at") or
-                article.get("modified_at") or
-                article.get("last_updated") or
-                article.get("last_modified") or
-                article.get("last_published_at") or  # This is the key field from Pylon!
-                article.get("published_at") or
-                article.get("date_updated") or
-                article.get("date_modified")
-            )
-
-            # Log articles with missing timestamps to help identify data issues
-            if not updated_at:
-                log_and_print(f"Warning: Article '{article_title}' has no timestamp - using default date", bot_handle, source_id)
-                updated_at = "2020-01-01T00:00:00Z"
-
-            processed_articles[article_id] = {
-                "id": article_id,
-                "title": article_title,
-                "content": content,
-                "content_hash": get_content_hash(content),
-                "updated_at": updated_at,
-                "url": article.get("url", "")
-            }
-
-    log_and_print(f"Retrieved {len(processed_articles)} articles from Pylon", bot_handle, source_id)
-    return processed_articles
+    missing_timestamps = 0
+    with Progress(bot_handle, source_id) as progress:
+        progress.set_stage("Listing Pylon articles")
+        for page in pages:
+            for raw_article in page:
+                article = PylonArticle.from_pylon(raw_article)
+
+                # Log articles with missing timestamps to help identify data issues
+                if not article.updated_at:
+                    missing_timestamps += 1
+                    log_article("missing_timestamp", f"Article '{article.title}' has no timestamp - using default date",
+                                bot_handle, source_id, level=logging.WARNING, article_id=article.id)
+                    article.updated_at = DEFAULT_TIMESTAMP
+
+                processed_articles[article.id] = article
+            progress.add(fetched=len(page))
+
+    if missing_timestamps:
+        log_and_print(f"Warning: {missing_timestamps} articles have no timestamp - using default date", bot_handle, source_id,
+                      event="missing_timestamps", count=missing_timestamps)
+    log_and_print(f"Retrieved {len(processed_articles)} articles from Pylon", bot_handle, source_id,
+                  event="pylon_fetched", count=len(processed_articles))
+    if not complete:
+        log_and_print("Stopped listing at the watermark - deletions will be detected on the next full sweep", bot_handle, source_id)
+    return processed_articles, complete
 
 def get_ada_articles(source_id, ada_api_key, ada_bot_url, bot_handle=None):
-    """Fetch all articles from Ada knowledge source."""
-    res = requests.get(
-        f"{ada_bot_url}/api/v2/knowledge/articles/",
-        headers={
-            "Authorization": f"Bearer {ada_api_key}",
-            "Content-Type": "application/json"
-        },
-        params={
-            "knowledge_source_id": source_id,
-            "limit": 100
-        }
-    )
-    res.raise_for_status()
-    articles = res.json().get("data", [])
-
-    # Process articles into standardized format with content hash
+    """Fetch a snapshot of every article in the Ada knowledge source."""
+    # Project each article down to the fields the diff needs as soon as its page arrives,
+    # so article bodies are hashed and dropped instead of held for the whole run
     processed_articles = {}
-    for article in articles:
-        article_id = article.get("id")
-        content = article.get("content", "")
-        processed_articles[article_id] = {
-            "id": article_id,
-            "title": article.get("name", ""),
-            "content": content,
-            "content_hash": get_content_hash(content),
-            "updated_at": article.get("external_updated", "")
-        }
-
-    log_and_print(f"Retrieved {len(processed_articles)} articles from Ada", bot_handle, source_id)
+    with Progress(bot_handle, source_id) as progress:
+        progress.set_stage("Listing Ada articles")
+        for page in iter_ada_article_pages(source_id, ada_api_key, ada_bot_url):
+            for article in page:
+                article_id = article.get("id")
+                processed_articles[article_id] = {
+                    "id": article_id,
+                    "content_hash": get_content_hash(article.get("content", "") or ""),
+                    "updated_at": article.get("external_updated", "")
+                }
+            progress.add(fetched=len(page))
+
+    log_and_print(f"Retrieved {len(processed_articles)} articles from Ada", bot_handle, source_id,
+                  event="ada_fetched", count=len(processed_articles))
     return processed_articles
 
-def bulk_upsert_articles(articles, source_id, ada_api_key, ada_bot_url, bot_handle=None):
-    """Bulk create/update articles in Ada using the bulk upsert endpoint."""
+def bulk_upsert_articles(articles, source_id, ada_api_key, ada_bot_url, bot_handle=None, on_result=None):
+    """Bulk create/update articles in Ada using the bulk upsert endpoint. Returns the IDs of articles that failed.
+
+    `on_result`, if given, is called with each batch result as soon as the batch completes.
+    """
     if not articles:
-        return
+        return set()
 
     # Format articles for bulk upsert (as array, not object)
     formatted_articles = []
     for article in articles:
         formatted_articles.append({
-            "id": article["id"],
-            "name": article["title"],
-            "content": article["content"],
+            "id": article.id,
+            "name": article.title,
+            "content": article.content,
             "knowledge_source_id": source_id,
-            "external_updated": article["updated_at"],
-            "url": article.get("url", "")
+            "external_updated": article.updated_at,
+            "url": article.url
         })
 
-    res = requests.post(
-        f"{ada_bot_url}/api/v2/knowledge/bulk/articles/",
-        headers={
-            "Authorization": f"Bearer {ada_api_key}",
-            "Content-Type": "application/json"
-        },
-        json=formatted_articles
-    )
+    # Upload in size-bounded batches over a small worker pool; a failed batch doesn't stop the others
+    failed = set()
+    with Progress(bot_handle, source_id) as progress:
+        progress.set_stage(f"Uploading {len(formatted_articles)} articles to Ada")
+        for result in upload_batches(formatted_articles, ada_api_key, ada_bot_url, on_result=on_result):
+            log_batch_result(result, progress, bot_handle, source_id)
+            if not result["ok"]:
+                failed.update(result["ids"])
+
+    return failed
+
+def log_batch_result(result, progress, bot_handle=None, source_id=None):
+    """Log one bulk upsert batch: successes go to the log file and progress line, failures also to the console."""
+    titles = result["titles"]
+    summary = f"{len(titles)} articles: {', '.join(titles[:3])}{'...' if len(titles) > 3 else ''}"
+    if result["ok"]:
+        progress.add(uploaded=len(titles))
+        log_event(f"Batch {result['batch']}: bulk upserted {summary}", bot_handle, source_id,
+                  event="batch_upserted", batch=result["batch"], count=len(titles))
+    else:
+        progress.add(failed=len(titles))
+        log_and_print(f"Batch {result['batch']}: failed to upsert {summary} - {result['error']}", bot_handle, source_id,
+                      event="batch_failed", batch=result["batch"], count=len(titles), article_ids=result["ids"],
+                      error=result["error"])
 
-    try:
-        res.raise_for_status()
-        article_titles = [article["title"] for article in articles]
-        log_and_print(f"Bulk upserted {len(articles)} articles: {', '.join(article_titles[:3])}{'...' if len(articles) > 3 else ''}", bot_handle, source_id)
-    except Exception:
-        print("Ada response:", res.text)
-        raise
-
-def delete_articles_from_ada(article_ids, ada_api_key, ada_bot_url, bot_handle=None, source_id=None):
-    """Delete articles from Ada using the correct endpoint."""
+def delete_articles_from_ada(article_ids, ada_api_key, ada_bot_url, bot_handle=None, source_id=None, on_result=None):
+    """Delete articles from Ada in URL-safe chunks sent in parallel. Returns the IDs of articles that failed.
+
+    `on_result`, if given, is called with each chunk result as soon as the chunk completes.
+    """
     if not article_ids:
-        return
-
-    res = requests.delete(
-        f"{ada_bot_url}/api/v2/knowledge/articles/",
-        headers={
-            "Authorization": f"Bearer {ada_api_key}",
-            "Content-Type": "application/json"
-        },
-        params={
-            "id": article_ids
-        }
+        return set()
+
+    # A failed chunk doesn't stop the others; its IDs stay in the sync state so the next full listing retries them
+    failed = set()
+    for result in delete_batches(article_ids, ada_api_key, ada_bot_url, on_result=on_result):
+        if result["ok"]:
+            log_event(f"Delete chunk {result['batch']}: deleted {len(result['ids'])} articles", bot_handle, source_id,
+                      event="chunk_deleted", batch=result["batch"], count=len(result["ids"]), article_ids=result["ids"])
+        else:
+            failed.update(result["ids"])
+            log_and_print(f"Delete chunk {result['batch']}: failed to delete {len(result['ids'])} articles: {', '.join(result['ids'][:3])}{'...' if len(result['ids']) > 3 else ''} - {result['error']}", bot_handle, source_id,
+                          event="delete_failed", batch=result["batch"], count=len(result["ids"]), article_ids=result["ids"],
+                          error=result["error"])
+
+    deleted = len(article_ids) - len(failed)
+    log_and_print(f"Deleted {deleted} of {len(article_ids)} articles ({len(failed)} failed)", bot_handle, source_id,
+                  event="articles_deleted", count=deleted, failed=len(failed))
+    return failed
+
+def perform_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile=None,
+                       state=None, cache=None, detection=None, resume=False, journal=False):
+    """Perform delta comparison and sync between Pylon and Ada, returning created/updated/deleted/failed counts.
+
+    The diff runs against the local record of what was last pushed. The Ada source is only
+    re-read on the first run, when a reconcile is due, or when `reconcile` is True. Long-running
+    callers can pass their own `state` and `cache` to keep them open between runs. `detection`
+    selects "timestamp" or "hash" change detection (defaults to SYNC_CHANGE_DETECTION).
+    Each run's phase timings and request metrics are written to the metrics file.
+
+    With `journal` (the interactive CLI), fetched pages and acknowledged batches are checkpointed
+    in the run journal as the run goes. With `resume`, an interrupted or partly failed run is
+    continued: its pages are replayed from the journal, and articles it already uploaded or
+    deleted are not sent again. Unattended callers (fleet, watch mode, the engine) leave both off:
+    their next run picks up from the sync state and watermark, without journaling the whole KB.
+    """
+    return measure_run(
+        "delta_sync", kb_id, source_id, bot_handle, _delta_sync,
+        kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile, state, cache, detection, resume,
+        journal
     )
 
-    try:
-        res.raise_for_status()
-        log_and_print(f"Deleted {len(article_ids)} articles: {', '.join(article_ids[:3])}{'...' if len(article_ids) > 3 else ''}", bot_handle, source_id)
-    except Exception:
-        print("Ada response:", res.text)
-        raise
-
-def perform_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle):
-    """Perform delta comparison and sync between Pylon and Ada."""
-    log_and_print("Starting delta sync...", bot_handle, source_id)
-
-    # Fetch articles from both systems
-    pylon_articles = get_pylon_articles(kb_id, pylon_api_key, bot_handle, source_id)
-    ada_articles = get_ada_articles(source_id, ada_api_key, ada_bot_url, bot_handle)
-
-    pylon_ids = set(pylon_articles.keys())
-    ada_ids = set(ada_articles.keys())
-
-    # Articles in Pylon not in Ada → CREATE
-    to_create = pylon_ids - ada_ids
-    log_and_print(f"Articles to create: {len(to_create)}", bot_handle, source_id)
-
-    # Articles in both but timestamps differ → UPDATE
-    to_update = []
-    for article_id in pylon_ids & ada_ids:
-        pylon_timestamp_str = pylon_articles[article_id]["updated_at"]
-        ada_timestamp_str = ada_articles[article_id]["updated_at"]
-
+def measure_run(kind, kb_id, source_id, bot_handle, sync, *args):
+    """Run `sync(*args)` under a RunMetrics collector, log where its time went and write the run summary."""
+    with RunMetrics(kind, kb=kb_id, bot=bot_handle, source=source_id) as run:
         try:
-            # Parse timestamps to datetime objects for proper comparison
-            pylon_timestamp = parser.parse(pylon_timestamp_str)
-            ada_timestamp = parser.parse(ada_timestamp_str)
-
-            # Compare timestamps - update if Pylon is newer
-            if pylon_timestamp > ada_timestamp:
-                to_update.append(article_id)
-                log_and_print(f"Article updated: '{pylon_articles[article_id]['title']}' (ID: {article_id})", bot_handle, source_id)
-                log_and_print(f"  Pylon timestamp: {pylon_timestamp_str}", bot_handle, source_id)
-                log_and_print(f"  Ada timestamp: {ada_timestamp_str}", bot_handle, source_id)
-            elif pylon_timestamp == ada_timestamp:
-                log_and_print(f"Article unchanged: '{pylon_articles[article_id]['title']}' - timestamps match", bot_handle, source_id)
-            else:
-                log_and_print(f"Article unchanged: '{pylon_articles[article_id]['title']}' - Ada timestamp is newer", bot_handle, source_id)
+            result = sync(*args)
         except Exception as e:
-            # Fallback to content hash comparison if timestamp parsing fails
-            log_and_print(f"Timestamp parsing failed for '{pylon_articles[article_id]['title']}': {e}", bot_handle, source_id)
-            pylon_hash = pylon_articles[article_id]["content_hash"]
-            ada_hash = ada_articles[article_id]["content_hash"]
-            if pylon_hash != ada_hash:
-                to_update.append(article_id)
-                log_and_print(f"Article updated (fallback hash check): '{pylon_articles[article_id]['title']}' (ID: {article_id})", bot_handle, source_id)
-
-    log_and_print(f"Articles to update: {len(to_update)}", bot_handle, source_id)
-
-    # Bulk upsert for both creates and updates
-    articles_to_upsert = []
-    for article_id in to_create:
-        articles_to_upsert.append(pylon_articles[article_id])
-    for article_id in to_update:
-        articles_to_upsert.append(pylon_articles[article_id])
-
-    if articles_to_upsert:
-        bulk_upsert_articles(articles_to_upsert, source_id, ada_api_key, ada_bot_url, bot_handle)
-
-    # Articles in Ada not in Pylon → DELETE
-    to_delete = list(ada_ids - pylon_ids)
-    log_and_print(f"Articles to delete: {len(to_delete)}", bot_handle, source_id)
-
-    if to_delete:
-        delete_articles_from_ada(to_delete, ada_api_key, ada_bot_url, bot_handle, source_id)
-
-    log_and_print(f"Delta sync completed: {len(to_create)} created, {len(to_update)} updated, {len(to_delete)} deleted", bot_handle, source_id)
+            run.finish(error=str(e))
+            raise
+
+        log_and_print(f"Phase timings - {run.phase_line()}", bot_handle, source_id, event="phase_timings", phases=dict(run.phases))
+        # Report request counts, retries and time spent queued behind rate limits
+        for line in request_stats_lines(run.requests.snapshot()):
+            log_and_print(f"Requests - {line}", bot_handle, source_id)
+        run.finish(result)
+    return result
+
+def _delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile, state, cache, detection,
+                resume=False, journal=False):
+    detection = detection or CHANGE_DETECTION
+    log_and_print("Starting delta sync...", bot_handle, source_id)
+    owns_stores = state is None
+    if owns_stores:
+        state = SyncState()
+        cache = ConversionCache()
+    try:
+        journal_run = open_run("delta_sync", kb_id, bot_handle, source_id, resume) if journal or resume else None
+
+        # Track the KB's watermark so incremental runs can stop listing early, except on a periodic full sweep
+        full_sweep = reconcile or state.full_sweep_due(kb_id, bot_handle, source_id)
+        since = None if full_sweep else state.get_watermark(kb_id, bot_handle, source_id)
+        if since:
+            log_and_print(f"Incremental fetch since watermark {since}", bot_handle, source_id)
+
+        # Fetch articles from Pylon
+        with phase("pylon_fetch"):
+            pylon_articles, listing_complete = get_pylon_articles(kb_id, pylon_api_key, bot_handle, source_id, since, journal_run)
+
+        # Use local sync state for the Ada side unless a reconcile pass against Ada is needed
+        if reconcile is None:
+            reconcile = state.reconcile_due(bot_handle, source_id)
+        if reconcile:
+            log_and_print("Reconciling local sync state against Ada...", bot_handle, source_id)
+            with phase("ada_fetch"):
+                ada_articles = get_ada_articles(source_id, ada_api_key, ada_bot_url, bot_handle)
+                state.replace(bot_handle, source_id, ada_articles)
+        else:
+            with phase("state_load"):
+                ada_articles = state.load(bot_handle, source_id)
+            log_and_print(f"Loaded {len(ada_articles)} articles from local sync state", bot_handle, source_id)
+
+        pylon_ids = set(pylon_articles.keys())
+        ada_ids = set(ada_articles.keys())
+
+        # Articles in Pylon not in Ada → CREATE
+        to_create = pylon_ids - ada_ids
+        log_and_print(f"Articles to create: {len(to_create)}", bot_handle, source_id, event="to_create", count=len(to_create))
+
+        # Articles in both but timestamps (or, in hash mode, content fingerprints) differ → UPDATE
+        to_update = []
+        common_ids = pylon_ids & ada_ids
+        if detection == "hash":
+            # Hash mode needs every shared article's content; the conversion cache keeps this cheap on repeat runs
+            with phase("conversion"):
+                convert_pending([pylon_articles[article_id] for article_id in common_ids], cache, get_content_hash)
+
+        timestamp_failures = 0
+        diff_started = time.perf_counter()
+        for article_id in common_ids:
+            pylon_article = pylon_articles[article_id]
+            pylon_timestamp_str = pylon_article.updated_at
+            ada_timestamp_str = ada_articles[article_id]["updated_at"]
+
+            # Legacy hashes from before normalization can't be compared, so those articles use timestamps
+            if detection == "hash" and is_current(ada_articles[article_id]["content_hash"]):
+                if pylon_article.content_hash != ada_articles[article_id]["content_hash"]:
+                    to_update.append(article_id)
+                    log_article("article_changed", f"Article updated (content changed): '{pylon_article.title}' (ID: {article_id})",
+                                bot_handle, source_id, article_id=article_id, reason="content")
+                else:
+                    log_article("article_unchanged", f"Article unchanged: '{pylon_article.title}' - content matches",
+                                bot_handle, source_id, article_id=article_id, reason="content")
+                continue
+
+            try:
+                # Parse timestamps to datetime objects for proper comparison (Pylon's is cached on the record)
+                pylon_timestamp = pylon_article.timestamp
+                ada_timestamp = parser.parse(ada_timestamp_str)
+
+                # Compare timestamps - update if Pylon is newer
+                if pylon_timestamp > ada_timestamp:
+                    to_update.append(article_id)
+                    log_article("article_changed", f"Article updated: '{pylon_article.title}' (ID: {article_id})",
+                                bot_handle, source_id, article_id=article_id, reason="timestamp",
+                                pylon_updated=pylon_timestamp_str, ada_updated=ada_timestamp_str)
+                elif pylon_timestamp == ada_timestamp:
+                    log_article("article_unchanged", f"Article unchanged: '{pylon_article.title}' - timestamps match",
+                                bot_handle, source_id, article_id=article_id, reason="timestamp")
+                else:
+                    log_article("article_unchanged", f"Article unchanged: '{pylon_article.title}' - Ada timestamp is newer",
+                                bot_handle, source_id, article_id=article_id, reason="ada_newer")
+            except Exception as e:
+                # Fallback to content hash comparison if timestamp parsing fails
+                timestamp_failures += 1
+                log_article("timestamp_unparseable", f"Timestamp parsing failed for '{pylon_article.title}': {e}",
+                            bot_handle, source_id, level=logging.WARNING, article_id=article_id, error=str(e))
+                convert_pending([pylon_article], cache, get_content_hash)
+                pylon_hash = pylon_article.content_hash
+                ada_hash = ada_articles[article_id]["content_hash"]
+                if pylon_hash != ada_hash:
+                    to_update.append(article_id)
+                    log_article("article_changed", f"Article updated (fallback hash check): '{pylon_article.title}' (ID: {article_id})",
+                                bot_handle, source_id, article_id=article_id, reason="fallback_hash")
+
+        add_phase("diff", time.perf_counter() - diff_started)
+        if timestamp_failures:
+            log_and_print(f"Timestamp parsing failed for {timestamp_failures} articles - compared by content instead", bot_handle, source_id,
+                          event="timestamp_fallbacks", count=timestamp_failures)
+        log_and_print(f"Articles to update: {len(to_update)}", bot_handle, source_id, event="to_update", count=len(to_update))
+
+        # Bulk upsert for both creates and updates
+        articles_to_upsert = []
+        for article_id in to_create:
+            articles_to_upsert.append(pylon_articles[article_id])
+        for article_id in to_update:
+            articles_to_upsert.append(pylon_articles[article_id])
+
+        # Markdown and hashes are computed only now, for the articles that are actually uploaded
+        with phase("conversion"):
+            articles_to_upsert = convert_pending(articles_to_upsert, cache, get_content_hash)
+        log_and_print(cache.stats_line(), bot_handle, source_id)
+
+        # Articles with empty content are never uploaded; those already in Ada were emptied in Pylon and are deleted
+        empty_ids = (to_create | set(to_update)) - {article.id for article in articles_to_upsert}
+        emptied_ids = empty_ids & ada_ids
+        if empty_ids:
+            to_create -= empty_ids
+            to_update = [article_id for article_id in to_update if article_id not in empty_ids]
+            log_and_print(f"Skipping {len(empty_ids)} articles with empty content ({len(emptied_ids)} to delete from Ada)", bot_handle, source_id,
+                          event="empty_articles", count=len(empty_ids), emptied=len(emptied_ids))
+
+        # Record each batch as soon as Ada acknowledges it, so failed articles are retried on the next run
+        # and an interrupted run resumes with only the articles that weren't acknowledged yet
+        upserting = {article.id: article for article in articles_to_upsert}
+
+        def upserted(result):
+            if result["ok"]:
+                state.record_pushed(bot_handle, source_id, [upserting[article_id] for article_id in result["ids"]])
+                if journal_run:
+                    journal_run.record_acked("upsert", result["ids"])
+
+        with phase("upsert"):
+            failed = bulk_upsert_articles(articles_to_upsert, source_id, ada_api_key, ada_bot_url, bot_handle, upserted)
+
+        # Articles in Ada not in Pylon → DELETE
+        # A listing cut short at the watermark can't tell deleted articles from older ones
+        to_delete = list(ada_ids - pylon_ids) if listing_complete else []
+        to_delete.extend(emptied_ids)
+        log_and_print(f"Articles to delete: {len(to_delete)}", bot_handle, source_id, event="to_delete", count=len(to_delete))
+
+        def deleted_chunk(result):
+            if result["ok"]:
+                state.forget(bot_handle, source_id, result["ids"])
+                if journal_run:
+                    journal_run.record_acked("delete", result["ids"])
+
+        delete_failed = set()
+        if to_delete:
+            with phase("delete"):
+                delete_failed = delete_articles_from_ada(to_delete, ada_api_key, ada_bot_url, bot_handle, source_id, deleted_chunk)
+        deleted = len(to_delete) - len(delete_failed)
+
+        # Advance the watermark to the newest timestamp seen, unless some uploads failed and must be retried
+        if not failed:
+            newest = None
+            for article in pylon_articles.values():
+                try:
+                    if newest is None or article.timestamp > newest.timestamp:
+                        newest = article
+                except (ValueError, OverflowError, TypeError):
+                    continue  # Unparseable timestamps never become the watermark
+            state.set_watermark(kb_id, bot_handle, source_id, newest.updated_at if newest else since, full_sweep=listing_complete)
+    finally:
+        if owns_stores:
+            state.close()
+            cache.close()
+
+    # Failed deletes count as failed articles too, but don't hold back the watermark
+    failed_count = len(failed) + len(delete_failed)
+    if journal_run:
+        close_run(journal_run, failed_count, bot_handle, source_id)
+    log_and_print(f"Delta sync completed: {len(to_create)} created, {len(to_update)} updated, {deleted} deleted, {failed_count} failed", bot_handle, source_id,
+                  event="sync_completed", created=len(to_create), updated=len(to_update), deleted=deleted, failed=failed_count)
+
+    return {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "deleted": deleted,
+        "failed": failed_count
+    }
 
 def get_user_credentials():
     """Prompt user for their API credentials and bot handle."""
@@ -278,8 +446,26 @@ if __name__ == "__main__":
         # Extract bot handle from URL
         bot_handle = ada_bot_url.replace("https://", "").replace(".ada.support", "")
 
-        # Run delta sync
-        perform_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle)
+        # Run delta sync (pass --reconcile to force a full comparison against Ada,
+        # --hash to detect changes by content fingerprint instead of timestamps,
+        # --stream to run as a memory-bounded pipeline for very large knowledge bases,
+        # --resume to continue an interrupted run from its journal instead of starting over)
+        reconcile = True if "--reconcile" in sys.argv else None
+        detection = "hash" if "--hash" in sys.argv else None
+        resume = "--resume" in sys.argv
+        if "--stream" in sys.argv:
+            # A streaming run records every acknowledged batch in the sync state, so it always resumes where uploads stopped
+            from streaming import stream_delta_sync
+            result = stream_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile,
+                                       detection=detection)
+        else:
+            result = perform_delta_sync(kb_id, source_id, pylon_api_key, ada_api_key, ada_bot_url, bot_handle, reconcile,
+                                        detection=detection, resume=resume, journal=True)
+
+        # Keep the registry's last-sync result for this source up to date
+        registry = SourceRegistry()
+        registry.record_sync_result(bot_handle, source_id, kb_id, result)
+        registry.close()
 
     except Exception as e:
         logging.error(f"Update sync failed: {e}")
@@ -0,0 +1,259 @@
+"""Receiver for Pylon article webhooks that syncs single articles to Ada as they are published or deleted.
+
+Usage:
+  SYNC_WEBHOOK_SECRET=... python webhook.py serve <CONFIG> [--host HOST] [--port PORT]
+  python webhook.py send <URL> <KB_ID> <ARTICLE_ID> [--type TYPE] [--count N] [--secret SECRET]
+
+`serve` uses the same config file as fleet.py to map each KB to its Ada sources, and refuses to
+start without a shared secret. `send` is a fake event sender for trying the receiver locally.
+"""
+import argparse
+import hmac
+import json
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from articles import DEFAULT_TIMESTAMP, PylonArticle, convert_pending
+from conversion_cache import ConversionCache
+from http_client import get_pylon_client
+from sync_state import SyncState
+from update_sync import bulk_upsert_articles, delete_articles_from_ada, get_content_hash, log_and_print
+
+# Wait this long after the last event for an article before syncing it, so bursts collapse into one sync
+DEBOUNCE_SECONDS = float(os.environ.get("SYNC_WEBHOOK_DEBOUNCE_SECONDS", "2"))
+
+# ...but never hold an article back longer than this while edits keep arriving
+MAX_DELAY_SECONDS = float(os.environ.get("SYNC_WEBHOOK_MAX_DELAY_SECONDS", "10"))
+
+# Shared secret that every request must carry in the X-Webhook-Secret header; serve won't start without it
+WEBHOOK_SECRET = os.environ.get("SYNC_WEBHOOK_SECRET", "")
+
+
+def parse_event(body):
+    """Extract (kb_id, article_id, action) from a Pylon article event, where action is "upsert" or "delete"."""
+    event = json.loads(body)
+    data = event.get("data") or {}
+    event_type = (event.get("type") or event.get("event") or "").lower()
+    kb_id = data.get("knowledge_base_id") or data.get("kb_id") or event.get("knowledge_base_id")
+    article_id = data.get("id") or data.get("article_id") or event.get("article_id")
+    if not kb_id or not article_id:
+        raise ValueError("Event is missing the knowledge base or article ID")
+    action = "delete" if "delete" in event_type or "unpublish" in event_type else "upsert"
+    return kb_id, article_id, action
+
+
+class EventCoalescer:
+    """Collapses bursts of events per article and hands each article to `handle` once things go quiet."""
+
+    def __init__(self, handle, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS):
+        self.handle = handle
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.pending = {}  # (kb_id, article_id) -> [action, first_seen, last_seen]
+        self.condition = threading.Condition()
+        self.stopping = False
+
+    def add(self, kb_id, article_id, action):
+        now = time.monotonic()
+        with self.condition:
+            entry = self.pending.get((kb_id, article_id))
+            if entry:
+                # The latest event decides whether the article ends up upserted or deleted
+                entry[0] = action
+                entry[2] = now
+            else:
+                self.pending[(kb_id, article_id)] = [action, now, now]
+            self.condition.notify()
+
+    def _due(self, now):
+        due = []
+        next_wake = None
+        for key, (action, first_seen, last_seen) in self.pending.items():
+            ready_at = min(last_seen + self.debounce, first_seen + self.max_delay)
+            if ready_at <= now:
+                due.append((key, action))
+            elif next_wake is None or ready_at < next_wake:
+                next_wake = ready_at
+        for key, _ in due:
+            del self.pending[key]
+        return due, next_wake
+
+    def run(self):
+        """Worker loop: sync articles as their debounce window closes."""
+        while True:
+            with self.condition:
+                while True:
+                    if self.stopping:
+                        return
+                    due, next_wake = self._due(time.monotonic())
+                    if due:
+                        break
+                    self.condition.wait(None if next_wake is None else next_wake - time.monotonic())
+
+            for (kb_id, article_id), action in due:
+                try:
+                    self.handle(kb_id, article_id, action)
+                except Exception as e:
+                    log_and_print(f"Webhook sync failed for article {article_id} in KB {kb_id}: {e}")
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+
+
+class SingleArticleSyncer:
+    """Fetches one Pylon article and upserts or deletes it in every Ada source mapped to its KB.
+
+    The event only says which article to look at: what happens to it is decided by what Pylon
+    returns, so an event can never delete an article that is still published.
+    """
+
+    def __init__(self, pairs):
+        self.pairs_by_kb = {}
+        for pair in pairs:
+            self.pairs_by_kb.setdefault(pair["kb_id"], []).append(pair)
+        self.state = SyncState()
+        self.cache = ConversionCache()
+
+    def fetch_article(self, kb_id, article_id, pylon_api_key):
+        """Fetch one article (rate-limited to Pylon's 20 req/min by the shared client), or None if it is gone.
+
+        The article is always revalidated (never reused on a TTL, since an event means it may have
+        changed), so a repeated event for an unchanged article costs a bodyless 304.
+        """
+        res = get_pylon_client(pylon_api_key).get(f"/knowledge-bases/{kb_id}/articles/{article_id}", cache_ttl=0)
+        if res.status_code == 404:
+            return None
+        res.raise_for_status()
+        raw_article = res.json().get("data")
+        if not raw_article or not raw_article.get("current_published_content_html"):
+            return None  # Unpublished articles are removed from Ada, like empty ones are skipped by the syncs
+
+        article = PylonArticle.from_pylon(raw_article)
+        article.updated_at = article.updated_at or DEFAULT_TIMESTAMP
+        converted = convert_pending([article], self.cache, get_content_hash)
+        return converted[0] if converted else None
+
+    def __call__(self, kb_id, article_id, action):
+        pairs = self.pairs_by_kb.get(kb_id)
+        if not pairs:
+            log_and_print(f"Ignoring event for article {article_id}: KB {kb_id} is not configured")
+            return
+
+        # Pairs for the same KB share a Pylon key, so the article is fetched once. A failed fetch raises,
+        # so nothing is deleted unless Pylon confirmed the article is gone or unpublished
+        article = self.fetch_article(kb_id, article_id, pairs[0]["pylon_api_key"])
+        if article is None and action == "upsert":
+            log_and_print(f"Article {article_id} in KB {kb_id} is gone or unpublished - removing it from Ada")
+        elif article is not None and action == "delete":
+            log_and_print(f"Article {article_id} in KB {kb_id} is still published in Pylon - syncing it instead of deleting")
+
+        for pair in pairs:
+            bot_handle = pair["bot_handle"]
+            source_id = pair["source_id"]
+            ada_bot_url = pair.get("ada_bot_url") or f"https://{bot_handle}.ada.support"
+
+            if article is not None:
+                pushed = self.state.get(bot_handle, source_id, article_id)
+                if pushed and pushed["content_hash"] == article.content_hash:
+                    log_and_print(f"Article {article_id} is unchanged since it was last pushed - skipping", bot_handle, source_id)
+                    continue
+                failed = bulk_upsert_articles([article], source_id, pair["ada_api_key"], ada_bot_url, bot_handle)
+                if not failed:
+                    self.state.record_pushed(bot_handle, source_id, [article])
+            else:
+                if not delete_articles_from_ada([article_id], pair["ada_api_key"], ada_bot_url, bot_handle, source_id):
+                    self.state.forget(bot_handle, source_id, [article_id])
+
+
+def make_handler(coalescer, secret):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, message):
+            body = json.dumps({"message": message}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            # Compared as bytes: compare_digest rejects str with non-ASCII characters instead of returning False
+            if not hmac.compare_digest(self.headers.get("X-Webhook-Secret", "").encode("utf-8"), secret.encode("utf-8")):
+                return self._reply(401, "invalid secret")
+            try:
+                kb_id, article_id, action = parse_event(body)
+            except (ValueError, AttributeError) as e:
+                return self._reply(400, str(e))
+
+            # Acknowledge immediately; the coalescer syncs the article in the background
+            coalescer.add(kb_id, article_id, action)
+            self._reply(202, "queued")
+
+        def log_message(self, format, *args):
+            pass  # Every event is already logged when it is synced
+
+    return WebhookHandler
+
+
+def serve(pairs, host="127.0.0.1", port=8080, secret=WEBHOOK_SECRET):
+    """Run the webhook receiver until interrupted. Raises ValueError if no shared secret is set."""
+    if not secret:
+        raise ValueError("SYNC_WEBHOOK_SECRET must be set: the receiver only accepts events carrying it in X-Webhook-Secret")
+    coalescer = EventCoalescer(SingleArticleSyncer(pairs))
+    worker = threading.Thread(target=coalescer.run, daemon=True)
+    worker.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(coalescer, secret))
+    log_and_print(f"Listening for Pylon article webhooks on {host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        coalescer.stop()
+        worker.join()
+
+
+def send_event(url, kb_id, article_id, event_type="article.updated", secret=None):
+    """Fake event sender: POST one Pylon-style article event to a receiver and return the HTTP status."""
+    body = json.dumps({"type": event_type, "data": {"id": article_id, "knowledge_base_id": kb_id}}).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Webhook-Secret"] = secret
+    with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers, method="POST")) as res:
+        return res.status
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Pylon article webhook receiver and fake event sender.")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    serve_command = commands.add_parser("serve", help="Receive Pylon article events and sync them to Ada")
+    serve_command.add_argument("config")
+    serve_command.add_argument("--host", default="127.0.0.1", help="Interface to listen on (0.0.0.0 for all)")
+    serve_command.add_argument("--port", type=int, default=8080)
+
+    send_command = commands.add_parser("send", help="Send fake article events to a receiver")
+    send_command.add_argument("url")
+    send_command.add_argument("kb_id")
+    send_command.add_argument("article_id")
+    send_command.add_argument("--type", default="article.updated")
+    send_command.add_argument("--count", type=int, default=1, help="Send a burst of identical events")
+    send_command.add_argument("--secret")
+
+    args = arg_parser.parse_args()
+    if args.command == "serve":
+        from fleet import load_config, sync_pairs
+        try:
+            serve(sync_pairs(load_config(args.config)), args.host, args.port)
+        except ValueError as e:
+            arg_parser.error(str(e))
+    else:
+        for _ in range(args.count):
+            print(send_event(args.url, args.kb_id, args.article_id, args.type, args.secret))